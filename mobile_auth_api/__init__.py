@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
 from . import controllers
 from . import models
+
+
+def post_load():
+    from .session_store import install_session_store
+    install_session_store()
@@ -10,8 +10,10 @@
                 'website_event', 'hr_reward_warning','project','event'],
     'data': [
         'security/ir.model.access.csv',     
+        'data/ir_cron.xml',
         'views/hr_employee.xml',
     ],
+    'post_load': 'post_load',
     'installable': True,
     'application': False,
 }
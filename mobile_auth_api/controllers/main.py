@@ -1,5 +1,5 @@
 import odoo
-from odoo import http, SUPERUSER_ID, fields
+from odoo import api, http, SUPERUSER_ID, fields
 from odoo.http import request, Response
 from odoo.addons.web.controllers.utils import ensure_db
 from datetime import datetime, timedelta, date
@@ -7,19 +7,181 @@ from dateutil.relativedelta import relativedelta
 import json
 import logging
 import base64
+import functools
+import hashlib
 import math
+import os
 import re
 import pytz
+import sqlite3
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent import futures
 from datetime import time
 from datetime import datetime
-from odoo.exceptions import ValidationError, UserError
+from odoo.exceptions import AccessError, MissingError, ValidationError, UserError
+from odoo.osv import expression
+from psycopg2.errors import UniqueViolation
+from odoo.addons.mobile_auth_api.models.ir_http import MOBILE_METRICS
+
+MOBILE_IMAGE_MODELS = ('res.users', 'res.partner', 'hr.employee')
+MOBILE_IMAGE_SIZES = (128, 256, 512, 1024)
+MOBILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024  # 10 MB
+MOBILE_UPLOAD_MIMETYPES = ('image/jpeg', 'image/png', 'application/pdf')
+MOBILE_BULK_MAX_ITEMS = 50
+MOBILE_BULK_MAX_SIZE = 100 * 1024 * 1024
+# longest range of /mobile/team/availability, a quarter
+MOBILE_AVAILABILITY_MAX_DAYS = 92
+# resumable uploads of /mobile/upload/*
+MOBILE_CHUNKED_UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+MOBILE_UPLOAD_CHUNK_SIZE = 1024 * 1024
+MOBILE_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+MOBILE_BATCH_MAX_ITEMS = 20
+# routes that manage the session itself cannot run inside a batch
+MOBILE_BATCH_EXCLUDED_ROUTES = ('/mobile/login', '/mobile/logout', '/mobile/batch')
+
+# /mobile/sync sections and the model they synchronize
+MOBILE_SYNC_MODELS = {
+    'leaves': 'hr.leave',
+    'tasks': 'project.task',
+    'documents': 'hr.employee.document',
+    'expenses': 'hr.expense',
+    'announcements': 'hr.announcement',
+}
+MOBILE_SYNC_MAX_LIMIT = 500
+# write_date and tombstone ids are taken when a transaction starts, not when it
+# commits: the sync re-reads this window, which outlasts twice the longest
+# transaction, so that a late commit is not skipped. Clients dedup by id.
+MOBILE_SYNC_OVERLAP = timedelta(minutes=10)
+
+# Bump when the layout of the /mobile/snapshot database changes
+MOBILE_SNAPSHOT_VERSION = 1
+MOBILE_SNAPSHOT_CHUNK = 500
+
+# /mobile/home sections and their timeout in seconds
+MOBILE_HOME_SECTIONS = {
+    'attendance': 3,
+    'unread_count': 2,
+    'next_payslips': 3,
+    'events': 2,
+    'announcements': 2,
+}
+MOBILE_HOME_WORKERS = 4
+
+_logger = logging.getLogger(__name__)
+_home_executor = None
+# free threads of the pool: sections never queue behind other requests, which
+# also bounds the extra database connections to MOBILE_HOME_WORKERS
+_home_slots = threading.BoundedSemaphore(MOBILE_HOME_WORKERS)
+
+
+def _get_home_executor():
+    # created lazily so that prefork workers do not share the pool threads
+    global _home_executor
+    if _home_executor is None:
+        _home_executor = futures.ThreadPoolExecutor(
+            max_workers=MOBILE_HOME_WORKERS, thread_name_prefix='mobile_home')
+    return _home_executor
+
+MobileContext = namedtuple('MobileContext', [
+    'user', 'user_ctx', 'partner', 'employee', 'tz_name', 'tz',
+    'calendar', 'department', 'job',
+])
+
+
+def mobile_etag(stamp=None):
+    """
+    Conditional GET for a mobile route, to be applied below ``@http.route``.
+
+    ``stamp`` names a controller method returning a string that changes
+    whenever the response may change (typically the write_date of the records
+    it depends on); it is evaluated before the route so an unchanged response
+    is neither computed nor serialized. Without a stamp the ETag is a hash of
+    the serialized result, which only saves the transfer.
+
+    A matching ``If-None-Match`` yields a 304 for both ``http`` and ``json``
+    routes; the latter is converted by ``ir.http._post_dispatch``.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(self, *args, **kwargs):
+            if self._in_batch():
+                # the headers of the batch request do not apply to its items
+                return endpoint(self, *args, **kwargs)
+            if stamp:
+                etag = hashlib.sha1(getattr(self, stamp)(**kwargs).encode()).hexdigest()
+                if request.httprequest.if_none_match.contains(etag):
+                    return self._not_modified(etag)
+                result = endpoint(self, *args, **kwargs)
+            else:
+                result = endpoint(self, *args, **kwargs)
+                etag = self._get_result_etag(result)
+                if etag and request.httprequest.if_none_match.contains(etag):
+                    return self._not_modified(etag)
+            if etag and self._get_result_status(result) == 200:
+                request._mobile_etag = etag
+            return result
+        return wrapper
+    return decorator
+
 
 class MobileApiHome(http.Controller):
 
-    def _get_user_day_range_utc(self):
-        user = request.env.user
-        tz_name = user.tz or 'UTC'
-        user_tz = pytz.timezone(tz_name)
+    def _in_batch(self):
+        return getattr(request, '_mobile_batch_params', None) is not None
+
+    def _get_json_data(self):
+        """ Arguments of a JSON route: the raw request body, or the params of
+        the current item when running inside /mobile/batch. """
+        if self._in_batch():
+            return request._mobile_batch_params
+        return request.get_json_data()
+
+    def _get_query_args(self):
+        """ Query string arguments, or their batch equivalent as strings. """
+        if self._in_batch():
+            return {
+                key: str(value)
+                for key, value in request._mobile_batch_params.items()
+                if value is not None
+            }
+        return request.httprequest.args
+
+    def _get_mobile_context(self):
+        """
+        Resolve the employee context of the logged-in user once per request.
+        The ids come from a per-worker cache on hr.employee (keyed on a version
+        of the user, bumped when the employee, user or calendar changes); the
+        records are browsed together so the first field access loads them in a
+        single prefetched read.
+        """
+        mobile_ctx = getattr(request, '_mobile_context', None)
+        if mobile_ctx is not None and mobile_ctx.user.id == request.env.uid:
+            return mobile_ctx
+        mobile_ctx = request._mobile_context = self._build_mobile_context(request.env)
+        return mobile_ctx
+
+    def _build_mobile_context(self, env):
+        """ Build the MobileContext of the user of ``env``, bound to its cursor. """
+        user = env.user
+        employee_id, partner_id, tz_name, calendar_id, department_id, job_id = \
+            env['hr.employee'].sudo()._get_mobile_context_ids(user.id, user.sudo().mobile_context_version)
+
+        return MobileContext(
+            user=user,
+            user_ctx=user.with_context(tz=tz_name),
+            partner=env['res.partner'].browse(partner_id),
+            employee=env['hr.employee'].sudo().browse(employee_id),
+            tz_name=tz_name,
+            tz=pytz.timezone(tz_name),
+            calendar=env['resource.calendar'].sudo().browse(calendar_id),
+            department=env['hr.department'].sudo().browse(department_id),
+            job=env['hr.job'].sudo().browse(job_id),
+        )
+
+    def _get_user_day_range_utc(self, user_tz=None):
+        user_tz = user_tz or self._get_mobile_context().tz
 
         now_user = datetime.now(user_tz)
         today_user = now_user.date()
@@ -33,27 +195,284 @@ class MobileApiHome(http.Controller):
             today_user
         )
 
-    def get_image_url(self, model, id, field):
+    def _get_image_version(self, record):
+        """ Short hash that changes whenever the image of the record may have changed. """
+        # the image of a user is stored on its partner
+        stamp_record = record.partner_id if record._name == 'res.users' else record
+        stamp = f"{record._name},{record.id},{stamp_record.write_date}"
+        return hashlib.sha1(stamp.encode()).hexdigest()[:16]
+
+    def _write_date_stamp(self, model, domain):
+        """ Latest write_date and count of the records matching ``domain``, so
+        that updates, creations and deletions all change the stamp. """
+        [(last_write, count)] = request.env[model].sudo()._read_group(
+            domain, aggregates=['write_date:max', '__count'])
+        return f"{model},{last_write},{count}"
+
+    def _get_result_status(self, result):
+        if isinstance(result, dict):
+            return result.get('status', 200)
+        if isinstance(result, Response):
+            if result.status_code != 200 or result.mimetype != 'application/json':
+                return result.status_code
+            return json.loads(result.get_data()).get('status', 200)
+        return None
+
+    def _get_result_etag(self, result):
+        if isinstance(result, dict):
+            body = json.dumps(result, sort_keys=True, default=str).encode()
+        elif isinstance(result, Response) and not result.direct_passthrough:
+            body = result.get_data()
+        else:
+            return None
+        return hashlib.sha1(body).hexdigest()
+
+    def _not_modified(self, etag):
+        request._mobile_etag = etag
+        if request.dispatcher.routing_type == 'json':
+            # the JSON-RPC envelope is replaced by an empty 304 in _post_dispatch
+            request._mobile_not_modified = True
+            return {}
+        return Response(status=304)
+
+    def get_image_url(self, record, size=256):
+        """ URL of the pre-generated `image_<size>` variant served by /mobile/image. """
         base_url = request.env['ir.config_parameter'].sudo().get_param('web.base.url')
-        return base_url + '/web/image?' + 'model=' + model + '&id=' + str(id) + '&field=' + field
+        return (
+            f"{base_url}/mobile/image/{record._name}/{record.id}/{size}"
+            f"?v={self._get_image_version(record)}"
+        )
+
+    @http.route('/mobile/image/<string:model>/<int:record_id>/<int:size>', type='http', auth='user', methods=['GET'])
+    def mobile_image(self, model, record_id, size, **kwargs):
+        """
+        Serve the `image_<size>` variant of a user, partner or employee as raw
+        bytes. The ETag is derived from the record's write_date so clients can
+        revalidate without downloading; versioned URLs are cached for a year.
+        The user must be allowed to read the record, through its public
+        counterpart for employees, like on /web/image.
+        """
+        if model not in MOBILE_IMAGE_MODELS or size not in MOBILE_IMAGE_SIZES:
+            return request.not_found()
+
+        access_model = 'hr.employee.public' if model == 'hr.employee' else model
+        try:
+            request.env[access_model].browse(record_id).check_access('read')
+        except (AccessError, MissingError):
+            return request.not_found()
+
+        record = request.env[model].sudo().browse(record_id).exists()
+        if not record:
+            return request.not_found()
+
+        version = self._get_image_version(record)
+        etag = f"{version}-{size}"
+        if kwargs.get('v') == version:
+            cache_control = 'private, max-age=31536000, immutable'
+        else:
+            cache_control = 'private, no-cache'
+
+        if request.httprequest.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            stream = request.env['ir.binary']._get_image_stream_from(record, f'image_{size}')
+            response = stream.get_response()
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    def _encode_cursor(self, record, field):
+        value = record[field] if field != 'id' else record.id
+        if isinstance(value, datetime):
+            value = fields.Datetime.to_string(value)
+        elif isinstance(value, date):
+            value = fields.Date.to_string(value)
+        token = json.dumps([value, record.id]).encode()
+        return base64.urlsafe_b64encode(token).decode()
+
+    def _decode_cursor(self, cursor, field=None):
+        """ Return the (value, id) of a cursor, the value converted for
+        ``field``. Raises ValueError when malformed or of the wrong type. """
+        try:
+            value, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(record_id, int) or isinstance(record_id, bool):
+            raise ValueError("Invalid cursor")
+        if field is None or field.name == 'id' or value is None or value is False:
+            return value, record_id
+        if field.type in ('date', 'datetime', 'char', 'selection'):
+            if not isinstance(value, str):
+                raise ValueError("Invalid cursor")
+            if field.type == 'date':
+                value = fields.Date.to_date(value)
+            elif field.type == 'datetime':
+                value = fields.Datetime.to_datetime(value)
+        elif field.type in ('integer', 'float', 'monetary', 'many2one'):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError("Invalid cursor")
+        else:
+            raise ValueError("Invalid cursor")
+        return value, record_id
+
+    def _parse_bool(self, value):
+        """ Boolean of a JSON or query string flag: "false" and "0" are false. """
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return value is True or (isinstance(value, int) and value == 1)
+
+    def _keyset_domain(self, field, descending, value, record_id):
+        """ Domain of the rows sorted after (value, record_id). """
+        id_operator = '<' if descending else '>'
+        if field == 'id':
+            return [('id', id_operator, record_id)]
+        if value is None or value is False:
+            # NULLs come first in descending order and last in ascending order
+            if descending:
+                return ['|', (field, '!=', False), '&', (field, '=', False), ('id', id_operator, record_id)]
+            return [(field, '=', False), ('id', id_operator, record_id)]
+        domain = [
+            '|', (field, '<' if descending else '>', value),
+            '&', (field, '=', value), ('id', id_operator, record_id),
+        ]
+        if not descending:
+            domain = ['|', (field, '=', False)] + domain
+        return domain
+
+    def _keyset_page(self, model, domain, field, descending, cursor, limit, with_count=False):
+        """
+        Cursor pagination: return the `limit` records following `cursor` (the
+        opaque token of the last row of the previous page, empty for the first
+        page) using a range condition on (field, id) instead of an offset, and
+        the page info holding the next cursor. The total is only counted when
+        `with_count` is set. Raises ValueError on a malformed cursor.
+        """
+        direction = 'desc' if descending else 'asc'
+        order = f"id {direction}" if field == 'id' else f"{field} {direction}, id {direction}"
+
+        page_domain = domain
+        if cursor:
+            value, record_id = self._decode_cursor(cursor, model._fields[field])
+            page_domain = expression.AND([
+                domain, self._keyset_domain(field, descending, value, record_id)
+            ])
+
+        records = model.search(page_domain, order=order, limit=limit + 1)
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        page_info = {
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": self._encode_cursor(records[-1], field) if has_more else None,
+        }
+        if with_count:
+            total = model.search_count(domain)
+            page_info.update({
+                "total": total,
+                "total_pages": (total + limit - 1) // limit if limit else 1,
+            })
+        return records, page_info
+
+    def _cached_json_response(self, data, etag):
+        """ Serve a pre-encoded JSON body that only changes with its ETag. """
+        if request.httprequest.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(data, content_type="application/json", status=200)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        # the names are translated in the language of the request
+        response.headers['Vary'] = 'Accept-Language, Cookie'
+        return response
 
     @http.route('/get-countries', type='http', auth='none', methods=['GET'])
     def get_countries(self, **kw):
-        countries = request.env['res.country'].with_user(SUPERUSER_ID).search_read([], ['name', 'code'])
-        return Response(json.dumps({"status": 200, "countries": countries}, ensure_ascii=False),
-                        content_type="application/json", status=200)
+        data, etag = request.env['res.country'].with_user(SUPERUSER_ID)._mobile_countries_payload()
+        return self._cached_json_response(data, etag)
 
     @http.route('/get-states', type='http', auth='none', methods=['GET', 'POST'], csrf=False)
     def get_states(self, **kw):
-        country_code = 'CH'
-        kw = request.get_json_data()
-        if kw.get('country_code', False):
-            country_code = kw.get('country_code')
-        states = request.env['res.country.state'].with_user(SUPERUSER_ID).search_read(
-            [('country_id.code', '=', country_code)], ['name', 'code'])
-        return Response(json.dumps({"status": 200, "states": states}, ensure_ascii=False),
-                        content_type="application/json", status=200)
-    
+        # the app posts a JSON body, GET callers use the query string
+        if request.httprequest.get_data():
+            try:
+                kw = request.get_json_data()
+            except ValueError:
+                kw = None
+            if not isinstance(kw, dict):
+                return request.make_json_response({"status": 400, "error": "Invalid JSON body"})
+        country_code = kw.get('country_code') or 'CH'
+        # part of the cache key
+        if not isinstance(country_code, str):
+            return request.make_json_response({"status": 400, "error": "Invalid country_code"})
+        data, etag = request.env['res.country.state'].with_user(SUPERUSER_ID)._mobile_states_payload(country_code)
+        return self._cached_json_response(data, etag)
+
+    def _get_login_user_info(self, mobile_ctx):
+        user = mobile_ctx.user
+        partner = mobile_ctx.partner
+        employee = mobile_ctx.employee
+        return {
+            "name": user.name or "",
+            "street": partner.street or "",
+            "city": partner.city or "",
+            "zip": partner.zip or "",
+            "country_id": partner.country_id.code if partner.country_id else "",
+            "state_id": partner.state_id.code if partner.state_id else "",
+
+            "job_title": employee.job_title if employee else "",
+            "birthday": employee.birthday.strftime('%d.%m.%Y') if employee and employee.birthday else "",
+            "number": employee.private_phone if employee else "",
+            "manager": employee.parent_id.name if employee and employee.parent_id else "",
+
+            "profile_image_url": self.get_image_url(user),
+            "profile_image_version": self._get_image_version(user),
+        }
+
+    def _mobile_token_login(self, credential, device=None):
+        """
+        Token mode of /mobile/login: check the credentials without opening a
+        session and return an access token for the ``Authorization: Bearer``
+        header together with a refresh token for /mobile/token/refresh.
+        """
+        wsgienv = {
+            'interactive': False,
+            'base_location': request.httprequest.url_root,
+            'HTTP_HOST': request.httprequest.environ['HTTP_HOST'],
+            'REMOTE_ADDR': request.httprequest.environ['REMOTE_ADDR'],
+        }
+        auth_info = request.env.registry['res.users'].authenticate(request.db, credential, wsgienv)
+        request.update_env(user=auth_info['uid'])
+        # like Session.authenticate: a second factor can only be given in a session
+        if auth_info.get('mfa') != 'skip' and request.env.user._mfa_url():
+            return {"status": 401, "error": "Two-factor authentication requires a session login"}
+
+        mobile_ctx = self._get_mobile_context()
+        tokens = request.env['mobile.auth.token']._issue_tokens(mobile_ctx.user, device)
+        return {
+            "status": 200,
+            "uid": mobile_ctx.user.id,
+            "db": request.db,
+            "username": mobile_ctx.user.login,
+            "auth_info": auth_info,
+            **tokens,
+            **self._get_login_user_info(mobile_ctx),
+        }
+
+    @http.route('/mobile/token/refresh', type='json', auth='none', methods=['POST'], csrf=False)
+    def mobile_token_refresh(self, **kwargs):
+        """ Exchange a refresh token for a new access and refresh token pair. """
+        ensure_db()
+        data = self._get_json_data() or {}
+        if not data.get('refresh_token'):
+            return {"status": 400, "error": "refresh_token is required"}
+
+        tokens = request.env['mobile.auth.token'].sudo()._refresh(data['refresh_token'])
+        if not tokens:
+            return {"status": 401, "error": "Invalid or expired refresh token"}
+        return {"status": 200, **tokens}
+
     @http.route('/mobile/login', type='json', auth='none', readonly=False)
     def mobile_login(self, **kw):
         ensure_db()
@@ -65,14 +484,13 @@ class MobileApiHome(http.Controller):
         if not login or not password:
             return {"status": 400, "error": "Missing login or password"}
 
-        request.session.logout()
+        if not data.get('token'):
+            request.session.logout()
 
         if request.httprequest.method == 'POST' and request.session.uid:
             user = request.env['res.users'].browse(request.session.uid)
 
-            employee = request.env['hr.employee'].sudo().search(
-                [('user_id', '=', user.id)], limit=1
-            )
+            employee = self._get_mobile_context().employee
 
             return {
                 "status": 200,
@@ -93,9 +511,8 @@ class MobileApiHome(http.Controller):
                 "number": employee.private_phone if employee else "",
                 "manager": employee.parent_id.name if employee and employee.parent_id else "",
 
-                "profile_image_url": self.get_image_url(
-                    'res.users', user.id, 'image_1920'
-                ) or "",
+                "profile_image_url": self.get_image_url(user),
+                "profile_image_version": self._get_image_version(user),
             }
 
         try:
@@ -105,37 +522,19 @@ class MobileApiHome(http.Controller):
             }
             credential.setdefault('type', 'password')
 
+            if data.get('token'):
+                return self._mobile_token_login(credential, data.get('device'))
+
             auth_info = request.session.authenticate(request.db, credential)
             request.params['login_success'] = True
 
-            user = request.env.user
-            employee = request.env['hr.employee'].sudo().search(
-                [('user_id', '=', user.id)], limit=1
-            )
-
             return {
                 "status": 200,
                 "uid": request.session.uid,
                 "db": request.session.db,
                 "username": request.session.login,
                 "auth_info": auth_info,
-
-                "name": user.name or "",
-                "street": user.partner_id.street or "",
-                "city": user.partner_id.city or "",
-                "zip": user.partner_id.zip or "",
-                "country_id": user.partner_id.country_id.code if user.partner_id.country_id else "",
-                "state_id": user.partner_id.state_id.code if user.partner_id.state_id else "",
-
-                "job_title": employee.job_title if employee else "",
-                "birthday": employee.birthday.strftime('%d.%m.%Y') if employee and employee.birthday else "",
-                "number": employee.private_phone if employee else "",
-                "manager": employee.parent_id.name if employee and employee.parent_id else "",
-
-                "profile_image_url": self.get_image_url(
-                    'res.users', user.id, 'image_1920'
-                ) or "",
-                "image_1920": user.image_1920 or "",
+                **self._get_login_user_info(self._get_mobile_context()),
             }
 
         except odoo.exceptions.AccessDenied as e:
@@ -152,6 +551,28 @@ class MobileApiHome(http.Controller):
 
 
 
+    def _store_upload(self, uploaded_file, employee, max_request_size=None):
+        """
+        Store a multipart upload and return the values of its attachment with
+        the attachment of the same employee already holding that file, if any.
+
+        The file is streamed into the filestore and hashed on the way, so that
+        identical content is only kept once. Raises ValueError when larger than
+        the upload limit; werkzeug has already spooled the multipart body by
+        then, the Content-Length check only keeps the file out of the filestore.
+        """
+        Attachment = request.env['ir.attachment'].sudo()
+        content_length = request.httprequest.content_length
+        if content_length and content_length > (max_request_size or MOBILE_UPLOAD_MAX_SIZE + 64 * 1024):
+            raise ValueError("File too large")
+        values = Attachment._mobile_store_stream(uploaded_file.stream, MOBILE_UPLOAD_MAX_SIZE)
+        # database storage keeps no checksum to match
+        existing = Attachment._mobile_find_employee_blob(values.get('checksum'), employee)
+        if existing.store_fname:
+            # share the (possibly optimized) blob, the new copy gets collected
+            return existing._mobile_blob_values(), existing
+        return values, existing
+
     def _get_default_expense_product(self):
         product = request.env['product.product'].sudo().search(
             [('can_be_expensed', '=', True)],
@@ -162,12 +583,7 @@ class MobileApiHome(http.Controller):
     @http.route('/mobile/expenses', type='http', auth='user', methods=['POST'], csrf=False)
     def create_expense(self, **kwargs):
 
-        user = request.env.user
-
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)],
-            limit=1
-        )
+        employee = self._get_mobile_context().employee
 
         if not employee:
             return request.make_json_response({
@@ -210,6 +626,7 @@ class MobileApiHome(http.Controller):
 
         attachment_uploaded = False
         attachment_name = False
+        duplicate_expense_id = False
 
         if uploaded_file:
 
@@ -225,109 +642,339 @@ class MobileApiHome(http.Controller):
                     "error": "Only JPG, PNG and PDF files are allowed"
                 })
 
-            uploaded_file.seek(0, 2)
-            file_size = uploaded_file.tell()
-            uploaded_file.seek(0)
-
-            max_size = 10 * 1024 * 1024  # 10 MB
-
-            if file_size > max_size:
+            try:
+                upload_vals, duplicate = self._store_upload(uploaded_file, employee)
+            except ValueError:
                 return request.make_json_response({
                     "status": 400,
                     "error": "File size exceeds 10 MB limit"
                 })
 
-            file_content = uploaded_file.read()
-
-            request.env['ir.attachment'].sudo().create({
-                'name': uploaded_file.filename,
-                'datas': base64.b64encode(file_content),
-                'res_model': 'hr.expense',
-                'res_id': expense.id,
-                'mimetype': uploaded_file.content_type,
-                'type': 'binary',
-            })
+            attachment = request.env['ir.attachment'].sudo().with_context(mobile_blob=True).create(dict(
+                upload_vals,
+                name=uploaded_file.filename,
+                res_model='hr.expense',
+                res_id=expense.id,
+                mimetype=uploaded_file.content_type,
+                type='binary',
+            ))
+            attachment._mobile_queue_optimization()
 
             attachment_uploaded = True
             attachment_name = uploaded_file.filename
+            if duplicate.res_model == 'hr.expense':
+                # the same receipt was already submitted
+                duplicate_expense_id = duplicate.res_id
 
         return request.make_json_response({
             "status": 200,
             "message": "Expense created successfully",
             "expense_id": expense.id,
             "attachment_uploaded": attachment_uploaded,
-            "attachment_name": attachment_name
+            "attachment_name": attachment_name,
+            "possible_duplicate": bool(duplicate_expense_id),
+            "duplicate_expense_id": duplicate_expense_id,
         })
 
-    @http.route('/mobile/expenses/list', type='json', auth='user', methods=['POST'], csrf=False)
-    def list_expenses(self, **kwargs):
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
+    def _prepare_bulk_expense(self, item, employee, default_product, products):
+        """ Create values of a /mobile/expenses/bulk item, or an error message. """
+        if not item.get('reason') or not item.get('date'):
+            return None, "reason and date are required"
+        try:
+            expense_date = fields.Date.to_date(item['date'])
+            amount = float(item.get('amount') or 0)
+            product_id = int(item.get('product_id') or default_product.id or 0)
+        except (TypeError, ValueError):
+            return None, "Invalid date, amount or product_id"
 
-        if not employee:
-            return {"status": 400, "error": "No employee linked to this user"}
+        if not product_id:
+            return None, "No expense product found"
+        if product_id not in products.ids:
+            return None, "Invalid product_id"
 
-        data = request.get_json_data() or {}
+        return {
+            'name': item['reason'],
+            'employee_id': employee.id,
+            'product_id': product_id,
+            'total_amount': amount,
+            'date': expense_date,
+            'quantity': 1.0,
+            'payment_mode': 'own_account',
+            'mobile_client_id': item['client_id'],
+        }, None
 
-        page = int(data.get('page', 1))
-        limit = int(data.get('limit', 10))
-        offset = (page - 1) * limit
+    @http.route('/mobile/expenses/bulk', type='http', auth='user', methods=['POST'], csrf=False)
+    def create_expenses_bulk(self, **kwargs):
+        """
+        Submit several expenses captured offline in one multipart request.
+
+        The ``expenses`` field holds a JSON list of items with ``client_id``,
+        ``reason``, ``date``, ``amount`` and optionally ``product_id`` and
+        ``file``, the name of the multipart field carrying the
+        receipt. An item whose ``client_id`` was already submitted is not
+        created again and returns the existing expense, so a failed sync can
+        be replayed as a whole.
+        """
+        employee = self._get_mobile_context().employee
+        if not employee:
+            return request.make_json_response({"status": 400, "error": "No employee linked to this user"})
+        content_length = request.httprequest.content_length
+        if content_length and content_length > MOBILE_BULK_MAX_SIZE:
+            return request.make_json_response({"status": 400, "error": "Request exceeds 100 MB limit"})
 
-        domain = [('employee_id', '=', employee.id)]
+        try:
+            items = json.loads(kwargs.get('expenses') or '[]')
+        except ValueError:
+            return request.make_json_response({"status": 400, "error": "expenses must be a JSON list"})
+        if not isinstance(items, list) or not items:
+            return request.make_json_response({"status": 400, "error": "expenses must be a non-empty list"})
+        if len(items) > MOBILE_BULK_MAX_ITEMS:
+            return request.make_json_response({
+                "status": 400, "error": f"At most {MOBILE_BULK_MAX_ITEMS} expenses per request",
+            })
+        if any(not isinstance(item, dict) or not item.get('client_id') for item in items):
+            return request.make_json_response({"status": 400, "error": "Every expense needs a client_id"})
+
+        Expense = request.env['hr.expense'].sudo()
+        client_ids = [str(item['client_id']) for item in items]
+        existing = {
+            expense.mobile_client_id: expense
+            for expense in Expense.search([
+                ('employee_id', '=', employee.id),
+                ('mobile_client_id', 'in', client_ids),
+            ])
+        }
+        default_product = self._get_default_expense_product()
+        product_ids = {int(item['product_id']) for item in items if str(item.get('product_id') or '').isdigit()}
+        products = request.env['product.product'].sudo().search([
+            ('id', 'in', list(product_ids | set(default_product.ids))),
+            ('can_be_expensed', '=', True),
+        ])
 
-        total = request.env['hr.expense'].sudo().search_count(domain)
-        total_pages = (total + limit - 1) // limit if limit else 1
+        results = [None] * len(items)
+        to_create = []  # (position, values, upload)
+        seen = set()
+        for position, (item, client_id) in enumerate(zip(items, client_ids)):
+            if client_id in seen:
+                results[position] = {"status": 400, "error": "Duplicate client_id in the request"}
+                continue
+            seen.add(client_id)
+            if client_id in existing:
+                results[position] = {"status": 200, "expense_id": existing[client_id].id, "replayed": True}
+                continue
+            values, error = self._prepare_bulk_expense(
+                dict(item, client_id=client_id), employee, default_product, products)
+            if error:
+                results[position] = {"status": 400, "error": error}
+                continue
+
+            upload = None
+            uploaded_file = item.get('file') and request.httprequest.files.get(item['file'])
+            if uploaded_file:
+                if uploaded_file.content_type not in MOBILE_UPLOAD_MIMETYPES:
+                    results[position] = {"status": 400, "error": "Only JPG, PNG and PDF files are allowed"}
+                    continue
+                try:
+                    upload_vals, duplicate = self._store_upload(
+                        uploaded_file, employee, max_request_size=MOBILE_BULK_MAX_SIZE)
+                except ValueError:
+                    results[position] = {"status": 400, "error": "File size exceeds 10 MB limit"}
+                    continue
+                upload = (uploaded_file, upload_vals, duplicate)
+            to_create.append((position, values, upload))
+
+        expenses = self._create_bulk_expenses([values for _position, values, _upload in to_create])
+
+        attachment_vals_list = []
+        for expense, (position, values, upload) in zip(expenses, to_create):
+            if not expense:
+                # created meanwhile by a concurrent replay of the same request
+                expense = Expense.search([
+                    ('employee_id', '=', employee.id),
+                    ('mobile_client_id', '=', values['mobile_client_id']),
+                ])
+                if expense:
+                    results[position] = {"status": 200, "expense_id": expense.id, "replayed": True}
+                else:
+                    # committed after this transaction started: the next replay returns it
+                    results[position] = {"status": 409, "error": "Submitted by a concurrent request"}
+                continue
+            results[position] = {
+                "status": 200,
+                "expense_id": expense.id,
+                "replayed": False,
+                "attachment_uploaded": bool(upload),
+                "possible_duplicate": False,
+            }
+            if not upload:
+                continue
+            uploaded_file, upload_vals, duplicate = upload
+            attachment_vals_list.append(dict(
+                upload_vals,
+                name=uploaded_file.filename,
+                res_model='hr.expense',
+                res_id=expense.id,
+                mimetype=uploaded_file.content_type,
+                type='binary',
+            ))
+            if duplicate.res_model == 'hr.expense':
+                results[position].update(possible_duplicate=True, duplicate_expense_id=duplicate.res_id)
+        if attachment_vals_list:
+            attachments = request.env['ir.attachment'].sudo().with_context(mobile_blob=True).create(
+                attachment_vals_list)
+            attachments._mobile_queue_optimization()
 
-        expenses = request.env['hr.expense'].sudo().search(
-            domain,
-            offset=offset,
-            limit=limit,
-            order="date desc"
+        return request.make_json_response({
+            "status": 200,
+            "results": [dict(result, client_id=client_id) for result, client_id in zip(results, client_ids)],
+        })
+
+    def _create_bulk_expenses(self, values_list):
+        """
+        Create the expenses of /mobile/expenses/bulk at once, or one by one in
+        their own savepoint when a concurrent replay of the same request
+        already created some: these are returned as None. Any other integrity
+        error is raised.
+        """
+        Expense = request.env['hr.expense'].sudo()
+        try:
+            with request.env.cr.savepoint():
+                return list(Expense.create(values_list))
+        except UniqueViolation as e:
+            if not self._is_client_id_conflict(e):
+                raise
+        expenses = []
+        for values in values_list:
+            try:
+                with request.env.cr.savepoint():
+                    expenses.append(Expense.create(values))
+            except UniqueViolation as e:
+                if not self._is_client_id_conflict(e):
+                    raise
+                expenses.append(None)
+        return expenses
+
+    def _is_client_id_conflict(self, error):
+        """ Whether ``error`` reports an expense whose mobile client id exists. """
+        return error.diag.constraint_name == 'hr_expense_mobile_client_id_uniq'
+
+    def _serialize_expenses(self, expenses, employee):
+        """
+        Build the mobile representation of a page of expenses with a fixed
+        number of queries: one read of the expenses, one of their products,
+        categories and companies, and one search of their attachments.
+        """
+        rows = expenses.read(
+            ['name', 'total_amount', 'state', 'date', 'product_id', 'payment_mode', 'company_id'],
+            load=None,
         )
 
-        result = []
-        for exp in expenses:
-            attachments = request.env['ir.attachment'].sudo().search([
-                ('res_model', '=', 'hr.expense'),
-                ('res_id', '=', exp.id)
-            ], limit=1)
+        products = request.env['product.product'].sudo().browse(
+            {row['product_id'] for row in rows if row['product_id']}
+        ).read(['name', 'categ_id'], load=None)
+        product_by_id = {product['id']: product for product in products}
 
-            attachment_data = {}
+        category_names = {
+            category['id']: category['name']
+            for category in request.env['product.category'].sudo().browse(
+                {product['categ_id'] for product in products if product['categ_id']}
+            ).read(['name'])
+        }
+        company_names = {
+            company['id']: company['name']
+            for company in request.env['res.company'].sudo().browse(
+                {row['company_id'] for row in rows if row['company_id']}
+            ).read(['name'])
+        }
+
+        # ir.attachment is ordered by id desc: keep the newest per expense
+        attachment_by_expense = {}
+        for attachment in request.env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', 'hr.expense'),
+            ('res_id', 'in', expenses.ids)
+        ], ['res_id', 'name', 'mimetype']):
+            attachment_by_expense.setdefault(attachment['res_id'], attachment)
 
-            base_url = request.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        base_url = request.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        payment_modes = dict(expenses._fields['payment_mode'].selection)
+
+        result = []
+        for row in rows:
+            product = product_by_id.get(row['product_id'], {})
+            attachment = attachment_by_expense.get(row['id'])
 
-            if attachments:
+            attachment_data = {}
+            if attachment:
                 attachment_data = {
-                    "attachment_id": attachments.id,
-                    "attachment_name": attachments.name,
-                    "attachment_mimetype": attachments.mimetype,
-                    "preview_url": f"{base_url}/web/content/{attachments.id}",
-                    "download_url": f"{base_url}/web/content/{attachments.id}?download=true",
+                    "attachment_id": attachment['id'],
+                    "attachment_name": attachment['name'],
+                    "attachment_mimetype": attachment['mimetype'],
+                    "preview_url": f"{base_url}/web/content/{attachment['id']}",
+                    "download_url": f"{base_url}/web/content/{attachment['id']}?download=true",
                 }
 
             result.append({
-                'id': exp.id,
-                'name': exp.name,
-                'amount': exp.total_amount,
-                'state': exp.state,
-                'date': str(exp.date),
+                'id': row['id'],
+                'name': row['name'],
+                'amount': row['total_amount'],
+                'state': row['state'],
+                'date': str(row['date']),
 
-                'employee': exp.employee_id.name,
-                'category': exp.product_id.categ_id.name if exp.product_id.categ_id else "",
-                'product': exp.product_id.name,
+                'employee': employee.name,
+                'category': category_names.get(product.get('categ_id'), ""),
+                'product': product.get('name', False),
 
-                'payment_mode': dict(
-                    exp._fields['payment_mode'].selection
-                ).get(exp.payment_mode),
+                'payment_mode': payment_modes.get(row['payment_mode']),
 
-                'company': exp.company_id.name if exp.company_id else "",
+                'company': company_names.get(row['company_id'], ""),
 
-                'has_attachment': bool(attachments),
+                'has_attachment': bool(attachment),
 
                 'attachment': attachment_data
             })
+        return result
+
+    @http.route('/mobile/expenses/list', type='json', auth='user', methods=['POST'], csrf=False)
+    def list_expenses(self, **kwargs):
+        employee = self._get_mobile_context().employee
+
+        if not employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        data = self._get_json_data() or {}
+
+        page = int(data.get('page', 1))
+        limit = int(data.get('limit', 10))
+        offset = (page - 1) * limit
+
+        domain = self._get_expense_domain(employee)
+
+        Expense = request.env['hr.expense'].sudo()
+
+        if data.get('cursor') is not None:
+            try:
+                expenses, page_info = self._keyset_page(
+                    Expense, domain, 'date', True, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+            return {
+                "status": 200,
+                **page_info,
+                "expenses": self._serialize_expenses(expenses, employee)
+            }
+
+        total = Expense.search_count(domain)
+        total_pages = (total + limit - 1) // limit if limit else 1
+
+        expenses = Expense.search(
+            domain,
+            offset=offset,
+            limit=limit,
+            order="date desc"
+        )
+        result = self._serialize_expenses(expenses, employee)
         return {
             "status": 200,
             "page": page,
@@ -338,70 +985,270 @@ class MobileApiHome(http.Controller):
         }
 
 
-    @http.route('/mobile/leaves/list', type='json', auth='user', methods=['POST'], csrf=False)
-    def list_leaves(self, **kwargs):
-        data = request.get_json_data()
-        user = request.env.user
-        domain = []
+    def _get_date_param(self, data, key):
+        """ Date of the optional ``key`` parameter, None when missing. Raises
+        ValueError when it is not a date string. """
+        value = data.get(key)
+        if value in (None, False, ''):
+            return None
+        if not isinstance(value, str):
+            raise ValueError(f"Invalid {key}")
+        try:
+            return fields.Date.to_date(value)
+        except ValueError:
+            raise ValueError(f"Invalid {key}")
+
+    def _get_id_param(self, data, key):
+        """ Record id of the ``key`` parameter. Raises ValueError when it is
+        not an integer. """
+        value = data.get(key)
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid {key}")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {key}")
+
+    @http.route('/mobile/expenses/summary', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def expense_summary(self, **kwargs):
+        """
+        Totals and counts of the employee's expenses per state, per month and
+        per product category, optionally between ``date_from`` and
+        ``date_to``. Everything comes from one aggregate query grouped by
+        state, month and product, rolled up here.
+        """
+        employee = self._get_mobile_context().employee
+        if not employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        data = self._get_json_data() or {}
+        domain = self._get_expense_domain(employee)
+        try:
+            date_from = self._get_date_param(data, 'date_from')
+            date_to = self._get_date_param(data, 'date_to')
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+
+        Expense = request.env['hr.expense'].sudo()
+        groups = Expense._read_group(
+            domain, ['state', 'date:month', 'product_id'], ['total_amount:sum', '__count'])
+
+        by_state, by_month, by_category = {}, {}, {}
+
+        def add(totals, key, amount, count):
+            total = totals.setdefault(key, [0.0, 0])
+            total[0] += amount
+            total[1] += count
+
+        for state, month, product, amount, count in groups:
+            add(by_state, state, amount, count)
+            add(by_month, month and month.strftime('%Y-%m'), amount, count)
+            add(by_category, product.categ_id, amount, count)
+
+        currency = employee.company_id.currency_id
+        state_labels = dict(Expense._fields['state']._description_selection(request.env))
+        return {
+            "status": 200,
+            "date_from": date_from and str(date_from),
+            "date_to": date_to and str(date_to),
+            "currency": currency.name,
+            "total_amount": currency.round(sum(amount for amount, _count in by_state.values())),
+            "count": sum(count for _amount, count in by_state.values()),
+            "by_state": [{
+                "state": state,
+                "label": state_labels.get(state, state),
+                "amount": currency.round(amount),
+                "count": count,
+            } for state, (amount, count) in by_state.items()],
+            "by_month": [{
+                "month": month,
+                "amount": currency.round(amount),
+                "count": count,
+            } for month, (amount, count) in sorted(by_month.items(), key=lambda item: item[0] or '')],
+            "by_category": [{
+                "category_id": category.id,
+                "category": category.name or "",
+                "amount": currency.round(amount),
+                "count": count,
+            } for category, (amount, count) in by_category.items()],
+        }
 
-        if not user.has_group('base.group_system'):
-            employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+    def _get_expense_domain(self, employee):
+        return [('employee_id', '=', employee.id)]
+
+    def _get_leave_domain(self, data):
+        """ Leaves visible in the app: the employee's own, those of the
+        employees reporting to them with ``scope`` "team", or those of any (or
+        the requested) employee for administrators. ``department_id`` and
+        ``manager_id`` narrow the list to a department or a manager's
+        hierarchy. None when the user has no employee. Raises ValueError on a
+        malformed id. """
+        employee = self._get_mobile_context().employee
+        if data.get('scope') == 'team':
             if not employee:
-                return {"status": 400, "error": "No employee linked to this user"}
-            domain.append(('employee_id', '=', employee.id))
+                return None
+            domain = [('employee_id.parent_id', 'child_of', employee.id)]
+        elif not request.env.user.has_group('base.group_system'):
+            if not employee:
+                return None
+            domain = [('employee_id', '=', employee.id)]
+        elif data.get('employee_id'):
+            domain = [('employee_id', '=', self._get_id_param(data, 'employee_id'))]
         else:
-            employee_id = data.get('employee_id')
-            if employee_id:
-                domain.append(('employee_id', '=', int(employee_id)))
+            domain = []
+        if data.get('department_id'):
+            domain.append(('employee_id.department_id', 'child_of', self._get_id_param(data, 'department_id')))
+        if data.get('manager_id'):
+            domain.append(('employee_id.parent_id', 'child_of', self._get_id_param(data, 'manager_id')))
+        return domain
+
+    def _serialize_leaves(self, leaves):
+        """
+        Build the mobile representation of a page of leaves with a fixed
+        number of queries: one read of the leaves, one of their employees,
+        and one each of their departments and leave types.
+        """
+        rows = leaves.read(
+            ['employee_id', 'holiday_status_id', 'request_date_from', 'request_date_to', 'name', 'state'],
+            load=None,
+        )
+        employees = request.env['hr.employee'].sudo().browse(
+            {row['employee_id'] for row in rows if row['employee_id']}
+        )
+        employee_rows = {
+            employee['id']: employee
+            for employee in employees.read(['name', 'department_id', 'job_title', 'write_date'], load=None)
+        }
+        department_names = {
+            department['id']: department['name']
+            for department in request.env['hr.department'].sudo().browse(
+                {employee['department_id'] for employee in employee_rows.values() if employee['department_id']}
+            ).read(['name'])
+        }
+        leave_type_names = {
+            leave_type['id']: leave_type['name']
+            for leave_type in request.env['hr.leave.type'].sudo().browse(
+                {row['holiday_status_id'] for row in rows if row['holiday_status_id']}
+            ).read(['name'])
+        }
+
+        results = []
+        for row in rows:
+            employee = employees.browse(row['employee_id'])
+            employee_row = employee_rows.get(row['employee_id'], {})
+            results.append({
+                "id": row['id'],
+                "employee_name": employee_row.get('name', False),
+                "department": department_names.get(employee_row.get('department_id'), ""),
+                "job_title": employee_row.get('job_title') or "",
+                "leave_type": leave_type_names.get(row['holiday_status_id'], False),
+                "period": f"{row['request_date_from']} to {row['request_date_to']}",
+                "reason": row['name'],
+                "status": row['state'],
+                'profile_image_url': self.get_image_url(employee, 128),
+                'profile_image_version': self._get_image_version(employee),
+            })
+        return results
+
+    def _get_leave_filter_domain(self, data):
+        """ Domain of the optional ``state`` (one or a list) and ``date_from`` /
+        ``date_to`` filters of the leave lists: leaves overlapping the range.
+        Raises ValueError on a malformed state or date. """
+        domain = []
+        states = data.get('state')
+        if states:
+            if isinstance(states, str):
+                states = [states]
+            if not isinstance(states, list) or not all(isinstance(state, str) for state in states):
+                raise ValueError("Invalid state")
+            domain.append(('state', 'in', states))
+        date_from = self._get_date_param(data, 'date_from')
+        if date_from:
+            domain.append(('request_date_to', '>=', date_from))
+        date_to = self._get_date_param(data, 'date_to')
+        if date_to:
+            domain.append(('request_date_from', '<=', date_to))
+        return domain
+
+    def _get_leave_counts(self, domain):
+        """ Total, approved and pending counts of the leaves matching ``domain``,
+        from one aggregate grouped by state. """
+        counts = dict(request.env['hr.leave'].sudo()._read_group(domain, ['state'], ['__count']))
+        return {
+            "total": sum(counts.values()),
+            "approved_count": counts.get('validate', 0),
+            "new_leave_count": counts.get('validate1', 0) + counts.get('confirm', 0),
+        }
+
+    @http.route('/mobile/leaves/list', type='json', auth='user', methods=['POST'], csrf=False)
+    def list_leaves(self, **kwargs):
+        data = self._get_json_data()
+        try:
+            domain = self._get_leave_domain(data)
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+        if domain is None:
+            return {"status": 400, "error": "No employee linked to this user"}
 
         page = int(data.get('page', 1))
         limit = int(data.get('limit', 10))
         offset = (page - 1) * limit
         search = data.get('search', '')
 
+        try:
+            domain += self._get_leave_filter_domain(data)
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
         if search:
             domain += ['|', ('name', 'ilike', search), ('holiday_status_id.name', 'ilike', search)]
 
         Leave = request.env['hr.leave'].sudo()
-        total = Leave.search_count(domain)
+
+        if data.get('cursor') is not None:
+            try:
+                leaves, page_info = self._keyset_page(
+                    Leave, domain, 'request_date_from', True, data['cursor'], limit,
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+            if self._parse_bool(data.get('with_count')):
+                counts = self._get_leave_counts(domain)
+                page_info.update(counts, total_pages=(counts['total'] + limit - 1) // limit if limit else 1)
+            return {"status": 200, **page_info, "leaves": self._serialize_leaves(leaves)}
+
+        counts = self._get_leave_counts(domain)
+        total = counts['total']
         total_pages = (total + limit - 1) // limit if limit else 1
 
         leaves = Leave.search(domain, offset=offset, limit=limit, order="request_date_from desc")
 
-        approved_count = Leave.search_count(domain + [('state', '=', 'validate')])
-        new_leave_count = Leave.search_count(domain + [('state', 'in', ['validate1', 'confirm'])])
-
-        results = []
-        for leave in leaves:
-            results.append({
-                "id": leave.id,
-                "employee_name": leave.employee_id.name,
-                "department": leave.employee_id.department_id.name or "",
-                "job_title": leave.employee_id.job_title or "",
-                "leave_type": leave.holiday_status_id.name,
-                "period": f"{leave.request_date_from} to {leave.request_date_to}",
-                "reason": leave.name,
-                "status": leave.state,
-                'profile_image_url': self.get_image_url('hr.employee', leave.employee_id.id, 'image_1920') or "",
-                'image_1920': leave.employee_id.image_1920 or "" ,
-            })
-
         return {
             "status": 200,
             "page": page,
             "limit": limit,
             "total": total,
             "total_pages": total_pages,
-            "approved_count": approved_count,
-            "new_leave_count": new_leave_count,
-            "leaves": results
+            "approved_count": counts['approved_count'],
+            "new_leave_count": counts['new_leave_count'],
+            "leaves": self._serialize_leaves(leaves)
         }
 
+    def _leave_types_etag_stamp(self, **kw):
+        employee = self._get_mobile_context().employee
+        allocations = self._write_date_stamp('hr.leave.allocation', [
+            ('employee_id', '=', employee.id),
+            ('state', '=', 'validate'),
+        ])
+        return f"{request.env.lang},{employee.id},{allocations},{self._write_date_stamp('hr.leave.type', [])}"
+
     @http.route('/mobile/leaves/types', type='http', auth='user', methods=['GET'], csrf=False)
+    @mobile_etag('_leave_types_etag_stamp')
     def get_available_leave_types(self):
-        user = request.env.user
-
-        employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+        employee = self._get_mobile_context().employee
         if not employee:
             return {"status": 400, "error": "No employee linked to this user"}
 
@@ -422,15 +1269,113 @@ class MobileApiHome(http.Controller):
         }
         return Response(json.dumps(data), content_type='application/json')
 
+    @http.route('/mobile/leaves/balances', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def get_leave_balances(self, **kwargs):
+        """
+        Balance of every leave type of the employee. Computed for all types in
+        one go and cached until a leave or allocation of the employee changes.
+        """
+        employee = self._get_mobile_context().employee
+        if not employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        stamp = "{},{}".format(
+            self._leave_types_etag_stamp(),
+            self._write_date_stamp('hr.leave', [('employee_id', '=', employee.id)]),
+        )
+        today = fields.Date.context_today(request.env.user)
+        balances = request.env['hr.employee']._mobile_leave_balances(employee.id, stamp, today)
+        return {
+            "status": 200,
+            "date": str(today),
+            "balances": list(balances),
+        }
+
+    def _check_leave_request(self, employee, leave_type, date_from, date_to):
+        """
+        Validate a leave request without creating it, as done by both
+        /mobile/leaves/create and /mobile/leaves/preview. Return the ``hr.leave``
+        values with what was checked: the days counted against the balance,
+        the remaining balance of types requiring an allocation, the
+        overlapping leaves and the first ``error``, if any. Raises ValueError
+        on malformed dates.
+        """
+        Leave = request.env['hr.leave'].sudo()
+        check = {
+            'error': False,
+            'requested_days': 0,
+            'remaining_leaves': None,
+            'overlapping': Leave,
+        }
+
+        if leave_type.request_unit == 'day':
+            request_date_from = fields.Date.to_date(date_from)
+            request_date_to = fields.Date.to_date(date_to)
+            if not request_date_from or not request_date_to:
+                raise ValueError("Invalid date")
+            if request_date_to < request_date_from:
+                check['error'] = "date_to must be greater than or equal to date_from"
+                return check
+            check['values'] = {
+                'request_date_from': request_date_from,
+                'request_date_to': request_date_to,
+            }
+            check['requested_days'] = (request_date_to - request_date_from).days + 1
+            if leave_type.requires_allocation == 'yes':
+                remaining_leaves = leave_type.with_context(employee_id=employee.id).virtual_remaining_leaves
+                check['remaining_leaves'] = remaining_leaves
+                if remaining_leaves < check['requested_days']:
+                    check['error'] = f"Insufficient leave balance. Available: {remaining_leaves} days"
+            check['overlapping'] = Leave.search([
+                ('employee_id', '=', employee.id),
+                ('state', '!=', 'cancel'),
+                ('request_date_from', '<=', request_date_to),
+                ('request_date_to', '>=', request_date_from),
+            ])
+            if check['overlapping'] and not check['error']:
+                existing_leave = check['overlapping'][0]
+                check['error'] = (
+                    f"Leave already exists from "
+                    f"{existing_leave.request_date_from} to "
+                    f"{existing_leave.request_date_to}"
+                )
+            return check
+
+        date_from_dt = fields.Datetime.to_datetime(date_from)
+        date_to_dt = fields.Datetime.to_datetime(date_to)
+        if not date_from_dt or not date_to_dt:
+            raise ValueError("Invalid date")
+        if date_to_dt <= date_from_dt:
+            check['error'] = "date_to must be greater than date_from"
+            return check
+        check['values'] = {
+            'date_from': date_from_dt,
+            'date_to': date_to_dt,
+            'request_date_from': date_from_dt.date(),
+            'request_date_to': date_to_dt.date(),
+            'request_unit_hours': True,
+            'request_hour_from': date_from_dt.hour + (date_from_dt.minute / 60.0),
+            'request_hour_to': date_to_dt.hour + (date_to_dt.minute / 60.0),
+        }
+        check['overlapping'] = Leave.search([
+            ('employee_id', '=', employee.id),
+            ('state', '!=', 'cancel'),
+            ('date_from', '<=', date_to_dt),
+            ('date_to', '>=', date_from_dt),
+        ])
+        if check['overlapping']:
+            existing_leave = check['overlapping'][0]
+            check['error'] = (
+                f"Leave already exists from "
+                f"{existing_leave.date_from} to "
+                f"{existing_leave.date_to}"
+            )
+        return check
+
     @http.route('/mobile/leaves/create', type='json', auth='user', methods=['POST'], csrf=False)
     def create_leave(self, **kwargs):
 
-        user = request.env.user
-
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)],
-            limit=1
-        )
+        employee = self._get_mobile_context().employee
 
         if not employee:
             return {
@@ -438,7 +1383,7 @@ class MobileApiHome(http.Controller):
                 "error": "No employee linked to this user"
             }
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
 
         leave_type_id = data.get('leave_type_id')
         date_from = data.get('date_from')
@@ -463,141 +1408,19 @@ class MobileApiHome(http.Controller):
                     "error": "Invalid leave type"
                 }
 
-            # =====================================================
-            # FULL DAY LEAVE
-            # =====================================================
-
-            if leave_type.request_unit == 'day':
-
-                request_date_from = fields.Date.to_date(date_from)
-                request_date_to = fields.Date.to_date(date_to)
-
-                if request_date_to < request_date_from:
-                    return {
-                        "status": 400,
-                        "error": "date_to must be greater than or equal to date_from"
-                    }
-
-                # =====================================================
-                # CHECK LEAVE BALANCE
-                # =====================================================
-
-                if leave_type.requires_allocation == 'yes':
-
-                    remaining_leaves = leave_type.with_context(
-                        employee_id=employee.id
-                    ).virtual_remaining_leaves
-
-                    requested_days = (
-                        request_date_to - request_date_from
-                    ).days + 1
-
-                    if remaining_leaves < requested_days:
-                        return {
-                            "status": 400,
-                            "error": (
-                                f"Insufficient leave balance. "
-                                f"Available: {remaining_leaves} days"
-                            )
-                        }
-
-                # =====================================================
-                # CHECK OVERLAPPING LEAVES
-                # =====================================================
-
-                existing_leave = request.env['hr.leave'].sudo().search([
-                    ('employee_id', '=', employee.id),
-                    ('state', '!=', 'cancel'),
-                    ('request_date_from', '<=', request_date_to),
-                    ('request_date_to', '>=', request_date_from),
-                ], limit=1)
-
-                if existing_leave:
-                    return {
-                        "status": 400,
-                        "error": (
-                            f"Leave already exists from "
-                            f"{existing_leave.request_date_from} to "
-                            f"{existing_leave.request_date_to}"
-                        )
-                    }
-
-                # =====================================================
-                # CREATE FULL DAY LEAVE
-                # =====================================================
-
-                leave = request.env['hr.leave'].sudo().create({
-                    'name': reason,
-                    'employee_id': employee.id,
-                    'holiday_status_id': int(leave_type_id),
-
-                    'request_date_from': request_date_from,
-                    'request_date_to': request_date_to,
-                })
-
-            # =====================================================
-            # HOURLY LEAVE
-            # =====================================================
-
-            else:
-
-                date_from_dt = fields.Datetime.to_datetime(date_from)
-                date_to_dt = fields.Datetime.to_datetime(date_to)
-
-                if date_to_dt <= date_from_dt:
-                    return {
-                        "status": 400,
-                        "error": "date_to must be greater than date_from"
-                    }
-
-                # =====================================================
-                # CHECK OVERLAPPING HOURLY LEAVES
-                # =====================================================
-
-                existing_leave = request.env['hr.leave'].sudo().search([
-                    ('employee_id', '=', employee.id),
-                    ('state', '!=', 'cancel'),
-                    ('date_from', '<=', date_to_dt),
-                    ('date_to', '>=', date_from_dt),
-                ], limit=1)
-
-                if existing_leave:
-                    return {
-                        "status": 400,
-                        "error": (
-                            f"Leave already exists from "
-                            f"{existing_leave.date_from} to "
-                            f"{existing_leave.date_to}"
-                        )
-                    }
-
-                # =====================================================
-                # CREATE HOURLY LEAVE
-                # =====================================================
-
-                leave = request.env['hr.leave'].sudo().create({
-                    'name': reason,
-                    'employee_id': employee.id,
-                    'holiday_status_id': int(leave_type_id),
-
-                    'date_from': date_from_dt,
-                    'date_to': date_to_dt,
-
-                    'request_date_from': date_from_dt.date(),
-                    'request_date_to': date_to_dt.date(),
-
-                    'request_unit_hours': True,
-
-                    'request_hour_from': (
-                        date_from_dt.hour +
-                        (date_from_dt.minute / 60.0)
-                    ),
+            check = self._check_leave_request(employee, leave_type, date_from, date_to)
+            if check['error']:
+                return {
+                    "status": 400,
+                    "error": check['error']
+                }
 
-                    'request_hour_to': (
-                        date_to_dt.hour +
-                        (date_to_dt.minute / 60.0)
-                    ),
-                })
+            leave = request.env['hr.leave'].sudo().create(dict(
+                check['values'],
+                name=reason,
+                employee_id=employee.id,
+                holiday_status_id=leave_type.id,
+            ))
 
             # =====================================================
             # SUCCESS RESPONSE
@@ -626,10 +1449,251 @@ class MobileApiHome(http.Controller):
                 "status": 500,
                 "error": str(e)
             }
+
+    @http.route('/mobile/leaves/preview', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def preview_leave(self, **kwargs):
+        """
+        Check a leave request while the user picks its dates, without creating
+        anything: the same validation as /mobile/leaves/create, plus the
+        working days and hours of the employee's calendar between the dates
+        and the public holidays they contain.
+        """
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
+        if not employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        data = self._get_json_data() or {}
+        if not all([data.get('leave_type_id'), data.get('date_from'), data.get('date_to')]):
+            return {"status": 400, "error": "Missing required fields"}
+        if not isinstance(data['date_from'], str) or not isinstance(data['date_to'], str):
+            return {"status": 400, "error": "Invalid date_from or date_to"}
+        try:
+            leave_type_id = int(data['leave_type_id'])
+        except (TypeError, ValueError):
+            return {"status": 400, "error": "Invalid leave type"}
+        leave_type = request.env['hr.leave.type'].sudo().browse(leave_type_id).exists()
+        if not leave_type:
+            return {"status": 400, "error": "Invalid leave type"}
+
+        try:
+            check = self._check_leave_request(employee, leave_type, data['date_from'], data['date_to'])
+        except ValueError:
+            return {"status": 400, "error": "Invalid date_from or date_to"}
+
+        result = {
+            "status": 200,
+            "valid": not check['error'],
+            "error": check['error'] or None,
+            "leave_type_id": leave_type.id,
+            "request_unit": leave_type.request_unit,
+            "requested_days": check['requested_days'],
+            "remaining_leaves": check['remaining_leaves'],
+            "remaining_after": None,
+            "overlapping_leaves": [{
+                "id": leave.id,
+                "date_from": str(leave.request_date_from),
+                "date_to": str(leave.request_date_to),
+                "status": leave.state,
+            } for leave in check['overlapping']],
+            "working_days": 0,
+            "working_hours": 0,
+            "public_holidays": [],
+        }
+        if 'values' not in check:
+            return result
+
+        values = check['values']
+        if 'date_from' in values:
+            start = pytz.utc.localize(values['date_from'])
+            stop = pytz.utc.localize(values['date_to'])
+        else:
+            start = mobile_ctx.tz.localize(datetime.combine(values['request_date_from'], time.min))
+            stop = mobile_ctx.tz.localize(datetime.combine(values['request_date_to'], time.max))
+
+        # public holidays only: the employee's own leaves are reported above
+        holiday_domain = [('time_type', '=', 'leave'), ('resource_id', '=', False)]
+        work = employee._get_work_days_data_batch(
+            start, stop, calendar=mobile_ctx.calendar or None, domain=holiday_domain,
+        )[employee.id]
+        holidays = request.env['resource.calendar.leaves'].sudo().search_read(holiday_domain + [
+            ('calendar_id', 'in', [mobile_ctx.calendar.id, False]),
+            ('company_id', 'in', [employee.company_id.id, False]),
+            ('date_from', '<=', stop.astimezone(pytz.utc).replace(tzinfo=None)),
+            ('date_to', '>=', start.astimezone(pytz.utc).replace(tzinfo=None)),
+        ], ['name', 'date_from', 'date_to'], order='date_from')
+
+        result.update({
+            "working_days": work['days'],
+            "working_hours": work['hours'],
+            "public_holidays": [{
+                "name": holiday['name'],
+                "date_from": str(holiday['date_from']),
+                "date_to": str(holiday['date_to']),
+            } for holiday in holidays],
+        })
+        if check['remaining_leaves'] is not None:
+            # the balance is in the unit of the type and only counts working time,
+            # requested_days counts every calendar day
+            deducted = work['hours'] if leave_type.request_unit == 'hour' else work['days']
+            result["remaining_after"] = check['remaining_leaves'] - deducted
+        return result
+
+    def _get_availability_employees(self, employee, data):
+        """ Employees shown by /mobile/team/availability: everyone reporting to
+        the user, or the members of ``department_id`` for administrators and
+        the department manager. None when the department is not allowed.
+        Raises ValueError when ``department_id`` is malformed. """
+        fnames = ['name', 'department_id', 'resource_calendar_id', 'company_id']
+        if not data.get('department_id'):
+            return request.env['hr.employee'].sudo().search_fetch([
+                ('parent_id', 'child_of', employee.id),
+                ('id', '!=', employee.id),
+            ], fnames, order='name')
+        try:
+            department_id = int(data['department_id'])
+        except (TypeError, ValueError):
+            raise ValueError("Invalid department_id")
+        department = request.env['hr.department'].sudo().browse(department_id).exists()
+        if not department or not (
+            department.manager_id == employee or request.env.user.has_group('base.group_system')
+        ):
+            return None
+        return request.env['hr.employee'].sudo().search_fetch([
+            ('department_id', 'child_of', department.id),
+        ], fnames, order='name')
+
+    @http.route('/mobile/team/availability', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def team_availability(self, **kwargs):
+        """
+        Who is away in the user's team, day by day between ``date_from`` and
+        ``date_to`` (two weeks from today by default, at most a quarter).
+
+        Each employee gets one character per day: "." working, "W" not a
+        working day of their calendar, "H" public holiday, "P" pending and
+        "A" approved leave. The leaves, public holidays and calendars of the
+        whole team are read with one range query each and painted onto the
+        rows as intervals, so the number of queries depends neither on the
+        size of the team nor on the length of the range.
+        """
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
+        if not employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        data = self._get_json_data() or {}
+        today = datetime.now(mobile_ctx.tz).date()
+        try:
+            date_from = self._get_date_param(data, 'date_from') or today
+            date_to = self._get_date_param(data, 'date_to') or date_from + timedelta(days=13)
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+        day_count = (date_to - date_from).days + 1
+        if not 0 < day_count <= MOBILE_AVAILABILITY_MAX_DAYS:
+            return {
+                "status": 400,
+                "error": f"date_to must be within {MOBILE_AVAILABILITY_MAX_DAYS} days after date_from",
+            }
+
+        try:
+            employees = self._get_availability_employees(employee, data)
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+        if employees is None:
+            return {"status": 403, "error": "You do not have permission to view this department"}
+
+        days = [date_from + timedelta(days=index) for index in range(day_count)]
+        calendars = employees.resource_calendar_id
+        # (week type, weekday) worked per calendar, the week type being None
+        # unless the calendar alternates two weeks
+        Attendance = request.env['resource.calendar.attendance'].sudo()
+        working_days = {calendar.id: set() for calendar in calendars}
+        two_weeks = set(calendars.filtered('two_weeks_calendar').ids)
+        for attendance in Attendance.search_read([
+            ('calendar_id', 'in', calendars.ids),
+            ('display_type', '=', False),
+        ], ['calendar_id', 'dayofweek', 'week_type'], load=None):
+            week_type = int(attendance['week_type']) if attendance['calendar_id'] in two_weeks else None
+            working_days[attendance['calendar_id']].add((week_type, int(attendance['dayofweek'])))
+        week_types = [Attendance.get_week_type(day) for day in days]
+
+        # one row per calendar and company, copied for its employees before
+        # their leaves: public holidays belong to a company
+        week_rows = {False: ['.'] * day_count}
+        for calendar in calendars:
+            week_rows[calendar.id] = [
+                '.' if (week_type if calendar.id in two_weeks else None, day.weekday()) in working_days[calendar.id]
+                else 'W'
+                for day, week_type in zip(days, week_types)
+            ]
+        calendar_rows = {
+            (member.resource_calendar_id.id, member.company_id.id): list(week_rows[member.resource_calendar_id.id])
+            for member in employees
+        }
+
+        start_utc = mobile_ctx.tz.localize(datetime.combine(date_from, time.min)).astimezone(pytz.utc)
+        stop_utc = mobile_ctx.tz.localize(datetime.combine(date_to, time.max)).astimezone(pytz.utc)
+        for holiday in request.env['resource.calendar.leaves'].sudo().search_read([
+            ('resource_id', '=', False),
+            ('time_type', '=', 'leave'),
+            ('calendar_id', 'in', calendars.ids + [False]),
+            ('company_id', 'in', employees.company_id.ids + [False]),
+            ('date_from', '<=', stop_utc.replace(tzinfo=None)),
+            ('date_to', '>=', start_utc.replace(tzinfo=None)),
+        ], ['calendar_id', 'company_id', 'date_from', 'date_to'], load=None):
+            first = pytz.utc.localize(holiday['date_from']).astimezone(mobile_ctx.tz).date()
+            last = pytz.utc.localize(holiday['date_to']).astimezone(mobile_ctx.tz).date()
+            start, stop = max((first - date_from).days, 0), min((last - date_from).days, day_count - 1)
+            for (calendar_id, company_id), row in calendar_rows.items():
+                if holiday['calendar_id'] in (False, calendar_id) and holiday['company_id'] in (False, company_id):
+                    for index in range(start, stop + 1):
+                        if row[index] == '.':
+                            row[index] = 'H'
+
+        rows = {
+            member.id: list(calendar_rows[member.resource_calendar_id.id, member.company_id.id])
+            for member in employees
+        }
+        # pending first so that an approved leave wins on the same day
+        leaves = request.env['hr.leave'].sudo().search_read([
+            ('employee_id', 'in', employees.ids),
+            ('state', 'in', ['confirm', 'validate1', 'validate']),
+            ('request_date_from', '<=', date_to),
+            ('request_date_to', '>=', date_from),
+        ], ['employee_id', 'request_date_from', 'request_date_to', 'state'], load=None)
+        for leave in sorted(leaves, key=lambda leave: leave['state'] == 'validate'):
+            row = rows[leave['employee_id']]
+            code = 'A' if leave['state'] == 'validate' else 'P'
+            start = max((leave['request_date_from'] - date_from).days, 0)
+            stop = min((leave['request_date_to'] - date_from).days, day_count - 1)
+            for index in range(start, stop + 1):
+                if row[index] in '.P':
+                    row[index] = code
+
+        away_counts = [0] * day_count
+        for row in rows.values():
+            for index, code in enumerate(row):
+                if code in 'AP':
+                    away_counts[index] += 1
+
+        return {
+            "status": 200,
+            "date_from": str(date_from),
+            "date_to": str(date_to),
+            "days": [str(day) for day in days],
+            "away_counts": away_counts,
+            "employees": [{
+                "id": member.id,
+                "name": member.name,
+                "department": member.department_id.name or "",
+                "availability": ''.join(rows[member.id]),
+            } for member in employees],
+        }
+
     @http.route('/mobile/employee/profile', type='json', auth='user', csrf=False)
     def employee_profile(self, **kwargs):
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
         if not employee:
             return {"status": 400, "error": "No employee linked to this user"}
 
@@ -649,7 +1713,7 @@ class MobileApiHome(http.Controller):
             "holiday": 0,
         }
 
-        calendar = employee.resource_calendar_id or employee.company_id.resource_calendar_id
+        calendar = mobile_ctx.calendar
 
         holidays = request.env['resource.calendar.leaves'].sudo().search([
             ('calendar_id', '=', calendar.id),
@@ -719,8 +1783,8 @@ class MobileApiHome(http.Controller):
                 "weekly_bar_chart": chart_data,
             },
             "attendance_summary": attendance_summary,
-            "profile_image_url": self.get_image_url('hr.employee', employee.id, 'image_1920') or "",
-            'image_1920': employee.image_1920 or "" ,
+            "profile_image_url": self.get_image_url(employee),
+            "profile_image_version": self._get_image_version(employee),
         }
 
     def _format_duration(self, total_seconds):
@@ -737,19 +1801,17 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/attendance/logs', type='json', auth='user', csrf=False)
     def mobile_attendance_log(self, **kwargs):
-        user = request.env.user
-        user_ctx = user.with_context(tz=user.tz)
-        tz_name = user.tz or 'UTC'
-        user_tz = pytz.timezone(tz_name)
-
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
-        if not employee:
+        mobile_ctx = self._get_mobile_context()
+        if not mobile_ctx.employee:
             return {"status": 400, "error": "Employee not found for user."}
+        return {"status": 200, **self._get_attendance_summary(request.env, mobile_ctx)}
 
-        today_start, today_end, today_user = self._get_user_day_range_utc()
-        Attendance = request.env['hr.attendance'].sudo()
+    def _get_attendance_summary(self, env, mobile_ctx):
+        """ Today's attendance status, timers and details card of the employee. """
+        user_ctx = mobile_ctx.user_ctx
+        employee = mobile_ctx.employee
+        today_start, today_end, today_user = self._get_user_day_range_utc(mobile_ctx.tz)
+        Attendance = env['hr.attendance'].sudo()
 
         # All today's attendance records
         attendances = Attendance.search([
@@ -857,9 +1919,9 @@ class MobileApiHome(http.Controller):
 
         # Expected hours from employee work schedule
         expected_seconds = 0
-        if employee.resource_calendar_id:
+        if mobile_ctx.calendar:
             today_weekday = str(today_user.weekday())
-            day_lines = employee.resource_calendar_id.attendance_ids.filtered(
+            day_lines = mobile_ctx.calendar.attendance_ids.filtered(
                 lambda l: l.dayofweek == today_weekday
             )
             expected_seconds = sum(
@@ -891,7 +1953,6 @@ class MobileApiHome(http.Controller):
         }
 
         return {
-            "status": 200,
             "date": today_user.strftime("%d %b, %Y"),
             "current_status": current_status,
             "check_in_iso": check_in_iso,
@@ -908,26 +1969,16 @@ class MobileApiHome(http.Controller):
             "details_card": details_card,
         }
 
-
-    @http.route('/mobile/payslip/dashboard', type='json', auth='user', csrf=False)
-    def payslip_dashboard(self, **kwargs):
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
-        if not employee:
-            return {"status": 400, "error": "Employee not found for this user"}
-
-        user_tz = pytz.timezone(user.tz or 'UTC')
-        today_user = datetime.now(user_tz).date()
-
-        upcoming_payslips = request.env['hr.payslip'].sudo().search([
-            ('employee_id', '=', employee.id),
+    def _get_next_payslips(self, env, mobile_ctx):
+        """ The next two payslips of the employee with their net salary. """
+        today_user = datetime.now(mobile_ctx.tz).date()
+        upcoming_payslips = env['hr.payslip'].sudo().search([
+            ('employee_id', '=', mobile_ctx.employee.id),
             ('date_to', '>=', today_user),
             ('state', 'in', ['draft', 'verify', 'done'])
         ], order='date_from ASC', limit=2)
 
-        payslip_list = [{
+        return [{
             "name": payslip.name,
             "from_date": payslip.date_from.strftime('%d.%m.%Y'),
             "to_date": payslip.date_to.strftime('%d.%m.%Y'),
@@ -935,6 +1986,18 @@ class MobileApiHome(http.Controller):
             else payslip.line_ids.filtered(lambda l: l.code == 'NET').total,
         } for payslip in upcoming_payslips]
 
+    @http.route('/mobile/payslip/dashboard', type='json', auth='user', csrf=False)
+    def payslip_dashboard(self, **kwargs):
+        mobile_ctx = self._get_mobile_context()
+        user = mobile_ctx.user
+        employee = mobile_ctx.employee
+        if not employee:
+            return {"status": 400, "error": "Employee not found for this user"}
+
+        today_user = datetime.now(mobile_ctx.tz).date()
+
+        payslip_list = self._get_next_payslips(request.env, mobile_ctx)
+
         today_timesheets = request.env['account.analytic.line'].sudo().search([
             ('user_id', '=', user.id),
             ('date', '=', today_user)
@@ -966,16 +2029,28 @@ class MobileApiHome(http.Controller):
             }
         }
 
+    def _serialize_payslips(self, payslips):
+        # net amounts of the whole page in one query
+        net_amounts = dict.fromkeys(payslips.ids, 0.0)
+        for line in payslips.env['hr.payslip.line'].sudo().search_read(
+                [('slip_id', 'in', payslips.ids), ('code', '=', 'NET')], ['slip_id', 'total'], load=None):
+            net_amounts[line['slip_id']] += line['total']
+
+        return [{
+            'id': slip.id,
+            'name': slip.name,
+            'date_from': slip.date_from.strftime('%d.%m.%Y'),
+            'date_to': slip.date_to.strftime('%d.%m.%Y'),
+            'net': net_amounts[slip.id],
+        } for slip in payslips]
+
     @http.route('/mobile/payslip/list', type='json', auth='user', csrf=False)
     def get_payslip_list(self, **kwargs):
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
+        employee = self._get_mobile_context().employee
         if not employee:
             return {"success": False, "message": "No employee found"}
 
-        params = request.httprequest.args
+        params = self._get_query_args()
 
         page = int(params.get('page', 1))
         limit = int(params.get('limit', 10))
@@ -1004,29 +2079,35 @@ class MobileApiHome(http.Controller):
 
         Payslip = request.env['hr.payslip'].sudo()
 
-        total = Payslip.search_count(domain)
-        total_pages = (total + limit - 1) // limit if limit else 1
+        page_info = None
+        if params.get('cursor') is not None:
+            sort_field, _sep, sort_direction = sort.strip().partition(' ')
+            if sort_field not in ('date_from', 'date_to', 'id') \
+                    or sort_direction.strip().lower() not in ('', 'asc', 'desc'):
+                return {"success": False, "message": "Unsupported sort for cursor pagination"}
+            try:
+                payslips, page_info = self._keyset_page(
+                    Payslip, domain, sort_field, sort_direction.strip().lower() == 'desc',
+                    params['cursor'], limit,
+                    with_count=self._parse_bool(params.get('with_count')),
+                )
+            except ValueError as e:
+                return {"success": False, "message": str(e)}
+        else:
+            total = Payslip.search_count(domain)
+            total_pages = (total + limit - 1) // limit if limit else 1
+
+            payslips = Payslip.search(
+                domain,
+                order=sort,
+                limit=limit,
+                offset=offset
+            )
 
-        payslips = Payslip.search(
-            domain,
-            order=sort,
-            limit=limit,
-            offset=offset
-        )
+        data = self._serialize_payslips(payslips)
 
-        data = []
-        for slip in payslips:
-            net_amount = slip.line_ids.filtered(
-                lambda l: l.code == 'NET'
-            ).total if slip.line_ids else 0.0
-
-            data.append({
-                'id': slip.id,
-                'name': slip.name,
-                'date_from': slip.date_from.strftime('%d.%m.%Y'),
-                'date_to': slip.date_to.strftime('%d.%m.%Y'),
-                'net': net_amount,
-            })
+        if page_info is not None:
+            return {"status": 200, **page_info, "payslips": data}
 
         return {
             "status": 200,
@@ -1040,7 +2121,7 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/payslip/detail', type='json', auth='user', csrf=False)
     def payslip_detail(self, **kwargs):
-        data = request.get_json_data()
+        data = self._get_json_data()
         payslip_id = data.get('payslip_id')
         if not payslip_id:
             return {"status": 400, "error": "Payslip ID is required"}
@@ -1076,12 +2157,27 @@ class MobileApiHome(http.Controller):
         }
         return response
 
+    def _get_document_domain(self, employee):
+        return [('employee_id', '=', employee.id)]
+
+    def _serialize_documents(self, documents):
+        result = []
+        for doc in documents:
+            result.append({
+                "id": doc.id,
+                "name": doc.document_id.name,
+                "document_number": doc.name,
+                "issue_date": doc.issue_date.strftime('%d/%m/%Y - %I:%M %p') if doc.issue_date else '',
+                "expiry_date": doc.expiry_date.strftime('%d/%m/%Y') if doc.expiry_date else '',
+                "description": doc.description or '',
+                "has_attachment": bool(doc.doc_attachment_ids)
+            })
+        return result
+
     @http.route('/mobile/document/list', type='json', auth='user', csrf=False)
     def get_document_list(self, **kwargs):
-        data = request.get_json_data()
-        user = request.env.user
-
-        employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+        data = self._get_json_data()
+        employee = self._get_mobile_context().employee
         if not employee:
             return {"status": 400, "error": "No employee found"}
 
@@ -1090,27 +2186,31 @@ class MobileApiHome(http.Controller):
         offset = (page - 1) * limit
         search = data.get('search', '')
 
-        domain = [('employee_id', '=', employee.id)]
+        domain = self._get_document_domain(employee)
         if search:
             domain += [('document_id.name', 'ilike', search)]
 
         Document = request.env['hr.employee.document'].sudo()
-        total = Document.search_count(domain)
-        total_pages = (total + limit - 1) // limit if limit else 1
 
-        documents = Document.search(domain, limit=limit, offset=offset, order="issue_date desc")
+        page_info = None
+        if data.get('cursor') is not None:
+            try:
+                documents, page_info = self._keyset_page(
+                    Document, domain, 'issue_date', True, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+        else:
+            total = Document.search_count(domain)
+            total_pages = (total + limit - 1) // limit if limit else 1
 
-        result = []
-        for doc in documents:
-            result.append({
-                "id": doc.id,
-                "name": doc.document_id.name,
-                "document_number": doc.name,
-                "issue_date": doc.issue_date.strftime('%d/%m/%Y - %I:%M %p') if doc.issue_date else '',
-                "expiry_date": doc.expiry_date.strftime('%d/%m/%Y') if doc.expiry_date else '',
-                "description": doc.description or '',
-                "has_attachment": bool(doc.doc_attachment_ids)
-            })
+            documents = Document.search(domain, limit=limit, offset=offset, order="issue_date desc")
+
+        result = self._serialize_documents(documents)
+
+        if page_info is not None:
+            return {"status": 200, **page_info, "documents": result}
 
         return {
             "status": 200,
@@ -1123,7 +2223,7 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/payslip/download_base64', type='json', auth='user', csrf=False)
     def download_payslip_pdf_base64(self, **kwargs):
-        data = request.get_json_data()
+        data = self._get_json_data()
         payslip_id = data.get('payslip_id')
 
         if not payslip_id:
@@ -1149,34 +2249,18 @@ class MobileApiHome(http.Controller):
             "base64_pdf": pdf_base64,
         }
 
-    @http.route('/mobile/events/upcoming', type='json', auth='user', csrf=False)
-    def get_upcoming_events(self, **kwargs):
-        page = int(kwargs.get('page', 1))
-        limit = int(kwargs.get('limit', 10))
-        offset = (page - 1) * limit
-        search = kwargs.get('search', '')
-
-        domain = [('date_begin', '>=', fields.Datetime.now())]
-        if search:
-            domain += ['|', ('name', 'ilike', search), ('address_id.name', 'ilike', search)]
-
-        Event = request.env['event.event'].sudo()
-        total = Event.search_count(domain)
-        total_pages = math.ceil(total / limit) if limit else 1
-
-        events = Event.search(domain, order='date_begin asc', limit=limit, offset=offset)
-
+    def _serialize_events(self, events, user_ctx):
         result = []
         for event in events:
             result.append({
                 "id": event.id,
                 "name": event.name,
                 "start_datetime": fields.Datetime.context_timestamp(
-                        request.env.user.with_context(tz=request.env.user.tz),
+                        user_ctx,
                         event.date_begin
                     ).strftime('%Y-%m-%d %H:%M:%S') if event.date_begin else '',
                 "end_datetime": fields.Datetime.context_timestamp(
-                        request.env.user.with_context(tz=request.env.user.tz),
+                        user_ctx,
                         event.date_end
                     ).strftime('%Y-%m-%d %H:%M:%S') if event.date_end else '',
                 "location": event.address_id.name if event.address_id else '',
@@ -1184,6 +2268,28 @@ class MobileApiHome(http.Controller):
                 "seats_available": event.seats_available or 0,
                 "description": event.description or '',
             })
+        return result
+
+    @http.route('/mobile/events/upcoming', type='json', auth='user', csrf=False)
+    @mobile_etag()
+    def get_upcoming_events(self, **kwargs):
+        page = int(kwargs.get('page', 1))
+        limit = int(kwargs.get('limit', 10))
+        offset = (page - 1) * limit
+        search = kwargs.get('search', '')
+        user_ctx = self._get_mobile_context().user_ctx
+
+        domain = [('date_begin', '>=', fields.Datetime.now())]
+        if search:
+            domain += ['|', ('name', 'ilike', search), ('address_id.name', 'ilike', search)]
+
+        Event = request.env['event.event'].sudo()
+        total = Event.search_count(domain)
+        total_pages = math.ceil(total / limit) if limit else 1
+
+        events = Event.search(domain, order='date_begin asc', limit=limit, offset=offset)
+
+        result = self._serialize_events(events, user_ctx)
 
         return {
             "status": 200,
@@ -1194,23 +2300,10 @@ class MobileApiHome(http.Controller):
             "events": result,
         }
 
-    @http.route('/mobile/announcements/list', type='json', auth='user', csrf=False)
-    def get_announcement_list(self, **kwargs):
-        data = request.get_json_data()
-        user = request.env.user.sudo()
-        employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
-
-        if not employee:
-            return {"status": 400, "error": "No employee found"}
-
-        page = int(data.get('page', 1))
-        limit = int(data.get('limit', 10))
-        offset = (page - 1) * limit
-        search = data.get('search', '')
-
-        today = date.today()
-
-        domain = [
+    def _get_announcement_domain(self, mobile_ctx):
+        """ Approved announcements that are general or target the employee,
+        its department or its job position. """
+        return [
             ('state', '=', 'approved'),
             # ('date_start', '<=', today),
             # ('date_end', '>=', today),
@@ -1218,21 +2311,12 @@ class MobileApiHome(http.Controller):
             ('is_announcement', '=', True),
             '|',
             '|',
-            ('employee_ids', 'in', employee.id),
-            ('department_ids', 'in', employee.department_id.id if employee.department_id else False),
-            ('position_ids', 'in', employee.job_id.id if employee.job_id else False),
+            ('employee_ids', 'in', mobile_ctx.employee.id),
+            ('department_ids', 'in', mobile_ctx.department.id or False),
+            ('position_ids', 'in', mobile_ctx.job.id or False),
         ]
 
-        if search:
-            domain += ['|', ('announcement_reason', 'ilike', search), ('announcement', 'ilike', search)]
-
-        Announcement = request.env['hr.announcement'].sudo()
-        announcements = Announcement.search(domain, offset=offset, limit=limit, order="date_start desc")
-        print("..Announcement.", announcements)
-
-        total = Announcement.search_count(domain)
-        total_pages = (total + limit - 1) // limit
-
+    def _serialize_announcements(self, announcements):
         result = []
         for ann in announcements:
             result.append({
@@ -1244,6 +2328,50 @@ class MobileApiHome(http.Controller):
                 "is_general": ann.is_announcement,
                 "company": ann.company_id.name if ann.company_id else '',
             })
+        return result
+
+    @http.route('/mobile/announcements/list', type='json', auth='user', csrf=False)
+    def get_announcement_list(self, **kwargs):
+        data = self._get_json_data()
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
+
+        if not employee:
+            return {"status": 400, "error": "No employee found"}
+
+        page = int(data.get('page', 1))
+        limit = int(data.get('limit', 10))
+        offset = (page - 1) * limit
+        search = data.get('search', '')
+
+        today = date.today()
+
+        domain = self._get_announcement_domain(mobile_ctx)
+
+        if search:
+            domain += ['|', ('announcement_reason', 'ilike', search), ('announcement', 'ilike', search)]
+
+        Announcement = request.env['hr.announcement'].sudo()
+
+        page_info = None
+        if data.get('cursor') is not None:
+            try:
+                announcements, page_info = self._keyset_page(
+                    Announcement, domain, 'date_start', True, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+        else:
+            announcements = Announcement.search(domain, offset=offset, limit=limit, order="date_start desc")
+
+            total = Announcement.search_count(domain)
+            total_pages = (total + limit - 1) // limit
+
+        result = self._serialize_announcements(announcements)
+
+        if page_info is not None:
+            return {"status": 200, **page_info, "announcements": result}
 
         return {
             "status": 200,
@@ -1256,7 +2384,7 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/attendance/check', type='json', auth='user', csrf=False)
     def mobile_attendance_check(self, **kwargs):
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
         action = data.get('action')
         lat = data.get('latitude')
         lon = data.get('longitude')
@@ -1271,10 +2399,8 @@ class MobileApiHome(http.Controller):
                 "error_code": "LOCATION_MISSING"
             }
 
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
         if not employee:
             return {"success": False, "message": "Employee not linked with user"}
 
@@ -1325,7 +2451,7 @@ class MobileApiHome(http.Controller):
             ('is_break', '=', True),
         ], order='check_in desc', limit=1)
 
-        user_ctx = user.with_context(tz=user.tz)
+        user_ctx = mobile_ctx.user_ctx
 
         if action == 'check_in':
             if open_work or open_break:
@@ -1483,13 +2609,488 @@ class MobileApiHome(http.Controller):
         return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+    @http.route('/mobile/metrics', type='http', auth='user', methods=['GET'], csrf=False)
+    def mobile_metrics(self, **kwargs):
+        """
+        Expose the per-route latency, SQL and payload histograms collected
+        by this worker in the Prometheus text format. Admin only.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            return Response("Forbidden", status=403, content_type='text/plain')
+
+        return Response(
+            MOBILE_METRICS.to_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+            status=200,
+        )
+
+    @classmethod
+    def _get_batch_endpoints(cls):
+        """ Map the JSON routes of the mobile API to the method serving them. """
+        endpoints = {}
+        for name in dir(cls):
+            method = getattr(cls, name, None)
+            routing = getattr(method, 'original_routing', None)
+            if not routing or routing.get('type') != 'json' or routing.get('auth') != 'user':
+                continue
+            for route in routing.get('routes') or []:
+                if route.startswith('/mobile/') and route not in MOBILE_BATCH_EXCLUDED_ROUTES:
+                    endpoints[route] = name
+        return endpoints
+
+    def _run_batch_item(self, route, params):
+        endpoints = self._get_batch_endpoints()
+        if route not in endpoints:
+            return {"route": route, "status": 404, "error": "Unknown or unsupported route"}
+        if not isinstance(params, dict):
+            return {"route": route, "status": 400, "error": "params must be an object"}
+
+        request._mobile_batch_params = params
+        try:
+            # each item is isolated: a failing write does not roll back the others
+            with request.env.cr.savepoint():
+                result = getattr(self, endpoints[route])(**params)
+        except AccessError as e:
+            return {"route": route, "status": 403, "error": str(e)}
+        except (UserError, ValidationError) as e:
+            return {"route": route, "status": 400, "error": str(e)}
+        except Exception:
+            _logger.exception("Mobile batch item %s failed", route)
+            return {"route": route, "status": 500, "error": "Internal server error"}
+        finally:
+            request._mobile_batch_params = None
+
+        status = result.get('status', 200) if isinstance(result, dict) else 200
+        return {"route": route, "status": status, "result": result}
+
+    @http.route('/mobile/batch', type='json', auth='user', methods=['POST'], csrf=False)
+    def mobile_batch(self, **kwargs):
+        """
+        Run several mobile JSON calls in one round trip.
+
+        Expects ``{"requests": [{"route": "/mobile/...", "params": {...}}, ...]}``
+        and returns the results in the same order, each with its own status.
+        All items share the request cursor and the resolved mobile context.
+        """
+        data = self._get_json_data() or {}
+        items = data.get('requests')
+        if not isinstance(items, list) or not items:
+            return {"status": 400, "error": "requests must be a non-empty list"}
+        if len(items) > MOBILE_BATCH_MAX_ITEMS:
+            return {"status": 400, "error": f"At most {MOBILE_BATCH_MAX_ITEMS} requests per batch"}
+
+        responses = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get('route'):
+                responses.append({"route": None, "status": 400, "error": "route is required"})
+                continue
+            responses.append(self._run_batch_item(item['route'], item.get('params') or {}))
+
+        return {"status": 200, "responses": responses}
+
+    def _home_attendance(self, env, mobile_ctx):
+        return self._get_attendance_summary(env, mobile_ctx)
+
+    def _home_unread_count(self, env, mobile_ctx):
+        return self._get_unread_count(env, mobile_ctx)
+
+    def _home_next_payslips(self, env, mobile_ctx):
+        return self._get_next_payslips(env, mobile_ctx)
+
+    def _home_events(self, env, mobile_ctx):
+        events = env['event.event'].sudo().search(
+            [('date_begin', '>=', fields.Datetime.now())], order='date_begin asc', limit=5)
+        return self._serialize_events(events, mobile_ctx.user_ctx)
+
+    def _home_announcements(self, env, mobile_ctx):
+        announcements = env['hr.announcement'].sudo().search(
+            self._get_announcement_domain(mobile_ctx), order='date_start desc', limit=5)
+        return self._serialize_announcements(announcements)
+
+    def _run_home_section(self, registry, uid, context, section):
+        """ Compute a /mobile/home section in a pool thread, on its own read-only
+        cursor whose statement timeout matches the section timeout. """
+        with registry.cursor(readonly=True) as cr:
+            cr.execute("SET LOCAL statement_timeout = %s", [MOBILE_HOME_SECTIONS[section] * 1000])
+            env = api.Environment(cr, uid, context)
+            section_result = getattr(self, f'_home_{section}')(env, self._build_mobile_context(env))
+            if registry.in_test_mode():
+                # test cursors share the connection of the test transaction
+                cr.execute("SET LOCAL statement_timeout = DEFAULT")
+            return section_result
+
+    def _compute_home_sections(self, env, mobile_ctx, parallel=True):
+        """ Return the /mobile/home sections with their status, computed
+        concurrently in the pool, or one after the other in ``env`` when not
+        ``parallel``. The sections the pool has no free thread for are
+        computed in ``env`` as well. """
+        result, section_status = {}, {}
+        started_at = datetime.now()
+        pending = {}
+        for section in MOBILE_HOME_SECTIONS:
+            if parallel and _home_slots.acquire(blocking=False):
+                pending[section] = _get_home_executor().submit(
+                    self._run_home_section, env.registry, env.uid, dict(env.context), section)
+                pending[section].add_done_callback(lambda _future: _home_slots.release())
+        for section in MOBILE_HOME_SECTIONS:
+            if section not in pending:
+                result[section] = getattr(self, f'_home_{section}')(env, mobile_ctx)
+                section_status[section] = 200
+
+        for section, future in pending.items():
+            elapsed = (datetime.now() - started_at).total_seconds()
+            try:
+                result[section] = future.result(timeout=max(MOBILE_HOME_SECTIONS[section] - elapsed, 0))
+                section_status[section] = 200
+            except futures.TimeoutError:
+                _logger.warning("Mobile home section %s timed out", section)
+                result[section] = None
+                section_status[section] = 504
+            except Exception:
+                _logger.exception("Mobile home section %s failed", section)
+                result[section] = None
+                section_status[section] = 500
+        return result, section_status
+
+    @http.route('/mobile/home', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def mobile_home(self, **kwargs):
+        """
+        Everything the home screen shows in one response: attendance card,
+        unread chat count, next payslips, upcoming events and announcements.
+
+        Sections are independent and computed concurrently; a section that
+        fails or exceeds its timeout is reported in ``section_status`` and
+        returned as null without delaying the others.
+        """
+        mobile_ctx = self._get_mobile_context()
+        if not mobile_ctx.employee:
+            return {"status": 400, "error": "Employee not found for user."}
+
+        sections, section_status = self._compute_home_sections(
+            request.env, mobile_ctx,
+            # test cursors are serialized on a single connection
+            parallel=not request.env.registry.in_test_mode(),
+        )
+        return {"status": 200, "section_status": section_status, **sections}
+
+    def _encode_sync_token(self, write_date, record_id, tombstone_id, synced_at):
+        # keep the microseconds of write_date: truncating them would make the
+        # watermark fall behind records written in the same second
+        value = write_date.isoformat(sep=' ') if write_date else None
+        token = json.dumps([value, record_id, tombstone_id, synced_at.isoformat(sep=' ')]).encode()
+        return base64.urlsafe_b64encode(token).decode()
+
+    def _decode_sync_token(self, token):
+        """ Return the (write_date, id, tombstone id, sync time) watermark of a
+        sync token, the origin for an empty token. The sync time is the moment
+        up to which the deletions were reported. Raises ValueError when
+        malformed. """
+        if not token:
+            return None, 0, 0, None
+        try:
+            value, record_id, tombstone_id, synced_at = json.loads(base64.urlsafe_b64decode(token.encode()))
+            write_date = datetime.fromisoformat(value) if value else None
+            return write_date, int(record_id), int(tombstone_id), datetime.fromisoformat(synced_at)
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Invalid sync token")
+
+    def _get_sync_scope(self, section, mobile_ctx):
+        """ Domain and serializer of a /mobile/sync section: the records the
+        matching list route shows, without its search filters. """
+        employee = mobile_ctx.employee
+        if section == 'leaves':
+            return self._get_leave_domain({}), self._serialize_leaves
+        if section == 'tasks':
+            return self._get_task_domain(mobile_ctx.user), self._serialize_tasks
+        if section == 'documents':
+            return self._get_document_domain(employee), self._serialize_documents
+        if section == 'expenses':
+            return self._get_expense_domain(employee), \
+                lambda expenses: self._serialize_expenses(expenses, employee)
+        return self._get_announcement_domain(mobile_ctx), self._serialize_announcements
+
+    def _get_sync_tombstone_domain(self, section, mobile_ctx):
+        """ Deletions reported by a /mobile/sync section: those of the records
+        its scope could have returned. Deleted announcements are reported per
+        company, their audience is not kept. """
+        if section == 'leaves' and not self._get_leave_domain({}):
+            # administrators synchronize every leave
+            return []
+        if section == 'tasks':
+            return [('user_ids', 'in', mobile_ctx.user.id)]
+        if section == 'announcements':
+            return [('company_id', 'in', mobile_ctx.user.company_ids.ids + [False])]
+        return [('employee_id', '=', mobile_ctx.employee.id)]
+
+    def _sync_section(self, section, token, limit, mobile_ctx):
+        write_date, record_id, tombstone_id, synced_at = self._decode_sync_token(token)
+        model_name = MOBILE_SYNC_MODELS[section]
+        Model = request.env[model_name].sudo()
+        Tombstone = request.env['mobile.sync.tombstone'].sudo()
+        now = fields.Datetime.now()
+        committed_before = now - MOBILE_SYNC_OVERLAP
+
+        # the deletions since the last sync may be gone: start over
+        retention = timedelta(days=Tombstone._get_retention_days())
+        reset = bool(token) and synced_at < now - retention
+        if reset:
+            write_date, record_id, tombstone_id = None, 0, 0
+
+        scope, serialize = self._get_sync_scope(section, mobile_ctx)
+        # rows without write_date would sort after every watermark
+        domain = expression.AND([scope, [('write_date', '!=', False)]])
+        if write_date:
+            domain = expression.AND([
+                domain, self._keyset_domain('write_date', False, write_date, record_id)
+            ])
+        records = Model.search(domain, order='write_date asc, id asc', limit=limit + 1)
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        # the tombstones up to this one are committed, the later ones are read again
+        committed_tombstone_id = max(tombstone_id, Tombstone.search(
+            [('create_date', '<', committed_before)], order='id desc', limit=1).id)
+        deleted = []
+        # a full sync has nothing to delete on the client
+        if token and not reset:
+            tombstones = Tombstone.search_fetch(expression.AND([
+                self._get_sync_tombstone_domain(section, mobile_ctx),
+                [('res_model', '=', model_name), ('id', '>', tombstone_id)],
+            ]), ['res_id'], order='id', limit=limit + 1)
+            if len(tombstones) > limit:
+                # report the rest next time, still relative to the last sync
+                tombstones = tombstones[:limit]
+                committed_tombstone_id, now = tombstones[-1].id, synced_at
+                has_more = True
+            deleted = tombstones.mapped('res_id')
+
+        if records:
+            write_date, record_id = records[-1].write_date, records[-1].id
+        result = {
+            "changed": serialize(records),
+            "deleted": deleted,
+            "has_more": has_more,
+            "reset": reset,
+        }
+        if not has_more:
+            if write_date and write_date > committed_before:
+                # read the overlap window again on the next sync
+                write_date, record_id = committed_before, 0
+            # records that left the scope are neither changed nor deleted:
+            # the client drops the ones it has that are not listed here
+            result['ids'] = Model.search(scope, order='id').ids
+        result['since'] = self._encode_sync_token(write_date, record_id, committed_tombstone_id, now)
+        return result
+
+    @http.route('/mobile/sync', type='json', auth='user', methods=['POST'], csrf=False, readonly=True)
+    def mobile_sync(self, **kwargs):
+        """
+        Delta synchronization of leaves, tasks, documents, expenses and
+        announcements.
+
+        ``since`` maps each requested section to the token returned by the
+        previous sync (null or empty for a first, full sync). Each section
+        returns the records changed after its watermark in (write_date, id)
+        order, the ids deleted since, ``has_more`` when the client should call
+        again with the new ``since`` token, and ``reset`` when the token was too
+        old and the local copy must be replaced. The last page also lists the
+        ``ids`` of every record in the section: the client drops the others,
+        which left its scope (a task unassigned, an announcement unpublished).
+
+        Each sync reads the last minutes before the previous one again, so
+        records already received may be returned twice.
+        """
+        mobile_ctx = self._get_mobile_context()
+        if not mobile_ctx.employee:
+            return {"status": 400, "error": "No employee linked to this user"}
+
+        data = self._get_json_data() or {}
+        since = data.get('since') or dict.fromkeys(MOBILE_SYNC_MODELS)
+        if not isinstance(since, dict):
+            return {"status": 400, "error": "since must map sections to sync tokens"}
+        unknown = set(since) - set(MOBILE_SYNC_MODELS)
+        if unknown:
+            return {"status": 400, "error": f"Unknown sections: {', '.join(sorted(unknown))}"}
+
+        try:
+            limit = min(int(data.get('limit', 100)), MOBILE_SYNC_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return {"status": 400, "error": "Invalid limit"}
+        if limit <= 0:
+            return {"status": 400, "error": "Invalid limit"}
+
+        sections = {}
+        for section, token in since.items():
+            try:
+                sections[section] = self._sync_section(section, token, limit, mobile_ctx)
+            except ValueError as e:
+                return {"status": 400, "error": f"{section}: {e}"}
+        return {"status": 200, "sections": sections}
+
+    def _serialize_leave_types(self, leave_types, employee):
+        """ Leave types with the remaining balance of the employee. """
+        allocation_data = leave_types.get_allocation_data(employee).get(employee, [])
+        balances = {type_id: data for _name, data, _requires, type_id in allocation_data}
+        result = []
+        for leave_type in leave_types:
+            balance = balances.get(leave_type.id, {})
+            result.append({
+                "id": leave_type.id,
+                "name": leave_type.name,
+                "requires_allocation": leave_type.requires_allocation,
+                "request_unit": leave_type.request_unit,
+                "max_leaves": balance.get('max_leaves', 0),
+                "leaves_taken": balance.get('leaves_taken', 0),
+                "remaining_leaves": balance.get('remaining_leaves', 0),
+                "virtual_remaining_leaves": balance.get('virtual_remaining_leaves', 0),
+            })
+        return result
+
+    def _get_snapshot_sources(self, mobile_ctx):
+        """ (table, model, domain, order, serializer) of the snapshot tables. """
+        employee = mobile_ctx.employee
+        return [
+            ('leave_types', 'hr.leave.type', [], 'sequence, id',
+             lambda leave_types: self._serialize_leave_types(leave_types, employee)),
+            ('tasks', 'project.task', self._get_task_domain(mobile_ctx.user) + [('stage_id.fold', '=', False)],
+             'id desc', self._serialize_tasks),
+            ('documents', 'hr.employee.document', self._get_document_domain(employee),
+             'issue_date desc, id desc', self._serialize_documents),
+            ('payslips', 'hr.payslip', [('employee_id', '=', employee.id)],
+             'date_from desc, id desc', self._serialize_payslips),
+            ('announcements', 'hr.announcement', self._get_announcement_domain(mobile_ctx),
+             'date_start desc, id desc', self._serialize_announcements),
+            ('employees', 'hr.employee', self._get_directory_domain(mobile_ctx.user),
+             'name asc, id asc', self._serialize_employees),
+        ]
+
+    def _get_snapshot_key(self, mobile_ctx):
+        """ Hash of the write_date stamps of every record the snapshot depends
+        on: it changes, and the snapshot is rebuilt, when one of them does. """
+        employee = mobile_ctx.employee
+        stamps = [
+            str(MOBILE_SNAPSHOT_VERSION),
+            self._profile_etag_stamp(),
+            self._leave_types_etag_stamp(),
+            self._write_date_stamp('hr.leave', [('employee_id', '=', employee.id)]),
+            self._write_date_stamp('project.task', self._get_task_domain(mobile_ctx.user)),
+            self._write_date_stamp('project.task.type', []),
+        ]
+        # leave types and tasks are covered above, including their folded stages
+        for _table, model, domain, _order, _serialize in self._get_snapshot_sources(mobile_ctx)[2:]:
+            stamps.append(self._write_date_stamp(model, domain))
+        return hashlib.sha1("|".join(stamps).encode()).hexdigest()
+
+    def _get_snapshot_dir(self):
+        path = request.env['hr.employee']._mobile_snapshot_dir()
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _build_snapshot(self, path, mobile_ctx, key):
+        """ Write the SQLite snapshot into ``path``. Each table is read and
+        serialized by chunks whose cache is dropped once written, so memory
+        does not grow with the size of the bundle. """
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('version', str(MOBILE_SNAPSHOT_VERSION)),
+                ('key', key),
+                ('employee_id', str(mobile_ctx.employee.id)),
+                ('generated_at', fields.Datetime.to_string(fields.Datetime.now())),
+            ])
+            connection.execute("CREATE TABLE profile (data TEXT NOT NULL)")
+            connection.execute("INSERT INTO profile VALUES (?)", [
+                json.dumps(self._get_profile_data(mobile_ctx), default=str),
+            ])
+
+            for table, model, domain, order, serialize in self._get_snapshot_sources(mobile_ctx):
+                connection.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+                Model = request.env[model].sudo()
+                for ids in odoo.tools.split_every(MOBILE_SNAPSHOT_CHUNK, Model.search(domain, order=order).ids):
+                    records = Model.browse(ids)
+                    rows = serialize(records)
+                    connection.executemany(f"INSERT INTO {table} VALUES (?, ?)", [
+                        (record_id, json.dumps(row, default=str)) for record_id, row in zip(records.ids, rows)
+                    ])
+                    request.env.invalidate_all()
+            connection.commit()
+        finally:
+            connection.close()
+
+    @http.route('/mobile/snapshot', type='http', auth='user', methods=['GET'], csrf=False, readonly=True)
+    def mobile_snapshot(self, **kwargs):
+        """
+        Offline bundle of the employee data as a SQLite database: profile,
+        leave types with balances, open tasks, documents, payslips,
+        announcements and the employee directory, one JSON row per record in
+        the format of the matching list route.
+
+        The file is kept on disk until one of its source records changes or it
+        is not served for a week; its ETag is the snapshot key so clients
+        revalidate with If-None-Match.
+        """
+        mobile_ctx = self._get_mobile_context()
+        if not mobile_ctx.employee:
+            return request.make_json_response({"status": 400, "error": "No employee linked to this user"})
+
+        key = self._get_snapshot_key(mobile_ctx)
+        if request.httprequest.if_none_match.contains(key):
+            response = Response(status=304)
+            response.set_etag(key)
+            return response
+
+        directory = self._get_snapshot_dir()
+        prefix = f"{mobile_ctx.employee.id}-"
+        path = os.path.join(directory, f"{prefix}{key}.sqlite")
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix='.tmp')
+            os.close(fd)
+            try:
+                self._build_snapshot(tmp_path, mobile_ctx, key)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            # drop the outdated snapshots of the employee
+            for name in os.listdir(directory):
+                if name.startswith(prefix) and name.endswith('.sqlite') and name != os.path.basename(path):
+                    try:
+                        os.unlink(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        pass
+        else:
+            # kept by the autovacuum while it is served
+            os.utime(path)
+
+        stream = http.Stream(
+            type='path',
+            path=path,
+            mimetype='application/vnd.sqlite3',
+            download_name='mobile-snapshot.sqlite',
+            size=os.path.getsize(path),
+            etag=key,
+            last_modified=os.path.getmtime(path),
+        )
+        return stream.get_response(as_attachment=True)
+
     @http.route('/mobile/logout', type='json', auth='user', methods=['POST'], csrf=False)
     def mobile_logout(self, **kwargs):
         """
         Logs out the currently authenticated mobile user.
-        Works for normal and portal users since it's session-based.
+        Works for normal and portal users since it's session-based; token
+        clients send their refresh_token to revoke it.
         """
         try:
+            data = self._get_json_data() or {}
+            if data.get('refresh_token'):
+                # token mode: the access token expires by itself
+                request.env['mobile.auth.token'].sudo()._revoke(data['refresh_token'])
+                return {
+                    "status": 200,
+                    "message": "Logged out successfully"
+                }
+
             if not request.session.uid:
                 return {
                     "status": 400,
@@ -1517,15 +3118,16 @@ class MobileApiHome(http.Controller):
             "attachment_id": 5   # optional
         }
         """
-        data = request.get_json_data()
+        data = self._get_json_data()
         document_id = data.get("document_id")
         attachment_id = data.get("attachment_id")
 
         if not document_id:
             return {"status": 400, "error": "Missing document_id"}
 
-        user = request.env.user
-        employee = request.env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+        mobile_ctx = self._get_mobile_context()
+        user = mobile_ctx.user
+        employee = mobile_ctx.employee
 
         document = request.env['hr.employee.document'].sudo().browse(int(document_id))
         print("..document.", document)
@@ -1559,12 +3161,7 @@ class MobileApiHome(http.Controller):
     @http.route('/mobile/document/upload',type='http',auth='user',methods=['POST'],csrf=False)
     def upload_employee_document(self, **kwargs):
 
-        user = request.env.user
-
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)],
-            limit=1
-        )
+        employee = self._get_mobile_context().employee
 
         if not employee:
             return request.make_json_response({
@@ -1604,13 +3201,9 @@ class MobileApiHome(http.Controller):
                 "error": "Only JPG, PNG and PDF files are allowed"
             })
 
-        uploaded_file.seek(0, 2)
-        file_size = uploaded_file.tell()
-        uploaded_file.seek(0)
-
-        max_size = 10 * 1024 * 1024
-
-        if file_size > max_size:
+        try:
+            upload_vals, duplicate = self._store_upload(uploaded_file, employee)
+        except ValueError:
             return request.make_json_response({
                 "status": 400,
                 "error": "File size exceeds 10 MB limit"
@@ -1625,16 +3218,15 @@ class MobileApiHome(http.Controller):
             'description': description or '',
         })
 
-        file_content = uploaded_file.read()
-
-        attachment = request.env['ir.attachment'].sudo().create({
-            'name': uploaded_file.filename,
-            'datas': base64.b64encode(file_content),
-            'res_model': 'hr.employee.document',
-            'res_id': document.id,
-            'mimetype': uploaded_file.content_type,
-            'type': 'binary',
-        })
+        attachment = request.env['ir.attachment'].sudo().with_context(mobile_blob=True).create(dict(
+            upload_vals,
+            name=uploaded_file.filename,
+            res_model='hr.employee.document',
+            res_id=document.id,
+            mimetype=uploaded_file.content_type,
+            type='binary',
+        ))
+        attachment._mobile_queue_optimization()
 
         document.write({
             'doc_attachment_ids': [(4, attachment.id)]
@@ -1645,37 +3237,186 @@ class MobileApiHome(http.Controller):
             "message": "Document uploaded successfully",
             "document_id": document.id,
             "attachment_id": attachment.id,
-            "file_name": attachment.name
+            "file_name": attachment.name,
+            "duplicate_document_id": duplicate.res_id if duplicate.res_model == 'hr.employee.document' else False,
         })
     
-    @http.route('/mobile/tasks', type='json', auth='user', methods=['POST'], csrf=False)
-    def mobile_task_list(self, **kwargs):
+    def _get_upload_session(self, upload_id):
+        return request.env['mobile.upload.session'].sudo().search([
+            ('token', '=', upload_id or ''),
+            ('user_id', '=', request.env.uid),
+        ], limit=1)
 
-        user = request.env.user
-        Task = request.env['project.task'].sudo()
+    def _get_upload_state(self, upload):
+        missing = upload._get_missing_chunks()
+        return {
+            "upload_id": upload.token,
+            "chunk_size": upload.chunk_size,
+            "chunk_count": upload._get_chunk_count(),
+            "missing_chunks": missing,
+            "complete": not missing,
+        }
 
-        data = request.get_json_data() or {}
+    @http.route('/mobile/upload/init', type='json', auth='user', methods=['POST'], csrf=False)
+    def mobile_upload_init(self, **kwargs):
+        """
+        Start (or resume) a chunked upload of a document or expense receipt.
 
-        page = int(data.get('page', 1))
-        limit = int(data.get('limit', 10))
-        offset = (page - 1) * limit
+        The file is then sent with /mobile/upload/chunk, one request per chunk
+        in any order, and attached with /mobile/upload/complete. Passing an
+        existing ``upload_id`` returns the chunks still missing.
+        """
+        data = self._get_json_data() or {}
 
-        domain = [
-            ('user_ids', 'in', user.id)
-        ]
+        if data.get('upload_id'):
+            upload = self._get_upload_session(data['upload_id'])
+            if not upload:
+                return {"status": 404, "error": "Upload not found"}
+            return {"status": 200, **self._get_upload_state(upload)}
 
-        if data.get('status'):
-            domain.append(('stage_id.name', '=', data.get('status')))
+        employee = self._get_mobile_context().employee
+        if not employee:
+            return {"status": 400, "error": "No employee found"}
 
-        total = Task.search_count(domain)
+        file_name = data.get('file_name')
+        mimetype = data.get('mimetype')
+        try:
+            total_size = int(data.get('total_size') or 0)
+            chunk_size = int(data.get('chunk_size') or MOBILE_UPLOAD_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            return {"status": 400, "error": "total_size and chunk_size must be integers"}
+
+        if not file_name:
+            return {"status": 400, "error": "file_name is required"}
+        if mimetype not in MOBILE_UPLOAD_MIMETYPES:
+            return {"status": 400, "error": "Only JPG, PNG and PDF files are allowed"}
+        if not 0 < total_size <= MOBILE_CHUNKED_UPLOAD_MAX_SIZE:
+            return {"status": 400, "error": "File size exceeds 100 MB limit"}
+        if not 0 < chunk_size <= MOBILE_UPLOAD_MAX_CHUNK_SIZE:
+            return {"status": 400, "error": "chunk_size must be between 1 byte and 8 MB"}
+
+        target = data.get('target')
+        if target not in ('document', 'expense'):
+            return {"status": 400, "error": "target must be 'document' or 'expense'"}
+        if target == 'document' and not data.get('document_id'):
+            return {"status": 400, "error": "document_id is required"}
+        # checked now rather than once every chunk has been sent
+        try:
+            if target == 'document':
+                Document = request.env['hr.employee.document']
+                document_type = request.env[Document._fields['document_id'].comodel_name].sudo().browse(
+                    self._get_id_param(data, 'document_id')).exists()
+                if not document_type:
+                    return {"status": 404, "error": "Document type not found"}
+                for key in ('document_number', 'description'):
+                    if data.get(key) and not isinstance(data[key], str):
+                        raise ValueError(f"Invalid {key}")
+                issue_date = self._get_date_param(data, 'issue_date')
+                expiry_date = self._get_date_param(data, 'expiry_date')
+                target_values = {
+                    'document_id': document_type.id,
+                    'name': data.get('document_number'),
+                    'issue_date': fields.Date.to_string(issue_date) if issue_date else False,
+                    'expiry_date': fields.Date.to_string(expiry_date) if expiry_date else False,
+                    'description': data.get('description') or '',
+                }
+            else:
+                expense = request.env['hr.expense'].sudo().search([
+                    ('id', '=', self._get_id_param(data, 'expense_id')),
+                    ('employee_id', '=', employee.id),
+                ])
+                if not expense:
+                    return {"status": 404, "error": "Expense not found"}
+                target_values = {'expense_id': expense.id}
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+
+        upload = request.env['mobile.upload.session'].sudo().create({
+            'user_id': request.env.uid,
+            'file_name': file_name,
+            'mimetype': mimetype,
+            'total_size': total_size,
+            'chunk_size': chunk_size,
+            'checksum': data.get('checksum'),
+            'target': target,
+            'target_values': target_values,
+        })
+        return {"status": 200, **self._get_upload_state(upload)}
 
-        tasks = Task.search(
-            domain,
-            order='id desc',
-            limit=limit,
-            offset=offset
-        )
+    @http.route('/mobile/upload/chunk', type='http', auth='user', methods=['POST', 'PUT'], csrf=False, readonly=True)
+    def mobile_upload_chunk(self, upload_id=None, index=None, **kwargs):
+        """
+        Store one chunk, sent as the raw request body
+        (``Content-Type: application/octet-stream``) with ``upload_id`` and
+        ``index`` in the query string. The optional ``X-Chunk-Checksum`` header
+        holds the sha1 of the chunk. Resending a chunk replaces it.
+        """
+        upload = self._get_upload_session(upload_id)
+        if not upload:
+            return request.make_json_response({"status": 404, "error": "Upload not found"})
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            return request.make_json_response({"status": 400, "error": "index is required"})
+        if not 0 <= index < upload._get_chunk_count():
+            return request.make_json_response({"status": 400, "error": "index out of range"})
+
+        try:
+            upload._write_chunk(
+                index, request.httprequest.stream, request.httprequest.headers.get('X-Chunk-Checksum'))
+        except ValueError as e:
+            return request.make_json_response({"status": 400, "error": str(e)})
+        return request.make_json_response({"status": 200, **self._get_upload_state(upload)})
+
+    @http.route('/mobile/upload/complete', type='json', auth='user', methods=['POST'], csrf=False)
+    def mobile_upload_complete(self, **kwargs):
+        """ Assemble the chunks into an attachment of the target record. """
+        data = self._get_json_data() or {}
+        upload = self._get_upload_session(data.get('upload_id'))
+        if not upload:
+            return {"status": 404, "error": "Upload not found"}
+
+        state = self._get_upload_state(upload)
+        if not state['complete']:
+            return {"status": 400, "error": "Missing chunks", **state}
+
+        employee = self._get_mobile_context().employee
+        try:
+            attachment_vals = upload._assemble()
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+
+        attachment_vals.update({
+            'name': upload.file_name,
+            'mimetype': upload.mimetype,
+            'type': 'binary',
+        })
+        values = upload.target_values
+        if upload.target == 'document':
+            document = request.env['hr.employee.document'].sudo().create(dict(values, employee_id=employee.id))
+            attachment = request.env['ir.attachment'].sudo().with_context(mobile_blob=True).create(dict(
+                attachment_vals, res_model='hr.employee.document', res_id=document.id))
+            document.write({'doc_attachment_ids': [(4, attachment.id)]})
+            result = {"document_id": document.id}
+        else:
+            attachment = request.env['ir.attachment'].sudo().with_context(mobile_blob=True).create(dict(
+                attachment_vals, res_model='hr.expense', res_id=values['expense_id']))
+            result = {"expense_id": values['expense_id']}
+
+        attachment._mobile_queue_optimization()
+        upload.unlink()
+        return {
+            "status": 200,
+            "message": "Upload completed successfully",
+            **result,
+            "attachment_id": attachment.id,
+            "file_name": attachment.name,
+        }
+
+    def _get_task_domain(self, user):
+        return [('user_ids', 'in', user.id)]
 
+    def _serialize_tasks(self, tasks):
         result = []
         for task in tasks:
             result.append({
@@ -1687,6 +3428,48 @@ class MobileApiHome(http.Controller):
                 "deadline": task.date_deadline or False,
                 "priority": task.priority,
             })
+        return result
+
+    @http.route('/mobile/tasks', type='json', auth='user', methods=['POST'], csrf=False)
+    def mobile_task_list(self, **kwargs):
+
+        user = request.env.user
+        Task = request.env['project.task'].sudo()
+
+        data = self._get_json_data() or {}
+
+        page = int(data.get('page', 1))
+        limit = int(data.get('limit', 10))
+        offset = (page - 1) * limit
+
+        domain = self._get_task_domain(user)
+
+        if data.get('status'):
+            domain.append(('stage_id.name', '=', data.get('status')))
+
+        page_info = None
+        if data.get('cursor') is not None:
+            try:
+                tasks, page_info = self._keyset_page(
+                    Task, domain, 'id', True, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+        else:
+            total = Task.search_count(domain)
+
+            tasks = Task.search(
+                domain,
+                order='id desc',
+                limit=limit,
+                offset=offset
+            )
+
+        result = self._serialize_tasks(tasks)
+
+        if page_info is not None:
+            return {"status": 200, **page_info, "count": len(result), "tasks": result}
 
         return {
             "status": 200,
@@ -1702,7 +3485,7 @@ class MobileApiHome(http.Controller):
     @http.route('/mobile/tasks/change_status', type='json', auth='user', csrf=False)
     def mobile_task_change_status(self, **kwargs):
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
         task_id = data.get('task_id')
         stage_id = data.get('stage_id')
 
@@ -1753,7 +3536,7 @@ class MobileApiHome(http.Controller):
     @http.route('/mobile/calendar', type='json', auth='user', csrf=False)
     def mobile_calendar(self, **kwargs):
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
 
         start_date = data.get('start_date')
         end_date = data.get('end_date')
@@ -1767,12 +3550,10 @@ class MobileApiHome(http.Controller):
                 "message": "start_date and end_date are required"
             }
 
-        user = request.env.user
+        mobile_ctx = self._get_mobile_context()
+        user = mobile_ctx.user
 
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)],
-            limit=1
-        )
+        employee = mobile_ctx.employee
 
         if not employee:
             return {
@@ -1780,7 +3561,7 @@ class MobileApiHome(http.Controller):
                 "message": "Employee not linked with user"
             }
 
-        user_tz = pytz.timezone(user.tz or 'UTC')
+        user_tz = mobile_ctx.tz
 
         start_user = user_tz.localize(
             datetime.combine(
@@ -1865,12 +3646,12 @@ class MobileApiHome(http.Controller):
                     "id": event.id,
                     "title": event.name,
                     "start": fields.Datetime.context_timestamp(
-                        user,
+                        mobile_ctx.user_ctx,
                         event.date_begin
                     ).strftime('%Y-%m-%d %H:%M:%S') if event.date_begin else '',
 
                     "end": fields.Datetime.context_timestamp(
-                        user,
+                        mobile_ctx.user_ctx,
                         event.date_end
                     ).strftime('%Y-%m-%d %H:%M:%S') if event.date_end else '',
 
@@ -1885,24 +3666,35 @@ class MobileApiHome(http.Controller):
             "calendar": calendar_data
         }
 
+    def _profile_etag_stamp(self, **kw):
+        mobile_ctx = self._get_mobile_context()
+        employee = mobile_ctx.employee
+        records = (
+            mobile_ctx.user, mobile_ctx.partner, employee,
+            employee.parent_id, mobile_ctx.department,
+        )
+        stamps = ",".join(f"{record._name}:{record.id}:{record.write_date}" for record in records)
+        return f"{request.env.lang},{mobile_ctx.tz_name},{stamps}"
+
     @http.route('/mobile/profile', type='json', auth='user', csrf=False)
+    @mobile_etag('_profile_etag_stamp')
     def mobile_profile(self, **kwargs):
-        user = request.env.user
-        if not user:
+        mobile_ctx = self._get_mobile_context()
+        if not mobile_ctx.user:
             return {"status": 401, "message": "Session expired"}
+        return {"status": 200, **self._get_profile_data(mobile_ctx)}
 
-        partner = user.partner_id
-        employee = request.env['hr.employee'].sudo().search(
-            [('user_id', '=', user.id)], limit=1
-        )
+    def _get_profile_data(self, mobile_ctx):
+        user = mobile_ctx.user
+        partner = mobile_ctx.partner
+        employee = mobile_ctx.employee
 
         # ✅ URL only — never send base64 on profile screen
         # base64 causes heavy payload which pushes UI elements down
         # and hides content beneath navigation buttons
-        profile_image_url = self.get_image_url('res.users', user.id, 'image_1920')
+        profile_image_url = self.get_image_url(user)
 
         return {
-            "status": 200,
             "uid": user.id,
             "username": user.login,
 
@@ -1919,7 +3711,7 @@ class MobileApiHome(http.Controller):
             # Employee info
             "employee_id": employee.id if employee else None,
             "job_title": employee.job_title if employee else "",
-            "department": employee.department_id.name if employee and employee.department_id else "",
+            "department": mobile_ctx.department.name or "",
             "work_email": employee.work_email if employee else "",
             "birthday": employee.birthday.strftime('%d.%m.%Y') if employee and employee.birthday else "",
             "phone": employee.private_phone if employee else "",
@@ -1927,11 +3719,12 @@ class MobileApiHome(http.Controller):
             "manager_job_title": employee.parent_id.job_title if employee and employee.parent_id else "",
 
             # Timezone
-            "timezone": user.tz or "UTC",
+            "timezone": mobile_ctx.tz_name,
 
             # ✅ Image URL only — mobile uses this in Image component directly
             # Removing base64 fixes the Safe Area / content hidden issue
             "profile_image_url": profile_image_url,
+            "profile_image_version": self._get_image_version(user),
         }
 
     @http.route('/mobile/profile/update', type='http', auth='user', methods=['POST'], csrf=False)
@@ -1975,7 +3768,11 @@ class MobileApiHome(http.Controller):
         })
 
 
+    def _task_status_etag_stamp(self, **kw):
+        return f"{request.env.lang},{self._write_date_stamp('project.task.type', [])}"
+
     @http.route('/mobile/tasks/status', type='json', auth='user', methods=['POST'], csrf=False)
+    @mobile_etag('_task_status_etag_stamp')
     def mobile_task_status_list(self, **kwargs):
 
         Stage = request.env['project.task.type'].sudo()
@@ -2002,7 +3799,7 @@ class MobileApiHome(http.Controller):
         logged-in user and another user.
         """
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
         target_user_id = data.get('user_id')
 
         if not target_user_id:
@@ -2055,7 +3852,7 @@ class MobileApiHome(http.Controller):
         
     @http.route('/mobile/chat/message/send', type='json', auth='user', methods=['POST'], csrf=False)
     def send_chat_message(self, **kwargs):
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
         channel_id = data.get('channel_id')
         body = data.get('body')
 
@@ -2082,7 +3879,7 @@ class MobileApiHome(http.Controller):
     @http.route('/mobile/chat/messages', type='json', auth='user', methods=['POST'], csrf=False)
     def get_chat_messages(self, **kwargs):
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
 
         channel_id = data.get('channel_id')
         page = int(data.get('page', 1))
@@ -2096,9 +3893,9 @@ class MobileApiHome(http.Controller):
         if not channel.exists():
             return {"status": 404, "error": "Channel not found"}
 
-        user = request.env.user
-        partner = user.partner_id
-        user_ctx = user.with_context(tz=user.tz)
+        mobile_ctx = self._get_mobile_context()
+        partner = mobile_ctx.partner
+        user_ctx = mobile_ctx.user_ctx
 
         #Update channel member (THIS fixes unread logic properly)
         member = request.env['discuss.channel.member'].sudo().search([
@@ -2144,14 +3941,24 @@ class MobileApiHome(http.Controller):
 
         Message = request.env['mail.message'].sudo()
 
-        total = Message.search_count(domain)
+        page_info = None
+        if data.get('cursor') is not None:
+            try:
+                messages, page_info = self._keyset_page(
+                    Message, domain, 'id', True, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+        else:
+            total = Message.search_count(domain)
 
-        messages = Message.search(
-            domain,
-            order='id desc',
-            limit=limit,
-            offset=offset
-        )
+            messages = Message.search(
+                domain,
+                order='id desc',
+                limit=limit,
+                offset=offset
+            )
 
         result = []
         for msg in messages:
@@ -2165,6 +3972,9 @@ class MobileApiHome(http.Controller):
                 ).strftime("%Y-%m-%d %H:%M:%S")
             })
 
+        if page_info is not None:
+            return {"status": 200, **page_info, "messages": list(reversed(result))}
+
         return {
             "status": 200,
             "page": page,
@@ -2177,28 +3987,26 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/chat/unread_count', type='json', auth='user', methods=['POST'], csrf=False)
     def unread_count(self, **kwargs):
-        partner = request.env.user.partner_id
-
-        members = request.env['discuss.channel.member'].sudo().search([
-            ('partner_id', '=', partner.id)
-        ])
-
-        total = sum(m.message_unread_counter for m in members)
-
         return {
             "status": 200,
-            "unread_count": total
+            "unread_count": self._get_unread_count(request.env, self._get_mobile_context())
         }
 
+    def _get_unread_count(self, env, mobile_ctx):
+        members = env['discuss.channel.member'].sudo().search([
+            ('partner_id', '=', mobile_ctx.partner.id)
+        ])
+        return sum(m.message_unread_counter for m in members)
+
     @http.route('/mobile/chat/list', type='json', auth='user', methods=['POST'], csrf=False)
     def chat_list(self, **kwargs):
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
 
-        user = request.env.user
-        user_ctx = user.with_context(tz=user.tz)
+        mobile_ctx = self._get_mobile_context()
+        user_ctx = mobile_ctx.user_ctx
 
-        partner = user.partner_id
+        partner = mobile_ctx.partner
         page = int(data.get('page', 1))
         limit = int(data.get('limit', 20))
 
@@ -2270,13 +4078,13 @@ class MobileApiHome(http.Controller):
 
     @http.route('/mobile/chat/mark_read', type='json', auth='user', methods=['POST'], csrf=False)
     def mark_chat_read(self, **kwargs):
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
         channel_id = data.get("channel_id")
 
         if not channel_id:
             return {"status": 400, "error": "channel_id required"}
 
-        partner = request.env.user.partner_id
+        partner = self._get_mobile_context().partner
 
         member = request.env['discuss.channel.member'].sudo().search([
             ('channel_id', '=', int(channel_id)),
@@ -2312,22 +4120,34 @@ class MobileApiHome(http.Controller):
 
 
 
+    def _get_directory_domain(self, user):
+        return [
+            ("active", "=", True),
+            ("user_id", "!=", user.id)
+        ]
+
+    def _serialize_employees(self, employees):
+        result = []
+        for emp in employees:
+            result.append({
+                "employee_id": emp.id,
+                "name": emp.name,
+                "job_title": emp.job_title or "",
+                "email": emp.work_email or "",
+            })
+        return result
+
     @http.route('/mobile/employees', type='json', auth='user', methods=['POST'], csrf=False)
     def mobile_employees(self, **kwargs):
 
-        data = request.get_json_data() or {}
+        data = self._get_json_data() or {}
 
         page = int(data.get("page", 1))
         limit = int(data.get("limit", 20))
         search = data.get("search", "")
         offset = (page - 1) * limit
 
-        user = request.env.user
-
-        domain = [
-            ("active", "=", True),
-            ("user_id", "!=", user.id)
-        ]
+        domain = self._get_directory_domain(request.env.user)
 
         if search:
             domain += ["|",
@@ -2337,23 +4157,29 @@ class MobileApiHome(http.Controller):
 
         Employee = request.env["hr.employee"].sudo()
 
-        total = Employee.search_count(domain)
+        page_info = None
+        if data.get('cursor') is not None:
+            try:
+                employees, page_info = self._keyset_page(
+                    Employee, domain, 'name', False, data['cursor'], limit,
+                    with_count=self._parse_bool(data.get('with_count')),
+                )
+            except ValueError as e:
+                return {"status": 400, "error": str(e)}
+        else:
+            total = Employee.search_count(domain)
+
+            employees = Employee.search(
+                domain,
+                limit=limit,
+                offset=offset,
+                order="name asc"
+            )
 
-        employees = Employee.search(
-            domain,
-            limit=limit,
-            offset=offset,
-            order="name asc"
-        )
+        result = self._serialize_employees(employees)
 
-        result = []
-        for emp in employees:
-            result.append({
-                "employee_id": emp.id,
-                "name": emp.name,
-                "job_title": emp.job_title or "",
-                "email": emp.work_email or "",
-            })
+        if page_info is not None:
+            return {"status": 200, **page_info, "employees": result}
 
         return {
             "status": 200,
@@ -1,3 +1,18 @@
 # -*- coding: utf-8 -*-
+from . import mobile_sync
+from . import hr_announcement
 from . import hr_attendance
-from . import hr_employee
\ No newline at end of file
+from . import hr_employee
+from . import hr_employee_document
+from . import hr_expense
+from . import hr_leave
+from . import ir_attachment
+from . import ir_http
+from . import mobile_auth_token
+from . import mobile_upload
+from . import project_task
+from . import res_company
+from . import res_country
+from . import res_partner
+from . import res_users
+from . import resource_calendar
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class HrAnnouncement(models.Model):
+    _name = 'hr.announcement'
+    _inherit = ['hr.announcement', 'mobile.sync.mixin']
@@ -1,5 +1,14 @@
-from odoo import models, fields, api
+import os
+import time
+
+from odoo import models, fields, api, tools
 from odoo.exceptions import AccessError
+from odoo.osv import expression
+from odoo.tools import config
+
+# /mobile/snapshot files not served for this long are removed; a snapshot is
+# never served again once its key changed
+SNAPSHOT_RETENTION_DAYS = 7
 
 
 class HrEmployee(models.Model):
@@ -9,6 +18,67 @@ class HrEmployee(models.Model):
     office_longitude = fields.Float()
     allowed_radius_m = fields.Integer(default=100)
 
+    # Fields whose change must drop the cached mobile context of the user
+    _MOBILE_CONTEXT_FIELDS = {
+        'user_id', 'active', 'company_id', 'resource_calendar_id',
+        'department_id', 'job_id',
+    }
+
+    @api.model
+    @tools.ormcache('user_id', 'version')
+    def _get_mobile_context_ids(self, user_id, version):
+        """ Return the ids the mobile API resolves for a user on every call:
+        (employee, partner, tz, resource calendar, department, job).
+        Cached per worker under the ``mobile_context_version`` of the user,
+        which is bumped when one of the source fields changes. """
+        user = self.env['res.users'].sudo().browse(user_id)
+        employee = self.sudo().search_fetch(
+            [('user_id', '=', user_id)],
+            ['company_id', 'resource_calendar_id', 'department_id', 'job_id'],
+            limit=1,
+        )
+        calendar = employee.resource_calendar_id or employee.company_id.resource_calendar_id
+        return (
+            employee.id,
+            user.partner_id.id,
+            user.tz or 'UTC',
+            calendar.id,
+            employee.department_id.id,
+            employee.job_id.id,
+        )
+
+    @api.model
+    @tools.ormcache('employee_id', 'stamp', 'date', 'self.env.lang')
+    def _mobile_leave_balances(self, employee_id, stamp, date):
+        """ Allocated, taken and remaining days of every leave type for the
+        employee on ``date``, computed for all types at once. Cached per
+        worker under ``stamp``, which changes with the employee's leaves and
+        allocations, so no invalidation is needed. """
+        employee = self.sudo().browse(employee_id)
+        leave_types = self.env['hr.leave.type'].sudo().with_context(employee_id=employee_id).search([])
+        allocation_data = leave_types.get_allocation_data(employee, date).get(employee, [])
+        balances = {type_id: data for _name, data, _requires, type_id in allocation_data}
+        return tuple(
+            {
+                "id": leave_type.id,
+                "name": leave_type.name,
+                "requires_allocation": leave_type.requires_allocation,
+                "request_unit": leave_type.request_unit,
+                **{
+                    key: balances.get(leave_type.id, {}).get(key, 0)
+                    for key in ('max_leaves', 'leaves_taken', 'leaves_requested',
+                                'remaining_leaves', 'virtual_remaining_leaves')
+                },
+            }
+            for leave_type in leave_types
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        employees.sudo().user_id._mobile_invalidate_context()
+        return employees
+
     def write(self, vals):
         restricted_fields = {'office_latitude', 'office_longitude', 'allowed_radius_m'}
 
@@ -18,4 +88,43 @@ class HrEmployee(models.Model):
                     "You are not allowed to modify office attendance location."
                 )
 
-        return super().write(vals)
\ No newline at end of file
+        if not self._MOBILE_CONTEXT_FIELDS.intersection(vals.keys()):
+            return super().write(vals)
+        users = self.sudo().user_id
+        res = super().write(vals)
+        (users | self.sudo().user_id)._mobile_invalidate_context()
+        return res
+
+    def unlink(self):
+        users = self.sudo().user_id
+        res = super().unlink()
+        users._mobile_invalidate_context()
+        return res
+
+    @api.model
+    def _mobile_invalidate_context(self, domain):
+        """ Drop the cached mobile context of the users of the employees
+        matching ``domain``. """
+        self.sudo().with_context(active_test=False).search(
+            expression.AND([domain, [('user_id', '!=', False)]])
+        ).user_id._mobile_invalidate_context()
+
+    @api.model
+    def _mobile_snapshot_dir(self):
+        """ Directory of the /mobile/snapshot files of the database. """
+        return os.path.join(config['data_dir'], 'mobile_snapshots', self.env.cr.dbname)
+
+    @api.autovacuum
+    def _gc_mobile_snapshots(self):
+        """ Remove the snapshots not served for a while, which includes the
+        superseded ones, and the leftovers of interrupted builds. """
+        directory = self._mobile_snapshot_dir()
+        if not os.path.isdir(directory):
+            return
+        limit = time.time() - SNAPSHOT_RETENTION_DAYS * 24 * 3600
+        for entry in os.scandir(directory):
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class HrEmployeeDocument(models.Model):
+    _name = 'hr.employee.document'
+    _inherit = ['hr.employee.document', 'mobile.sync.mixin']
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class HrExpense(models.Model):
+    _name = 'hr.expense'
+    _inherit = ['hr.expense', 'mobile.sync.mixin']
+
+    mobile_client_id = fields.Char(
+        copy=False, readonly=True,
+        help="Identifier given by the mobile app, used to replay offline submissions safely")
+
+    _sql_constraints = [
+        ('mobile_client_id_uniq', 'unique(employee_id, mobile_client_id)',
+         'An expense with this mobile identifier already exists for the employee.'),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+from odoo.tools.sql import create_index
+
+
+class HrLeave(models.Model):
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'mobile.sync.mixin']
+
+    # the description searched by /mobile/leaves/list
+    private_name = fields.Char(index='trigram')
+
+    def init(self):
+        super().init()
+        # /mobile/leaves/list pages by request_date_from within an employee,
+        # or within a state for the unscoped administrator listing
+        create_index(self.env.cr, 'hr_leave_mobile_employee_date_idx', self._table,
+                     ['employee_id', 'request_date_from'])
+        create_index(self.env.cr, 'hr_leave_mobile_state_date_idx', self._table,
+                     ['state', 'request_date_from'])
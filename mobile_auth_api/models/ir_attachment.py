@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools.image import ImageProcess, image_process
+
+_logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+OPTIMIZED_MIMETYPES = ('image/jpeg', 'image/png')
+IMAGE_MAX_RESOLUTION = 2048
+IMAGE_QUALITY = 80
+PREVIEW_SIZE = (256, 256)
+OPTIMIZE_BATCH_SIZE = 20
+# values of a file already in the filestore, dropped by the core create
+BLOB_FIELDS = ('store_fname', 'checksum', 'file_size')
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    mobile_optimization_state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Optimized'),
+        ('failed', 'Failed'),
+    ], index='btree_not_null', copy=False)
+    mobile_original_checksum = fields.Char(
+        index='btree_not_null', copy=False,
+        help="Checksum of the file as uploaded, before its optimization")
+    mobile_preview = fields.Binary(attachment=False, copy=False)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """ With the ``mobile_blob`` context key, attach the files given by
+        their ``store_fname``/``checksum``/``file_size`` (as returned by
+        ``_mobile_store_stream`` or ``_mobile_blob_values``), which the core
+        create discards. """
+        if not self.env.context.get('mobile_blob'):
+            return super().create(vals_list)
+        vals_list = [dict(vals) for vals in vals_list]
+        blobs = [
+            {fname: vals.pop(fname) for fname in BLOB_FIELDS if fname in vals}
+            for vals in vals_list
+        ]
+        attachments = super().create(vals_list)
+        for attachment, blob in zip(attachments, blobs):
+            if blob.get('store_fname'):
+                attachment._mobile_set_blob(blob)
+        return attachments
+
+    def _mobile_set_blob(self, blob):
+        """ Point this attachment to a file of the filestore. """
+        self.ensure_one()
+        # a pending write of these fields would overwrite the UPDATE when flushed
+        self.flush_recordset(list(BLOB_FIELDS) + ['db_datas'])
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL "
+            "WHERE id = %s",
+            (blob['store_fname'], blob['checksum'], blob['file_size'], self.id),
+        )
+        self.invalidate_recordset(list(BLOB_FIELDS) + ['db_datas', 'raw', 'datas'])
+
+    @api.model
+    def _mobile_store_stream(self, fileobj, max_size):
+        """
+        Store an uploaded file without loading nor base64-encoding it.
+
+        The file is copied by chunks into a temporary file of the filestore
+        while its sha1 is computed, then moved to its content-addressed
+        location. Returns the values to create the attachment with (instead of
+        ``datas``/``raw``), with the ``mobile_blob`` context key. Raises ValueError as soon as more than
+        ``max_size`` bytes have been read.
+        """
+        if self._storage() != 'file':
+            # database storage needs the content in memory anyway
+            data = fileobj.read(max_size + 1)
+            if len(data) > max_size:
+                raise ValueError("File too large")
+            return {'raw': data}
+
+        sha = hashlib.sha1()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._filestore(), suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in iter(lambda: fileobj.read(UPLOAD_CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ValueError("File too large")
+                    sha.update(chunk)
+                    tmp_file.write(chunk)
+
+            checksum = sha.hexdigest()
+            fname = f"{checksum[:2]}/{checksum}"
+            full_path = self._full_path(fname)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if not os.path.exists(full_path):
+                os.replace(tmp_path, full_path)
+                # garbage collected if the transaction rolls back
+                self._mark_for_gc(fname)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        return {
+            'store_fname': fname,
+            'checksum': checksum,
+            'file_size': size,
+        }
+
+    @api.model
+    def _mobile_find_employee_blob(self, checksum, employee):
+        """ Most recent file with ``checksum`` already attached to an expense or
+        a document of ``employee``, if any. """
+        if not checksum:
+            return self.browse()
+        expenses = self.env['hr.expense'].sudo()._search([('employee_id', '=', employee.id)])
+        documents = self.env['hr.employee.document'].sudo()._search([('employee_id', '=', employee.id)])
+        return self.sudo().search([
+            '|', ('checksum', '=', checksum), ('mobile_original_checksum', '=', checksum),
+            '|',
+            '&', ('res_model', '=', 'hr.expense'), ('res_id', 'in', expenses),
+            '&', ('res_model', '=', 'hr.employee.document'), ('res_id', 'in', documents),
+        ], order='id desc', limit=1)
+
+    def _mobile_blob_values(self):
+        """ Values sharing the stored file of this attachment with a new one. """
+        self.ensure_one()
+        return {
+            'store_fname': self.store_fname,
+            'checksum': self.checksum,
+            'file_size': self.file_size,
+            'mobile_original_checksum': self.mobile_original_checksum,
+            'mobile_optimization_state': self.mobile_optimization_state,
+            'mobile_preview': self.mobile_preview,
+        }
+
+    def _mobile_queue_optimization(self):
+        """ Queue the images among these attachments for optimization by the
+        cron, triggered right away so it runs as soon as a cron worker is free. """
+        images = self.filtered(lambda attachment: (
+            attachment.mimetype in OPTIMIZED_MIMETYPES and not attachment.mobile_optimization_state
+        ))
+        if images:
+            images.sudo().mobile_optimization_state = 'pending'
+            self.env.ref('mobile_auth_api.ir_cron_mobile_optimize_images')._trigger()
+
+    @api.model
+    def _mobile_optimize_images(self):
+        """ Cron: optimize the queued images by batches, each committed. """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        max_resolution = int(get_param('mobile_auth_api.image_max_resolution', IMAGE_MAX_RESOLUTION))
+        quality = int(get_param('mobile_auth_api.image_quality', IMAGE_QUALITY))
+
+        domain = [('mobile_optimization_state', '=', 'pending')]
+        attachments = self.sudo().search(domain, limit=OPTIMIZE_BATCH_SIZE)
+        for attachment in attachments:
+            try:
+                attachment._mobile_optimize_image(max_resolution, quality)
+            except (OSError, ValueError, UserError):
+                _logger.warning("Could not optimize attachment %s", attachment.id, exc_info=True)
+                attachment.mobile_optimization_state = 'failed'
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        self.env['ir.cron']._notify_progress(
+            done=len(attachments), remaining=self.sudo().search_count(domain))
+
+    def _mobile_optimize_image(self, max_resolution, quality):
+        """
+        Downsample the image to ``max_resolution`` pixels on its longest side,
+        re-encode it (progressive JPEG, optimized PNG) and store a preview.
+        The file is only replaced when the result is smaller; the original
+        checksum is kept so that uploading the same photo again is recognized.
+        """
+        self.ensure_one()
+        data = self.raw
+        image = ImageProcess(data)
+        if not image.image:
+            raise ValueError("Not an image")
+        if max(image.image.size) > max_resolution:
+            image.resize(max_resolution, max_resolution)
+
+        img = image.image
+        stream = io.BytesIO()
+        if self.mimetype == 'image/jpeg':
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(stream, 'JPEG', quality=quality, optimize=True, progressive=True)
+        else:
+            img.save(stream, 'PNG', optimize=True)
+        optimized = stream.getvalue()
+
+        values = {
+            'mobile_optimization_state': 'done',
+            'mobile_preview': base64.b64encode(image_process(optimized, size=PREVIEW_SIZE, quality=quality)),
+        }
+        if len(optimized) < len(data):
+            values.update({
+                'raw': optimized,
+                'mobile_original_checksum': self.mobile_original_checksum or self.checksum,
+            })
+        self.write(values)
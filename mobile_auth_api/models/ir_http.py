@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+
+import werkzeug.wrappers
+
+from odoo import models
+from odoo.http import request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def samples(self):
+        """ Yield (le, cumulative count) pairs, ending with +Inf. """
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield str(bound), cumulative
+        yield '+Inf', self.count
+
+
+class MobileRouteMetrics:
+    """ In-process metrics of the /mobile routes, aggregated per worker. """
+
+    HISTOGRAMS = [
+        ('mobile_request_duration_seconds', 'Wall time of the request', LATENCY_BUCKETS),
+        ('mobile_request_sql_queries', 'SQL queries executed by the request', QUERY_COUNT_BUCKETS),
+        ('mobile_request_sql_seconds', 'Time spent in SQL queries', LATENCY_BUCKETS),
+        ('mobile_response_bytes', 'Size of the response body', PAYLOAD_BUCKETS),
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._statuses = {}
+
+    def observe(self, route, status, duration, query_count, query_time, size):
+        with self._lock:
+            histograms = self._routes.get(route)
+            if histograms is None:
+                histograms = self._routes[route] = [
+                    _Histogram(buckets) for _name, _help, buckets in self.HISTOGRAMS
+                ]
+            for histogram, value in zip(histograms, (duration, query_count, query_time, size)):
+                histogram.observe(value)
+            key = (route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def to_prometheus(self):
+        """ Render the collected metrics in the Prometheus text format. """
+        worker = os.getpid()
+        lines = []
+        with self._lock:
+            for index, (name, help_text, _buckets) in enumerate(self.HISTOGRAMS):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for route, histograms in sorted(self._routes.items()):
+                    histogram = histograms[index]
+                    labels = f'route="{route}",worker="{worker}"'
+                    for le, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            lines.append('# HELP mobile_requests_total Requests served by route and HTTP status')
+            lines.append('# TYPE mobile_requests_total counter')
+            for (route, status), count in sorted(self._statuses.items()):
+                lines.append(
+                    f'mobile_requests_total{{route="{route}",status="{status}",worker="{worker}"}} {count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+MOBILE_METRICS = MobileRouteMetrics()
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _auth_method_user(cls):
+        # stateless mobile clients authenticate with a signed access token
+        # instead of a session cookie, see mobile.auth.token
+        uid = cls._mobile_bearer_uid()
+        if uid:
+            request.update_env(user=uid)
+            return
+        super()._auth_method_user()
+
+    @classmethod
+    def _mobile_bearer_uid(cls):
+        if not request.httprequest.path.startswith('/mobile/'):
+            return None
+        authorization = request.httprequest.headers.get('Authorization', '')
+        scheme, _sep, token = authorization.partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return None
+        return request.env['mobile.auth.token']._verify_access_token(token.strip())
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        super()._pre_dispatch(rule, args)
+        if rule.rule.startswith('/mobile/'):
+            request._mobile_route = rule.rule
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        cls._mobile_set_etag(response)
+        cls._mobile_record_metrics(response)
+
+    @classmethod
+    def _handle_error(cls, exception):
+        response = super()._handle_error(exception)
+        cls._mobile_record_metrics(response)
+        return response
+
+    @classmethod
+    def _mobile_set_etag(cls, response):
+        """ Publish the ETag computed by the ``mobile_etag`` route decorator and
+        turn JSON-RPC "not modified" results into an empty 304. """
+        etag = getattr(request, '_mobile_etag', None)
+        if not etag or not isinstance(response, werkzeug.wrappers.Response):
+            return
+        if getattr(request, '_mobile_not_modified', False):
+            response.status_code = 304
+            response.set_data(b'')
+            response.headers.pop('Content-Type', None)
+        response.set_etag(etag)
+        # always revalidate, the payload is user specific
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+
+    @classmethod
+    def _mobile_record_metrics(cls, response):
+        route = getattr(request, '_mobile_route', None)
+        if not route:
+            return
+        # The counters are reset by odoo.http at the start of every request
+        current_thread = threading.current_thread()
+        started_at = getattr(current_thread, 'perf_t0', None)
+        duration = time.time() - started_at if started_at else 0.0
+        # error handlers may return a werkzeug HTTPException instead of a response
+        size = 0
+        if isinstance(response, werkzeug.wrappers.Response):
+            status = response.status_code
+            if not response.direct_passthrough:
+                size = response.calculate_content_length() or 0
+        else:
+            status = getattr(response, 'code', None) or 500
+        MOBILE_METRICS.observe(
+            route,
+            status,
+            duration,
+            getattr(current_thread, 'query_count', 0),
+            getattr(current_thread, 'query_time', 0.0),
+            size,
+        )
+        request._mobile_route = None
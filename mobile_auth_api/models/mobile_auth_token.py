@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+ACCESS_TOKEN_TTL = 15 * 60  # seconds
+REFRESH_TOKEN_DAYS = 30
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class MobileAuthToken(models.Model):
+    """
+    Refresh tokens of the stateless mobile authentication.
+
+    Access tokens are signed with the database secret and never stored: they
+    are checked without reading the session store, the database only tells
+    whether the user is still active. Refresh tokens are long-lived, stored
+    hashed, rotated on every use and revoked by deleting their record, which
+    happens to all the tokens of a user whose password changes.
+    """
+    _name = 'mobile.auth.token'
+    _description = 'Mobile Refresh Token'
+
+    user_id = fields.Many2one('res.users', required=True, index=True, ondelete='cascade')
+    token_hash = fields.Char(required=True, index=True)
+    device = fields.Char()
+    expiration = fields.Datetime(required=True)
+
+    _sql_constraints = [
+        ('token_hash_uniq', 'unique(token_hash)', 'The refresh token must be unique.'),
+    ]
+
+    @api.model
+    @tools.ormcache()
+    def _get_token_secret(self):
+        return self.env['ir.config_parameter'].sudo().get_param('database.secret').encode()
+
+    @api.model
+    def _hash_token(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @api.model
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._get_token_secret(), payload.encode(), hashlib.sha256).digest())
+
+    @api.model
+    def _generate_access_token(self, user_id, ttl):
+        payload = _b64encode(json.dumps({
+            'db': self.env.cr.dbname,
+            'uid': user_id,
+            'exp': int(time.time()) + ttl,
+        }).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    @api.model
+    def _verify_access_token(self, token):
+        """ Return the user id of a valid, unexpired access token of an active
+        user, else None. """
+        payload, _sep, signature = token.partition('.')
+        # compared as bytes: compare_digest rejects non-ASCII strings
+        if not signature or not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+        if not isinstance(claims, dict) or not isinstance(claims.get('uid'), int):
+            return None
+        if claims.get('db') != self.env.cr.dbname or claims.get('exp', 0) < time.time():
+            return None
+        # the only query: an archived user loses access before the token expires
+        if not self.env['res.users'].sudo().search_count([('id', '=', claims['uid'])], limit=1):
+            return None
+        return claims['uid']
+
+    @api.model
+    def _issue_tokens(self, user, device=None):
+        """ Create a refresh token for ``user`` and return it with a new access token. """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        ttl = int(get_param('mobile_auth_api.access_token_ttl', ACCESS_TOKEN_TTL))
+        refresh_days = int(get_param('mobile_auth_api.refresh_token_days', REFRESH_TOKEN_DAYS))
+
+        refresh_token = secrets.token_urlsafe(32)
+        self.sudo().create({
+            'user_id': user.id,
+            'token_hash': self._hash_token(refresh_token),
+            'device': device,
+            'expiration': fields.Datetime.now() + timedelta(days=refresh_days),
+        })
+        return {
+            'token_type': 'Bearer',
+            'access_token': self._generate_access_token(user.id, ttl),
+            'expires_in': ttl,
+            'refresh_token': refresh_token,
+        }
+
+    @api.model
+    def _find_refresh_token(self, refresh_token):
+        return self.sudo().search([
+            ('token_hash', '=', self._hash_token(refresh_token or '')),
+            ('expiration', '>', fields.Datetime.now()),
+            ('user_id.active', '=', True),
+        ], limit=1)
+
+    @api.model
+    def _refresh(self, refresh_token):
+        """ Rotate a refresh token: return a new token pair, or None when the
+        token is unknown, expired or its user is archived. """
+        token = self._find_refresh_token(refresh_token)
+        if not token:
+            return None
+        user, device = token.user_id, token.device
+        token.unlink()
+        return self._issue_tokens(user, device)
+
+    @api.model
+    def _revoke(self, refresh_token):
+        """ Revoke a refresh token of the current user. """
+        self.sudo().search([
+            ('token_hash', '=', self._hash_token(refresh_token or '')),
+            ('user_id', '=', self.env.uid),
+        ]).unlink()
+
+    @api.autovacuum
+    def _gc_expired_tokens(self):
+        self.sudo().search([('expiration', '<', fields.Datetime.now())]).unlink()
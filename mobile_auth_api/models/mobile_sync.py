@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+# Days a deletion is kept for /mobile/sync; clients whose watermark is older
+# have to resynchronize from scratch.
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+class MobileSyncTombstone(models.Model):
+    _name = 'mobile.sync.tombstone'
+    _description = 'Deleted record reported by the mobile delta sync'
+    _order = 'id'
+
+    res_model = fields.Char(required=True, index=True)
+    res_id = fields.Integer(required=True)
+    # who could see the deleted record, to only report it to them
+    employee_id = fields.Many2one('hr.employee', index='btree_not_null', ondelete='cascade')
+    user_ids = fields.Many2many('res.users')
+    company_id = fields.Many2one('res.company', ondelete='cascade')
+
+    @api.model
+    def _get_retention_days(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'mobile_auth_api.tombstone_retention_days', TOMBSTONE_RETENTION_DAYS))
+
+    @api.autovacuum
+    def _gc_tombstones(self):
+        limit_date = fields.Datetime.now() - timedelta(days=self._get_retention_days())
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
+
+
+class MobileSyncMixin(models.AbstractModel):
+    """ Models synchronized by /mobile/sync: their deletions are recorded as
+    tombstones and (write_date, id) is indexed for the watermark range scans. """
+    _name = 'mobile.sync.mixin'
+    _description = 'Mobile Delta Sync Mixin'
+
+    def init(self):
+        super().init()
+        if not self._abstract:
+            create_index(self.env.cr, f'{self._table}_mobile_sync_idx', self._table, ['write_date', 'id'])
+
+    def unlink(self):
+        if self:
+            self.env['mobile.sync.tombstone'].sudo().create([
+                record._mobile_tombstone_values() for record in self.sudo()
+            ])
+        return super().unlink()
+
+    def _mobile_tombstone_values(self):
+        """ Values of the tombstone of this record, scoped like the record. """
+        values = {'res_model': self._name, 'res_id': self.id}
+        if 'employee_id' in self._fields:
+            values['employee_id'] = self.employee_id.id
+        if 'user_ids' in self._fields:
+            values['user_ids'] = [(6, 0, self.user_ids.ids)]
+        if 'company_id' in self._fields:
+            values['company_id'] = self.company_id.id
+        return values
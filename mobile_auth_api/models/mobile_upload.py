@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import secrets
+import shutil
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import config
+
+# Unfinished uploads are dropped after this long
+UPLOAD_SESSION_HOURS = 24
+
+
+class _PartsReader:
+    """ File-like object reading the parts of an upload one after the other. """
+
+    def __init__(self, paths):
+        self._paths = iter(paths)
+        self._current = None
+
+    def read(self, size=-1):
+        """ Read ``size`` bytes, or until the end of the last part when negative. """
+        chunks = []
+        while size < 0 or size > 0:
+            if self._current is None:
+                path = next(self._paths, None)
+                if path is None:
+                    break
+                self._current = open(path, 'rb')
+            data = self._current.read(size)
+            if not data:
+                self._current.close()
+                self._current = None
+                continue
+            chunks.append(data)
+            if size > 0:
+                size -= len(data)
+        return b''.join(chunks)
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+class MobileUploadSession(models.Model):
+    """
+    Resumable upload of a large file by the mobile app.
+
+    The chunks are written as separate part files in the data directory,
+    without touching the database, so a retry only resends the missing ones.
+    Completing the upload streams the parts into an attachment.
+    """
+    _name = 'mobile.upload.session'
+    _description = 'Mobile Chunked Upload'
+
+    token = fields.Char(required=True, index=True, default=lambda self: secrets.token_urlsafe(24))
+    user_id = fields.Many2one('res.users', required=True, ondelete='cascade')
+    file_name = fields.Char(required=True)
+    mimetype = fields.Char(required=True)
+    total_size = fields.Integer(required=True)
+    chunk_size = fields.Integer(required=True)
+    checksum = fields.Char(help="Expected sha1 of the whole file, checked on completion")
+    target = fields.Selection([
+        ('document', 'Employee Document'),
+        ('expense', 'Expense'),
+    ], required=True)
+    target_values = fields.Json(help="Values of the document to create, or the id of the expense")
+
+    _sql_constraints = [
+        ('token_uniq', 'unique(token)', 'The upload token must be unique.'),
+    ]
+
+    def _get_chunk_count(self):
+        return max((self.total_size + self.chunk_size - 1) // self.chunk_size, 1)
+
+    def _get_parts_dir(self):
+        return os.path.join(config['data_dir'], 'mobile_uploads', self.env.cr.dbname, self.token)
+
+    def _get_part_path(self, index):
+        return os.path.join(self._get_parts_dir(), f'{index}.part')
+
+    def _get_expected_chunk_size(self, index):
+        if index < self._get_chunk_count() - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self._get_chunk_count() - 1)
+
+    def _get_missing_chunks(self):
+        return [
+            index for index in range(self._get_chunk_count())
+            if not os.path.exists(self._get_part_path(index))
+        ]
+
+    def _write_chunk(self, index, stream, checksum=None):
+        """ Store chunk ``index`` read from ``stream``. Raises ValueError when its
+        size or its sha1 do not match; the part is only kept when complete. """
+        expected_size = self._get_expected_chunk_size(index)
+        os.makedirs(self._get_parts_dir(), exist_ok=True)
+        part_path = self._get_part_path(index)
+        tmp_path = f'{part_path}.{secrets.token_hex(4)}.tmp'
+        sha = hashlib.sha1()
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as part:
+                for data in iter(lambda: stream.read(64 * 1024), b''):
+                    size += len(data)
+                    if size > expected_size:
+                        raise ValueError("Chunk larger than expected")
+                    sha.update(data)
+                    part.write(data)
+            if size != expected_size:
+                raise ValueError(f"Chunk {index} must be {expected_size} bytes, got {size}")
+            if checksum and checksum.lower() != sha.hexdigest():
+                raise ValueError(f"Checksum mismatch for chunk {index}")
+            os.replace(tmp_path, part_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _assemble(self):
+        """ Stream the parts into the filestore, return the attachment values. """
+        reader = _PartsReader([self._get_part_path(index) for index in range(self._get_chunk_count())])
+        try:
+            values = self.env['ir.attachment']._mobile_store_stream(reader, self.total_size)
+        finally:
+            reader.close()
+        checksum = values.get('checksum') or hashlib.sha1(values.get('raw', b'')).hexdigest()
+        if self.checksum and self.checksum.lower() != checksum:
+            raise ValueError("Checksum mismatch for the assembled file")
+        return values
+
+    def unlink(self):
+        parts_dirs = [upload._get_parts_dir() for upload in self]
+
+        # a rolled back completion keeps the chunks to retry with
+        @self.env.cr.postcommit.add
+        def remove_parts():
+            for parts_dir in parts_dirs:
+                shutil.rmtree(parts_dir, ignore_errors=True)
+
+        return super().unlink()
+
+    @api.autovacuum
+    def _gc_upload_sessions(self):
+        limit_date = fields.Datetime.now() - timedelta(hours=UPLOAD_SESSION_HOURS)
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
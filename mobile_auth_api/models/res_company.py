@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'resource_calendar_id' in vals:
+            # the default calendar of the employees is in their mobile context
+            self.env['hr.employee']._mobile_invalidate_context([('company_id', 'in', self.ids)])
+        return res
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+
+from odoo import api, models, tools
+
+
+def _encode_payload(payload, lang):
+    """ Encode a response once and return it with its ETag, which includes
+    the language of the translated names. """
+    data = json.dumps(payload, ensure_ascii=False).encode()
+    return data, f"{lang or 'en_US'}-{hashlib.sha1(data).hexdigest()}"
+
+
+class ResCountry(models.Model):
+    _inherit = 'res.country'
+
+    @api.model
+    @tools.ormcache('self.env.lang')
+    def _mobile_countries_payload(self):
+        """ Pre-encoded body of /get-countries and its ETag, cached per worker
+        and language until a country is created, written or deleted. """
+        countries = self.sudo().search_read([], ['name', 'code'])
+        return _encode_payload({"status": 200, "countries": countries}, self.env.lang)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        countries = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return countries
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+
+class ResCountryState(models.Model):
+    _inherit = 'res.country.state'
+
+    @api.model
+    @tools.ormcache('country_code', 'self.env.lang')
+    def _mobile_states_payload(self, country_code):
+        """ Pre-encoded body of /get-states for a country code and its ETag. """
+        states = self.sudo().search_read([('country_id.code', '=', country_code)], ['name', 'code'])
+        return _encode_payload({"status": 200, "states": states}, self.env.lang)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        states = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return states
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'tz' in vals:
+            # the tz of the users is part of their cached mobile context
+            self.sudo().with_context(active_test=False).user_ids._mobile_invalidate_context()
+        return res
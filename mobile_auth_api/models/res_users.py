@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # bumped when the mobile context of the user changes: the cached context
+    # is keyed on it, see hr.employee._get_mobile_context_ids
+    mobile_context_version = fields.Integer(default=0, readonly=True, copy=False, groups='base.group_system')
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'password' in vals or ('active' in vals and not vals['active']):
+            # like the sessions, refresh tokens do not survive a password
+            # change (which also logs out all devices) nor an archiving
+            self.env['mobile.auth.token'].sudo().search([('user_id', 'in', self.ids)]).unlink()
+        if 'partner_id' in vals:
+            # the tz is followed on res.partner
+            self._mobile_invalidate_context()
+        return res
+
+    def _mobile_invalidate_context(self):
+        """ Drop the cached mobile context of these users, in every worker. """
+        if self:
+            self.env.cr.execute(
+                "UPDATE res_users SET mobile_context_version = mobile_context_version + 1 WHERE id IN %s",
+                [tuple(self.ids)],
+            )
+            self.invalidate_recordset(['mobile_context_version'])
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ResourceCalendar(models.Model):
+    _inherit = 'resource.calendar'
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._mobile_invalidate_context()
+        return res
+
+    def unlink(self):
+        self._mobile_invalidate_context()
+        return super().unlink()
+
+    def _mobile_invalidate_context(self):
+        """ Drop the cached mobile context of the employees working with these
+        calendars, their own or the one of their company. """
+        if self:
+            self.env['hr.employee']._mobile_invalidate_context([
+                '|', ('resource_calendar_id', 'in', self.ids),
+                ('company_id.resource_calendar_id', 'in', self.ids),
+            ])
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+PostgreSQL session store for multi-worker deployments.
+
+The default filesystem store keeps one file per session and scans the whole
+directory to expire them. This store keeps the sessions in a table of a
+dedicated database shared by every node: reading a session is a primary key
+lookup and expiry deletes by batches through an index on the last access.
+
+Enable it in the server configuration, the module being server-wide::
+
+    [options]
+    server_wide_modules = base,web,mobile_auth_api
+    mobile_session_store = postgresql
+    mobile_session_db = odoo_sessions
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+
+from odoo import http
+from odoo.sql_db import db_connect
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Sessions read less than this long after their last access are not touched,
+# so that polling clients do not write on every request.
+TOUCH_INTERVAL = timedelta(minutes=1)
+VACUUM_BATCH_SIZE = 1000
+
+
+class PostgresSessionStore(http.FilesystemSessionStore):
+    """ Session store keeping the sessions in the ``mobile_http_session`` table
+    of ``dbname``. Key generation, validation and rotation are inherited. """
+
+    def __init__(self, dbname, session_class=None, renew_missing=True):
+        super().__init__(config.session_dir, session_class=session_class, renew_missing=renew_missing)
+        self.dbname = dbname
+        self._table_checked = False
+
+    def _cursor(self):
+        cr = db_connect(self.dbname).cursor()
+        if not self._table_checked:
+            cr.execute("""
+                CREATE TABLE IF NOT EXISTS mobile_http_session (
+                    sid VARCHAR PRIMARY KEY,
+                    data JSONB NOT NULL,
+                    last_access TIMESTAMP WITHOUT TIME ZONE NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS mobile_http_session_last_access_idx
+                    ON mobile_http_session (last_access);
+            """)
+            self._table_checked = True
+        return cr
+
+    def save(self, session):
+        with self._cursor() as cr:
+            cr.execute("""
+                INSERT INTO mobile_http_session (sid, data, last_access)
+                VALUES (%s, %s, NOW() AT TIME ZONE 'UTC')
+                ON CONFLICT (sid) DO UPDATE
+                SET data = EXCLUDED.data, last_access = EXCLUDED.last_access
+            """, [session.sid, json.dumps(dict(session))])
+
+    def get(self, sid):
+        if not self.is_valid_key(sid):
+            return self.new()
+        with self._cursor() as cr:
+            cr.execute("""
+                WITH touched AS (
+                    UPDATE mobile_http_session
+                    SET last_access = NOW() AT TIME ZONE 'UTC'
+                    WHERE sid = %s AND last_access < NOW() AT TIME ZONE 'UTC' - %s
+                )
+                SELECT data FROM mobile_http_session WHERE sid = %s
+            """, [sid, TOUCH_INTERVAL, sid])
+            row = cr.fetchone()
+        if row is None:
+            if self.renew_missing:
+                return self.new()
+            return self.session_class({}, sid, False)
+        return self.session_class(row[0], sid, False)
+
+    def delete(self, session):
+        with self._cursor() as cr:
+            cr.execute("DELETE FROM mobile_http_session WHERE sid = %s", [session.sid])
+
+    def delete_from_identifiers(self, identifiers):
+        # same guard as the filesystem store: never match on a short prefix
+        identifiers = [identifier for identifier in identifiers if len(identifier) >= 42]
+        if not identifiers:
+            return
+        with self._cursor() as cr:
+            cr.execute(
+                "DELETE FROM mobile_http_session WHERE sid LIKE ANY(%s)",
+                [[f"{identifier}%" for identifier in identifiers]],
+            )
+
+    def list(self):
+        with self._cursor() as cr:
+            cr.execute("SELECT sid FROM mobile_http_session")
+            return [sid for sid, in cr.fetchall()]
+
+    def vacuum(self, max_lifetime=http.SESSION_LIFETIME):
+        """ Delete the sessions not accessed for ``max_lifetime`` seconds, by
+        batches committed separately to keep the locks short. """
+        threshold = datetime.utcnow() - timedelta(seconds=max_lifetime)
+        deleted = 0
+        while True:
+            with self._cursor() as cr:
+                cr.execute("""
+                    DELETE FROM mobile_http_session
+                    WHERE sid IN (
+                        SELECT sid FROM mobile_http_session
+                        WHERE last_access < %s
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                """, [threshold, VACUUM_BATCH_SIZE])
+                count = cr.rowcount
+            deleted += count
+            if count < VACUUM_BATCH_SIZE:
+                break
+        _logger.debug("Vacuumed %s HTTP sessions", deleted)
+
+
+def install_session_store():
+    """ Replace the session store of the HTTP application when the server
+    configuration asks for the PostgreSQL one. """
+    if config.get('mobile_session_store') != 'postgresql':
+        return
+    dbname = config.get('mobile_session_db') or config.get('db_name')
+    if not dbname:
+        _logger.error("mobile_session_store = postgresql requires mobile_session_db, "
+                      "keeping the filesystem session store")
+        return
+    http.root.session_store = PostgresSessionStore(dbname, session_class=http.Session)
+    _logger.info("HTTP sessions stored in PostgreSQL database %s", dbname)
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_mobile_performance
+from . import test_session_store
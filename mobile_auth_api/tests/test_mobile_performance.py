@@ -0,0 +1,1403 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from dateutil.relativedelta import relativedelta
+from PIL import Image
+from werkzeug.exceptions import Forbidden
+
+from odoo import fields
+from odoo.tests import HttpCase, tagged
+from odoo.tests.common import new_test_user
+
+from odoo.addons.mobile_auth_api.controllers.main import (
+    MOBILE_HOME_SECTIONS, MOBILE_HOME_WORKERS, MobileApiHome, _home_slots,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Multiplier applied to the generated dataset, e.g. MOBILE_PERF_SCALE=0.1
+# for a quick local run or MOBILE_PERF_SCALE=5 to mimic a large tenant.
+SCALE = float(os.environ.get('MOBILE_PERF_SCALE', '1'))
+
+PDF_CONTENT = b'%PDF-1.4\n1 0 obj <<>> endobj\ntrailer <<>>\n%%EOF\n'
+
+
+def scaled(count):
+    return max(1, int(count * SCALE))
+
+
+@tagged('post_install', '-at_install', 'mobile_perf')
+class TestMobilePerformance(HttpCase):
+    """
+    Seeded benchmark of the /mobile routes. Every route is called on a
+    realistic dataset and must stay below its SQL query budget; the list
+    routes must also cost the same number of queries whatever the page size.
+    Timings are reported in the log at the end of the run.
+    """
+
+    # Upper bound of SQL queries per call, including the fixed cost of the
+    # HTTP stack (session check, routing, ir.http hooks).
+    QUERY_BUDGETS = {
+        '/get-countries': 15,
+        '/get-states': 15,
+        '/mobile/login': 40,
+        '/mobile/expenses': 60,
+        '/mobile/expenses/list': 40,
+        '/mobile/leaves/list': 40,
+        '/mobile/leaves/types': 30,
+        '/mobile/leaves/create': 120,
+        '/mobile/employee/profile': 50,
+        '/mobile/attendance/logs': 35,
+        '/mobile/attendance/check': 60,
+        '/mobile/payslip/dashboard': 40,
+        '/mobile/payslip/list': 40,
+        '/mobile/payslip/detail': 30,
+        '/mobile/document/list': 30,
+        '/mobile/document/upload': 60,
+        '/mobile/employee/document/download_base64': 30,
+        '/mobile/events/upcoming': 30,
+        '/mobile/announcements/list': 30,
+        '/mobile/tasks': 30,
+        '/mobile/tasks/change_status': 60,
+        '/mobile/tasks/status': 20,
+        '/mobile/calendar': 40,
+        '/mobile/profile': 30,
+        '/mobile/profile/update': 40,
+        '/mobile/chat/channel': 30,
+        '/mobile/chat/message/send': 80,
+        '/mobile/chat/messages': 50,
+        '/mobile/chat/unread_count': 30,
+        '/mobile/chat/list': 40,
+        '/mobile/chat/mark_read': 30,
+        '/mobile/employees': 30,
+        '/mobile/image': 20,
+        '/mobile/batch': 150,
+        '/mobile/home': 60,
+        '/mobile/sync': 80,
+        '/mobile/snapshot': 120,
+        '/mobile/expenses/bulk': 120,
+        '/mobile/expenses/summary': 30,
+        '/mobile/leaves/balances': 40,
+        '/mobile/leaves/preview': 40,
+        '/mobile/team/availability': 40,
+    }
+
+    # Maximum number of extra queries tolerated between a page of 5 and a
+    # page of 50 records on the list routes.
+    PAGE_SIZE_SLACK = 2
+
+    # List routes whose query count still grows with the page size. They are
+    # reported but not asserted until their N+1 is removed.
+    KNOWN_LINEAR_ROUTES = {
+        '/mobile/chat/list',
+    }
+
+    # Routes that write: they are measured on their first call, not warmed up
+    MUTATING_ROUTES = {
+        '/mobile/expenses',
+        '/mobile/expenses/bulk',
+        '/mobile/leaves/create',
+        '/mobile/attendance/check',
+        '/mobile/document/upload',
+        '/mobile/tasks/change_status',
+        '/mobile/profile/update',
+        '/mobile/chat/channel',
+        '/mobile/chat/message/send',
+        '/mobile/chat/mark_read',
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(
+            cls.env.context,
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_notrack=True,
+        ))
+        cls.timings = []
+        cls.today = fields.Date.today()
+
+        cls._create_organisation()
+        cls._create_employees()
+        cls._create_attendances()
+        cls._create_expenses()
+        cls._create_leaves()
+        cls._create_payslips()
+        cls._create_documents()
+        cls._create_chats()
+        cls._create_announcements()
+        cls._create_events()
+        cls._create_tasks()
+
+    @classmethod
+    def tearDownClass(cls):
+        lines = [f"{'route':<50} {'queries':>8} {'time (ms)':>10}"]
+        for route, queries, elapsed in sorted(cls.timings, key=lambda t: -t[2]):
+            lines.append(f"{route:<50} {queries:>8} {elapsed * 1000:>10.1f}")
+        _logger.info("Mobile API benchmark (scale %s):\n%s", SCALE, '\n'.join(lines))
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------
+    # Dataset
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _create_organisation(cls):
+        cls.departments = cls.env['hr.department'].create([
+            {'name': f'Perf Department {i}'} for i in range(scaled(20))
+        ])
+        cls.jobs = cls.env['hr.job'].create([
+            {'name': f'Perf Job {i}'} for i in range(scaled(30))
+        ])
+
+    @classmethod
+    def _create_employees(cls):
+        cls.user = new_test_user(
+            cls.env, login='mobile_perf', groups='base.group_user', tz='Europe/Zurich',
+        )
+        cls.manager = cls.env['hr.employee'].create({
+            'name': 'Perf Manager',
+            'department_id': cls.departments[0].id,
+            'job_id': cls.jobs[0].id,
+        })
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Perf Employee',
+            'user_id': cls.user.id,
+            'department_id': cls.departments[0].id,
+            'job_id': cls.jobs[0].id,
+            'parent_id': cls.manager.id,
+            'office_latitude': 47.3769,
+            'office_longitude': 8.5417,
+            'allowed_radius_m': 200,
+        })
+        cls.employees = cls.env['hr.employee'].create([{
+            'name': f'Perf Colleague {i:05d}',
+            'work_email': f'colleague{i}@example.com',
+            'department_id': cls.departments[i % len(cls.departments)].id,
+            'job_id': cls.jobs[i % len(cls.jobs)].id,
+            'parent_id': cls.manager.id,
+        } for i in range(scaled(2000))])
+
+    @classmethod
+    def _create_attendances(cls):
+        """ A year of working days split by a lunch break. """
+        employees = cls.employee | cls.employees[:scaled(5)]
+        vals_list = []
+        for employee in employees:
+            day = cls.today - timedelta(days=365)
+            while day < cls.today:
+                if day.weekday() < 5:
+                    start = datetime.combine(day, datetime.min.time())
+                    vals_list += [{
+                        'employee_id': employee.id,
+                        'check_in': start + timedelta(hours=7),
+                        'check_out': start + timedelta(hours=11),
+                        'is_break': False,
+                    }, {
+                        'employee_id': employee.id,
+                        'check_in': start + timedelta(hours=11),
+                        'check_out': start + timedelta(hours=11, minutes=30),
+                        'is_break': True,
+                    }, {
+                        'employee_id': employee.id,
+                        'check_in': start + timedelta(hours=11, minutes=30),
+                        'check_out': start + timedelta(hours=16),
+                        'is_break': False,
+                    }]
+                day += timedelta(days=1)
+        cls.env['hr.attendance'].create(vals_list)
+
+    @classmethod
+    def _create_expenses(cls):
+        cls.expense_product = cls.env['product.product'].create({
+            'name': 'Perf Expense Product',
+            'can_be_expensed': True,
+        })
+        expenses = cls.env['hr.expense'].create([{
+            'name': f'Perf Expense {i}',
+            'employee_id': cls.employee.id,
+            'product_id': cls.expense_product.id,
+            'total_amount': 10.0 + i,
+            'date': cls.today - timedelta(days=i % 365),
+            'quantity': 1.0,
+            'payment_mode': 'own_account',
+        } for i in range(scaled(300))])
+        cls.env['ir.attachment'].create([{
+            'name': f'receipt_{expense.id}.pdf',
+            'raw': PDF_CONTENT,
+            'res_model': 'hr.expense',
+            'res_id': expense.id,
+            'mimetype': 'application/pdf',
+        } for expense in expenses])
+
+    @classmethod
+    def _create_leaves(cls):
+        cls.leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Perf Leave',
+            'requires_allocation': 'no',
+            'request_unit': 'day',
+        })
+        Leave = cls.env['hr.leave'].with_context(leave_skip_state_check=True)
+        days = [
+            cls.today - timedelta(days=offset)
+            for offset in range(1, 365)
+            if (cls.today - timedelta(days=offset)).weekday() == 4
+        ]
+        Leave.create([{
+            'name': f'Perf Leave {day}',
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'request_date_from': day,
+            'request_date_to': day,
+        } for day in days])
+        Leave.create([{
+            'name': f'Colleague Leave {employee.id}',
+            'employee_id': employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'request_date_from': days[index % len(days)],
+            'request_date_to': days[index % len(days)],
+        } for index, employee in enumerate(cls.employees[:scaled(300)])])
+
+    @classmethod
+    def _create_payslips(cls):
+        contract = cls.env['hr.contract'].create({
+            'name': 'Perf Contract',
+            'employee_id': cls.employee.id,
+            'wage': 5000.0,
+            'date_start': cls.today - relativedelta(years=1, months=1),
+            'state': 'open',
+        })
+        month_start = cls.today.replace(day=1)
+        cls.payslips = cls.env['hr.payslip'].create([{
+            'name': f'Perf Payslip {month}',
+            'employee_id': cls.employee.id,
+            'contract_id': contract.id,
+            'date_from': month_start - relativedelta(months=month),
+            'date_to': month_start - relativedelta(months=month - 1, days=1),
+        } for month in range(12, -2, -1)])
+        cls.payslips.compute_sheet()
+
+    @classmethod
+    def _create_documents(cls):
+        checklist = cls.env['employee.checklist'].create({
+            'name': 'Perf Passport',
+            'document_type': 'entry',
+        })
+        cls.checklist = checklist
+        cls.documents = cls.env['hr.employee.document'].create([{
+            'name': f'P{i:06d}',
+            'document_id': checklist.id,
+            'employee_id': cls.employee.id,
+            'issue_date': cls.today - timedelta(days=i),
+            'expiry_date': cls.today + timedelta(days=365 - i),
+        } for i in range(scaled(50))])
+        attachments = cls.env['ir.attachment'].create([{
+            'name': f'{document.name}.pdf',
+            'raw': PDF_CONTENT,
+            'res_model': 'hr.employee.document',
+            'res_id': document.id,
+            'mimetype': 'application/pdf',
+        } for document in cls.documents])
+        for document, attachment in zip(cls.documents, attachments):
+            document.doc_attachment_ids = [(6, 0, attachment.ids)]
+
+    @classmethod
+    def _create_chats(cls):
+        partners = cls.env['res.partner'].create([
+            {'name': f'Perf Chat Partner {i}'} for i in range(scaled(60))
+        ])
+        cls.chat_partner_user = new_test_user(
+            cls.env, login='mobile_perf_peer', groups='base.group_user',
+        )
+        channels = cls.env['discuss.channel'].create([{
+            'channel_type': 'chat',
+            'channel_partner_ids': [(4, cls.user.partner_id.id), (4, partner.id)],
+        } for partner in partners])
+        cls.channel = channels[0]
+        messages = []
+        for channel, partner in zip(channels, partners):
+            messages += [{
+                'model': 'discuss.channel',
+                'res_id': channel.id,
+                'body': f'Message {i} from {partner.name}',
+                'author_id': partner.id if i % 2 else cls.user.partner_id.id,
+                'message_type': 'comment',
+            } for i in range(scaled(40))]
+        cls.env['mail.message'].create(messages)
+
+    @classmethod
+    def _create_announcements(cls):
+        Announcement = cls.env['hr.announcement']
+        for i in range(scaled(150)):
+            vals = {
+                'announcement_reason': f'Perf Announcement {i}',
+                'announcement': f'<p>Body {i}</p>',
+                'state': 'approved',
+                'date_start': cls.today - timedelta(days=i),
+                'date_end': cls.today + timedelta(days=30),
+                'is_announcement': i % 3 == 0,
+            }
+            if i % 3 == 1:
+                vals['department_ids'] = [(6, 0, cls.departments[i % len(cls.departments)].ids)]
+            elif i % 3 == 2:
+                vals['position_ids'] = [(6, 0, cls.jobs[i % len(cls.jobs)].ids)]
+            Announcement.create(vals)
+
+    @classmethod
+    def _create_events(cls):
+        now = fields.Datetime.now()
+        cls.env['event.event'].create([{
+            'name': f'Perf Event {i}',
+            'date_begin': now + timedelta(days=i + 1),
+            'date_end': now + timedelta(days=i + 1, hours=3),
+        } for i in range(scaled(60))])
+
+    @classmethod
+    def _create_tasks(cls):
+        project = cls.env['project.project'].create({'name': 'Perf Project'})
+        cls.stages = cls.env['project.task.type'].create([
+            {'name': name, 'sequence': sequence, 'project_ids': [(4, project.id)]}
+            for sequence, name in enumerate(['To Do', 'In Progress', 'Done'])
+        ])
+        cls.tasks = cls.env['project.task'].create([{
+            'name': f'Perf Task {i}',
+            'project_id': project.id,
+            'stage_id': cls.stages[i % len(cls.stages)].id,
+            'user_ids': [(6, 0, cls.user.ids)],
+            'date_deadline': cls.today + timedelta(days=i % 90),
+        } for i in range(scaled(300))])
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _measure(self, route, call):
+        start_count = self.cr.sql_log_count
+        start = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start
+        queries = self.cr.sql_log_count - start_count
+        self.timings.append((route, queries, elapsed))
+        return result, queries
+
+    def _json_call(self, route, params=None, query=None):
+        params = params or {}
+        # Most routes read their arguments from the raw JSON body and some
+        # from the JSON-RPC params: send them in both places like the app.
+        payload = dict(params, jsonrpc='2.0', method='call', params=params)
+        url = route + ('?' + urlencode(query) if query else '')
+        response = self.url_open(
+            url,
+            data=json.dumps(payload),
+            headers={'Content-Type': 'application/json'},
+            timeout=60,
+        )
+        self.assertEqual(response.status_code, 200, route)
+        body = response.json()
+        self.assertNotIn('error', body, route)
+        return body.get('result')
+
+    def _http_call(self, route, data=None, files=None):
+        response = self.url_open(route, data=data, files=files, timeout=60)
+        self.assertEqual(response.status_code, 200, route)
+        return response
+
+    def _route_calls(self):
+        """ One representative call per route of controllers/main.py. """
+        next_monday = self.today + timedelta(days=14 - self.today.weekday())
+        return [
+            ('/get-countries', lambda: self._http_call('/get-countries')),
+            ('/get-states', lambda: self.url_open(
+                '/get-states', data=json.dumps({'country_code': 'CH'}),
+                headers={'Content-Type': 'application/json'})),
+            ('/mobile/expenses/list', lambda: self._json_call(
+                '/mobile/expenses/list', {'page': 2, 'limit': 20})),
+            ('/mobile/expenses/summary', lambda: self._json_call('/mobile/expenses/summary', {
+                'date_from': str(self.today.replace(day=1)),
+            })),
+            ('/mobile/expenses', lambda: self._http_call('/mobile/expenses', data={
+                'reason': 'Perf taxi', 'date': str(self.today), 'amount': '42',
+                'product_id': self.expense_product.id,
+            }, files={'attachment': ('receipt.pdf', PDF_CONTENT, 'application/pdf')})),
+            ('/mobile/leaves/list', lambda: self._json_call(
+                '/mobile/leaves/list', {'page': 2, 'limit': 20})),
+            ('/mobile/leaves/types', lambda: self.url_open('/mobile/leaves/types')),
+            ('/mobile/leaves/balances', lambda: self._json_call('/mobile/leaves/balances')),
+            ('/mobile/team/availability', lambda: self._json_call('/mobile/team/availability')),
+            ('/mobile/leaves/preview', lambda: self._json_call('/mobile/leaves/preview', {
+                'leave_type_id': self.leave_type.id,
+                'date_from': str(next_monday),
+                'date_to': str(next_monday + timedelta(days=6)),
+            })),
+            ('/mobile/leaves/create', lambda: self._json_call('/mobile/leaves/create', {
+                'leave_type_id': self.leave_type.id,
+                'date_from': str(next_monday),
+                'date_to': str(next_monday + timedelta(days=1)),
+                'reason': 'Perf holiday',
+            })),
+            ('/mobile/employee/profile', lambda: self._json_call('/mobile/employee/profile')),
+            ('/mobile/attendance/logs', lambda: self._json_call('/mobile/attendance/logs')),
+            ('/mobile/attendance/check', lambda: self._json_call('/mobile/attendance/check', {
+                'action': 'check_in', 'latitude': 47.3769, 'longitude': 8.5417,
+            })),
+            ('/mobile/payslip/dashboard', lambda: self._json_call('/mobile/payslip/dashboard')),
+            ('/mobile/payslip/list', lambda: self._json_call(
+                '/mobile/payslip/list', query={'page': 1, 'limit': 10})),
+            ('/mobile/payslip/detail', lambda: self._json_call(
+                '/mobile/payslip/detail', {'payslip_id': self.payslips[0].id})),
+            ('/mobile/document/list', lambda: self._json_call(
+                '/mobile/document/list', {'page': 1, 'limit': 20})),
+            ('/mobile/document/upload', lambda: self._http_call('/mobile/document/upload', data={
+                'document_id': self.checklist.id, 'document_number': 'PERF-UPLOAD',
+            }, files={'attachment': ('passport.pdf', PDF_CONTENT, 'application/pdf')})),
+            ('/mobile/employee/document/download_base64', lambda: self._json_call(
+                '/mobile/employee/document/download_base64',
+                {'document_id': self.documents[0].id})),
+            ('/mobile/events/upcoming', lambda: self._json_call(
+                '/mobile/events/upcoming', {'page': 1, 'limit': 20})),
+            ('/mobile/announcements/list', lambda: self._json_call(
+                '/mobile/announcements/list', {'page': 1, 'limit': 20})),
+            ('/mobile/tasks', lambda: self._json_call('/mobile/tasks', {'page': 1, 'limit': 20})),
+            ('/mobile/tasks/change_status', lambda: self._json_call(
+                '/mobile/tasks/change_status',
+                {'task_id': self.tasks[0].id, 'stage_id': self.stages[-1].id})),
+            ('/mobile/tasks/status', lambda: self._json_call('/mobile/tasks/status')),
+            ('/mobile/calendar', lambda: self._json_call('/mobile/calendar', {
+                'start_date': str(self.today - timedelta(days=30)),
+                'end_date': str(self.today + timedelta(days=30)),
+            })),
+            ('/mobile/profile', lambda: self._json_call('/mobile/profile')),
+            ('/mobile/profile/update', lambda: self._http_call(
+                '/mobile/profile/update', data={'number': '+41 44 000 00 00'})),
+            ('/mobile/chat/channel', lambda: self._json_call(
+                '/mobile/chat/channel', {'user_id': self.chat_partner_user.id})),
+            ('/mobile/chat/message/send', lambda: self._json_call(
+                '/mobile/chat/message/send', {'channel_id': self.channel.id, 'body': 'Hello'})),
+            ('/mobile/chat/messages', lambda: self._json_call(
+                '/mobile/chat/messages', {'channel_id': self.channel.id, 'page': 1, 'limit': 20})),
+            ('/mobile/chat/unread_count', lambda: self._json_call('/mobile/chat/unread_count')),
+            ('/mobile/chat/list', lambda: self._json_call(
+                '/mobile/chat/list', {'page': 1, 'limit': 20})),
+            ('/mobile/chat/mark_read', lambda: self._json_call(
+                '/mobile/chat/mark_read', {'channel_id': self.channel.id})),
+            ('/mobile/employees', lambda: self._json_call(
+                '/mobile/employees', {'page': 3, 'limit': 20})),
+            ('/mobile/image', lambda: self._http_call(
+                f'/mobile/image/hr.employee/{self.employee.id}/128')),
+            ('/mobile/batch', lambda: self._json_call(
+                '/mobile/batch', {'requests': self._home_screen_requests()})),
+            ('/mobile/home', lambda: self._json_call('/mobile/home')),
+            ('/mobile/sync', lambda: self._json_call('/mobile/sync', {'limit': 20})),
+            ('/mobile/snapshot', lambda: self._http_call('/mobile/snapshot')),
+            ('/mobile/expenses/bulk', lambda: self._http_call('/mobile/expenses/bulk', data={
+                'expenses': json.dumps(self._bulk_expenses('perf-route', 5)),
+            }, files={
+                f'receipt{index}': (f'receipt{index}.pdf', PDF_CONTENT + b'%% %d' % index, 'application/pdf')
+                for index in range(5)
+            })),
+        ]
+
+    def _bulk_expenses(self, prefix, count):
+        """ Items of a /mobile/expenses/bulk request, one receipt each. """
+        return [{
+            'client_id': f'{prefix}-{index}',
+            'reason': f'Perf bulk {index}',
+            'date': str(self.today),
+            'amount': 10 + index,
+            'product_id': self.expense_product.id,
+            'file': f'receipt{index}',
+        } for index in range(count)]
+
+    def _home_screen_requests(self):
+        """ The calls the app home screen sends on launch. """
+        return [
+            {'route': '/mobile/attendance/logs', 'params': {}},
+            {'route': '/mobile/employee/profile', 'params': {}},
+            {'route': '/mobile/payslip/dashboard', 'params': {}},
+            {'route': '/mobile/chat/unread_count', 'params': {}},
+            {'route': '/mobile/announcements/list', 'params': {'page': 1, 'limit': 20}},
+        ]
+
+    def _list_calls(self, limit):
+        """ The paginated routes, called with the given page size. """
+        return [
+            ('/mobile/expenses/list', lambda: self._json_call(
+                '/mobile/expenses/list', {'page': 1, 'limit': limit})),
+            ('/mobile/leaves/list', lambda: self._json_call(
+                '/mobile/leaves/list', {'page': 1, 'limit': limit})),
+            ('/mobile/payslip/list', lambda: self._json_call(
+                '/mobile/payslip/list', query={'page': 1, 'limit': limit})),
+            ('/mobile/document/list', lambda: self._json_call(
+                '/mobile/document/list', {'page': 1, 'limit': limit})),
+            ('/mobile/events/upcoming', lambda: self._json_call(
+                '/mobile/events/upcoming', {'page': 1, 'limit': limit})),
+            ('/mobile/announcements/list', lambda: self._json_call(
+                '/mobile/announcements/list', {'page': 1, 'limit': limit})),
+            ('/mobile/tasks', lambda: self._json_call(
+                '/mobile/tasks', {'page': 1, 'limit': limit})),
+            ('/mobile/chat/messages', lambda: self._json_call(
+                '/mobile/chat/messages', {'channel_id': self.channel.id, 'page': 1, 'limit': limit})),
+            ('/mobile/chat/list', lambda: self._json_call(
+                '/mobile/chat/list', {'page': 1, 'limit': limit})),
+            ('/mobile/employees', lambda: self._json_call(
+                '/mobile/employees', {'page': 1, 'limit': limit})),
+        ]
+
+    # ------------------------------------------------------------------
+    # Tests
+    # ------------------------------------------------------------------
+
+    def test_01_login(self):
+        url = '/mobile/login'
+        payload = {'login': 'mobile_perf', 'password': 'mobile_perf'}
+        _result, queries = self._measure(url, lambda: self._json_call(url, payload))
+        self.assertLessEqual(queries, self.QUERY_BUDGETS[url])
+
+    def test_02_routes_within_budget(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        for route, call in self._route_calls():
+            with self.subTest(route=route):
+                if route not in self.MUTATING_ROUTES:
+                    # warm up the registry caches and the mobile context
+                    call()
+                _result, queries = self._measure(route, call)
+                self.assertLessEqual(
+                    queries, self.QUERY_BUDGETS[route],
+                    f"{route} executed {queries} queries",
+                )
+
+    def test_03_list_routes_do_not_scale_with_page_size(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        small_calls = dict(self._list_calls(5))
+        for route, call in self._list_calls(50):
+            with self.subTest(route=route):
+                small_calls[route]()
+                _result, small_queries = self._measure(route, small_calls[route])
+                _result, large_queries = self._measure(route, call)
+                if route in self.KNOWN_LINEAR_ROUTES:
+                    _logger.info(
+                        "%s still scales with the page size: %s queries for 5 rows, %s for 50",
+                        route, small_queries, large_queries,
+                    )
+                    continue
+                self.assertLessEqual(
+                    large_queries - small_queries, self.PAGE_SIZE_SLACK,
+                    f"{route}: {small_queries} queries for 5 rows, {large_queries} for 50",
+                )
+
+    def test_04_cursor_pagination(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        seen_ids = []
+        cursor = ''
+        while cursor is not None:
+            result, queries = self._measure('/mobile/expenses/list (cursor)', lambda: self._json_call(
+                '/mobile/expenses/list', {'cursor': cursor, 'limit': 50}))
+            self.assertNotIn('total', result, "the total is only counted on request")
+            self.assertLessEqual(queries, self.QUERY_BUDGETS['/mobile/expenses/list'])
+            seen_ids += [expense['id'] for expense in result['expenses']]
+            cursor = result['next_cursor']
+        expected = self.env['hr.expense'].search([('employee_id', '=', self.employee.id)])
+        self.assertEqual(len(seen_ids), len(set(seen_ids)))
+        self.assertEqual(set(seen_ids), set(expected.ids))
+
+        self.assertNotIn('total', self._json_call(
+            '/mobile/expenses/list', {'cursor': '', 'limit': 5, 'with_count': 'false'}))
+        self.assertIn('total', self._json_call(
+            '/mobile/expenses/list', {'cursor': '', 'limit': 5, 'with_count': True}))
+
+        # tampered cursors are rejected, not turned into a server error
+        for value in (['not a date', 1], [{'a': 1}, 1], ['2024-01-01', 'x'], [[1], 2], 'garbage'):
+            cursor = base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+            result = self._json_call('/mobile/expenses/list', {'cursor': cursor, 'limit': 5})
+            self.assertEqual(result['status'], 400, value)
+
+    def test_05_image_revalidation(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        url = f'/mobile/image/hr.employee/{self.employee.id}/128'
+        response = self._http_call(url)
+        etag = response.headers['ETag']
+        self.assertTrue(etag)
+        response, _queries = self._measure('/mobile/image (304)', lambda: self.url_open(
+            url, headers={'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+
+        # no image of a record the user cannot read
+        other_company = self.env['res.company'].create({'name': 'Perf Other Company'})
+        partner = self.env['res.partner'].create({'name': 'Perf Private', 'company_id': other_company.id})
+        response = self.url_open(f'/mobile/image/res.partner/{partner.id}/128')
+        self.assertEqual(response.status_code, 404)
+
+    def test_06_reference_data_revalidation(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        json_headers = {'Content-Type': 'application/json'}
+        calls = [
+            ('/get-countries', lambda headers: self.url_open('/get-countries', headers=headers)),
+            ('/mobile/leaves/types', lambda headers: self.url_open('/mobile/leaves/types', headers=headers)),
+            ('/mobile/tasks/status', lambda headers: self.url_open(
+                '/mobile/tasks/status', data=json.dumps({'jsonrpc': '2.0', 'params': {}}),
+                headers=dict(json_headers, **headers))),
+            ('/mobile/profile', lambda headers: self.url_open(
+                '/mobile/profile', data=json.dumps({'jsonrpc': '2.0', 'params': {}}),
+                headers=dict(json_headers, **headers))),
+        ]
+        etags = {}
+        for route, call in calls:
+            response = call({})
+            self.assertEqual(response.status_code, 200, route)
+            etag = etags[route] = response.headers.get('ETag')
+            self.assertTrue(etag, route)
+            if 'public' in response.headers.get('Cache-Control', ''):
+                # shared caches must not serve one language to everyone
+                self.assertIn('Accept-Language', response.headers.get('Vary', ''), route)
+                self.assertIn('Cookie', response.headers.get('Vary', ''), route)
+            response, queries = self._measure(f'{route} (304)', lambda: call({'If-None-Match': etag}))
+            self.assertEqual(response.status_code, 304, route)
+            self.assertFalse(response.content, route)
+            self.assertLessEqual(queries, self.QUERY_BUDGETS[route], route)
+
+        # any change to the underlying records invalidates the ETag
+        self.env['project.task.type'].create({'name': 'Perf revalidation'})
+        response = calls[2][1]({'If-None-Match': etags['/mobile/tasks/status']})
+        self.assertEqual(response.status_code, 200)
+
+        for body in ({'country_code': ['CH']}, {'country_code': {'code': 'CH'}}, ['CH'], 'not json'):
+            response = self.url_open('/get-states', data=body if isinstance(body, str) else json.dumps(body),
+                                     headers=json_headers)
+            self.assertEqual(response.json()['status'], 400, body)
+
+    def test_07_batch(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        requests = self._home_screen_requests() + [
+            {'route': '/mobile/payslip/list', 'params': {'page': 1, 'limit': 5}},
+            {'route': '/mobile/login', 'params': {}},
+        ]
+        result, queries = self._measure('/mobile/batch (home)', lambda: self._json_call(
+            '/mobile/batch', {'requests': requests}))
+        self.assertEqual(result['status'], 200)
+        responses = result['responses']
+        self.assertEqual([item['route'] for item in responses], [item['route'] for item in requests])
+        for item in responses[:-1]:
+            self.assertEqual(item['status'], 200, item['route'])
+        self.assertEqual(len(responses[5]['result']['payslips']), 5)
+        self.assertEqual(responses[-1]['status'], 404)
+
+        # one batch costs less than the separate calls it replaces
+        separate = 0
+        for item in self._home_screen_requests():
+            _result, item_queries = self._measure(item['route'], lambda: self._json_call(
+                item['route'], item['params']))
+            separate += item_queries
+        _result, batch_queries = self._measure('/mobile/batch (home)', lambda: self._json_call(
+            '/mobile/batch', {'requests': self._home_screen_requests()}))
+        self.assertLess(batch_queries, separate)
+
+    def test_08_delta_sync(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        tasks = self.tasks.sorted('id')
+        # records written in the last minutes are read again on every sync
+        self.env.cr.execute(
+            "UPDATE project_task SET write_date = write_date - interval '1 hour' WHERE id IN %s",
+            [tuple(tasks.ids)])
+        self.env.invalidate_all()
+
+        # full sync, page by page
+        token, synced = None, set()
+        while True:
+            result = self._json_call('/mobile/sync', {'since': {'tasks': token}, 'limit': 50})
+            section = result['sections']['tasks']
+            synced.update(task['id'] for task in section['changed'])
+            token = section['since']
+            if not section['has_more']:
+                break
+        self.assertEqual(synced, set(tasks.ids))
+        self.assertEqual(set(section['ids']), set(tasks.ids))
+
+        # steady state: nothing changed
+        result, queries = self._measure('/mobile/sync (no change)', lambda: self._json_call(
+            '/mobile/sync', {'since': {'tasks': token}}))
+        section = result['sections']['tasks']
+        self.assertEqual((section['changed'], section['deleted']), ([], []))
+        self.assertLessEqual(queries, self.QUERY_BUDGETS['/mobile/sync'])
+
+        tasks[0].name = 'Perf task renamed'
+        deleted_id = tasks[1].id
+        tasks[1].unlink()
+        section = self._json_call('/mobile/sync', {'since': {'tasks': token}})['sections']['tasks']
+        self.assertEqual([task['id'] for task in section['changed']], [tasks[0].id])
+        self.assertEqual(section['deleted'], [deleted_id])
+        token = section['since']
+
+        # deletions of records outside the user's scope are not reported
+        other_task = self.env['project.task'].create({
+            'name': 'Perf foreign task', 'project_id': tasks.project_id[:1].id,
+        })
+        other_task.unlink()
+        section = self._json_call('/mobile/sync', {'since': {'tasks': token}})['sections']['tasks']
+        self.assertNotIn(other_task.id, section['deleted'])
+        self.assertFalse(section['reset'])
+        token = section['since']
+
+        # recent changes are sent again, in case an older transaction commits late
+        self.assertIn(tasks[0].id, [task['id'] for task in section['changed']])
+        self.assertIn(deleted_id, section['deleted'])
+
+        # a task unassigned from the user is listed neither as changed nor as
+        # deleted: it is missing from the ids of the section
+        tasks[2].user_ids = [(3, self.user.id)]
+        section = self._json_call('/mobile/sync', {'since': {'tasks': token}})['sections']['tasks']
+        self.assertNotIn(tasks[2].id, section['ids'])
+        self.assertIn(tasks[3].id, section['ids'])
+        token = section['since']
+
+        # a section left unedited longer than the retention is still synced
+        # incrementally: only the time of the last sync matters
+        self.env.cr.execute(
+            "UPDATE project_task SET write_date = write_date - interval '60 days' WHERE id IN %s",
+            [tuple(tasks.ids)])
+        section = self._json_call('/mobile/sync', {'since': {'tasks': token}})['sections']['tasks']
+        self.assertFalse(section['reset'])
+
+        write_date, record_id, tombstone_id, _synced_at = json.loads(base64.urlsafe_b64decode(token))
+        stale = base64.urlsafe_b64encode(json.dumps([
+            write_date, record_id, tombstone_id, str(datetime.now() - timedelta(days=60)),
+        ]).encode()).decode()
+        section = self._json_call('/mobile/sync', {'since': {'tasks': stale}})['sections']['tasks']
+        self.assertTrue(section['reset'])
+
+    def test_09_snapshot(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        response = self._http_call('/mobile/snapshot')
+        etag = response.headers['ETag']
+        with tempfile.NamedTemporaryFile(suffix='.sqlite') as snapshot:
+            snapshot.write(response.content)
+            snapshot.flush()
+            connection = sqlite3.connect(snapshot.name)
+            try:
+                counts = {
+                    table: connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                    for table in ('profile', 'payslips', 'documents', 'employees')
+                }
+            finally:
+                connection.close()
+        self.assertEqual(counts['profile'], 1)
+        self.assertEqual(counts['payslips'], len(self.payslips))
+        self.assertTrue(counts['employees'])
+
+        response, _queries = self._measure('/mobile/snapshot (304)', lambda: self.url_open(
+            '/mobile/snapshot', headers={'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+        self.documents[0].description = 'Perf snapshot change'
+        response = self._http_call('/mobile/snapshot')
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        # snapshots no longer served are removed by the autovacuum
+        Employee = self.env['hr.employee']
+        key = response.headers['ETag'].strip('"')
+        path = os.path.join(Employee._mobile_snapshot_dir(), f"{self.employee.id}-{key}.sqlite")
+        self.assertTrue(os.path.exists(path))
+        Employee._gc_mobile_snapshots()
+        self.assertTrue(os.path.exists(path))
+        stale = time.time() - 30 * 24 * 3600
+        os.utime(path, (stale, stale))
+        Employee._gc_mobile_snapshots()
+        self.assertFalse(os.path.exists(path))
+
+    def test_10_bearer_tokens(self):
+        tokens = self._json_call('/mobile/login', {
+            'login': 'mobile_perf', 'password': 'mobile_perf', 'token': True, 'device': 'perf',
+        })
+        self.assertEqual(tokens['status'], 200)
+        self.assertEqual(tokens['uid'], self.user.id)
+
+        def profile(access_token):
+            return self.url_open('/mobile/profile', data=json.dumps({'jsonrpc': '2.0', 'params': {}}), headers={
+                'Content-Type': 'application/json',
+                'Authorization': f"Bearer {access_token}",
+            })
+
+        self.opener.cookies.clear()
+        response, _queries = self._measure('/mobile/profile (bearer)', lambda: profile(tokens['access_token']))
+        self.assertEqual(response.json()['result']['uid'], self.user.id)
+        self.assertIn('error', profile(tokens['access_token'] + 'x').json())
+        # a crafted non-ASCII token is rejected like any invalid one
+        self.assertIn('error', profile('\u00e9.\u00e9').json())
+
+        refreshed = self._json_call('/mobile/token/refresh', {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(refreshed['status'], 200)
+        self.assertNotEqual(refreshed['refresh_token'], tokens['refresh_token'])
+        # refresh tokens are single use
+        reused = self._json_call('/mobile/token/refresh', {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(reused['status'], 401)
+
+        self.url_open('/mobile/logout', data=json.dumps({
+            'refresh_token': refreshed['refresh_token'], 'jsonrpc': '2.0', 'params': {},
+        }), headers={
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {refreshed['access_token']}",
+        })
+        revoked = self._json_call('/mobile/token/refresh', {'refresh_token': refreshed['refresh_token']})
+        self.assertEqual(revoked['status'], 401)
+
+        # users with a second factor cannot get a token with their password only
+        with patch.object(self.registry['res.users'], '_mfa_url', lambda user: '/web/login/totp'):
+            mfa = self._json_call('/mobile/login', {
+                'login': 'mobile_perf', 'password': 'mobile_perf', 'token': True,
+            })
+        self.assertEqual(mfa['status'], 401)
+        self.assertNotIn('access_token', mfa)
+
+        def token_login(login):
+            return self._json_call('/mobile/login', {'login': login, 'password': login, 'token': True})
+
+        # a user cannot revoke the refresh token of another one
+        tokens = token_login('mobile_perf')
+        peer_tokens = token_login('mobile_perf_peer')
+        self.url_open('/mobile/logout', data=json.dumps({
+            'refresh_token': tokens['refresh_token'], 'jsonrpc': '2.0', 'params': {},
+        }), headers={
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {peer_tokens['access_token']}",
+        })
+        refreshed = self._json_call('/mobile/token/refresh', {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(refreshed['status'], 200)
+
+        # a password change, like the logout of all devices, revokes the tokens
+        self.user.password = 'mobile_perf'
+        revoked = self._json_call('/mobile/token/refresh', {'refresh_token': refreshed['refresh_token']})
+        self.assertEqual(revoked['status'], 401)
+
+        tokens = token_login('mobile_perf')
+        self.user.active = False
+        self.assertIn('error', profile(tokens['access_token']).json())
+        archived = self._json_call('/mobile/token/refresh', {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(archived['status'], 401)
+        self.assertFalse(self.env['mobile.auth.token'].search([('user_id', '=', self.user.id)]))
+
+    def test_11_streamed_upload(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        response = self._http_call('/mobile/document/upload', data={
+            'document_id': self.checklist.id, 'document_number': 'PERF-STREAM',
+        }, files={'attachment': ('passport.pdf', PDF_CONTENT, 'application/pdf')})
+        attachment = self.env['ir.attachment'].browse(response.json()['attachment_id'])
+        self.assertEqual(attachment.raw, PDF_CONTENT)
+        self.assertEqual(attachment.checksum, hashlib.sha1(PDF_CONTENT).hexdigest())
+        self.assertEqual(attachment.file_size, len(PDF_CONTENT))
+
+        receipt = PDF_CONTENT + b'% perf streamed receipt'
+        expense = self._http_call('/mobile/expenses', data={
+            'reason': 'Perf streamed', 'date': str(self.today), 'amount': '5',
+            'product_id': self.expense_product.id,
+        }, files={'attachment': ('receipt.pdf', receipt, 'application/pdf')}).json()
+        expense_attachment = self.env['ir.attachment'].search([
+            ('res_model', '=', 'hr.expense'), ('res_id', '=', expense['expense_id']),
+        ])
+        self.assertTrue(expense_attachment.store_fname)
+        # the streamed files are referenced: the filestore GC keeps them
+        self.env['ir.attachment']._gc_file_store_unsafe()
+        (attachment | expense_attachment).invalidate_recordset()
+        self.assertEqual(attachment.raw, PDF_CONTENT)
+        self.assertEqual(expense_attachment.raw, receipt)
+
+        oversized = b'0' * (10 * 1024 * 1024 + 1)
+        response = self._http_call('/mobile/document/upload', data={
+            'document_id': self.checklist.id, 'document_number': 'PERF-TOO-LARGE',
+        }, files={'attachment': ('large.pdf', oversized, 'application/pdf')})
+        self.assertEqual(response.json()['status'], 400)
+        self.assertFalse(self.env['hr.employee.document'].search([('name', '=', 'PERF-TOO-LARGE')]))
+
+    def test_12_chunked_upload(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        content = PDF_CONTENT * 50
+        chunk_size = 1024
+        upload = self._json_call('/mobile/upload/init', {
+            'file_name': 'contract.pdf',
+            'mimetype': 'application/pdf',
+            'total_size': len(content),
+            'chunk_size': chunk_size,
+            'checksum': hashlib.sha1(content).hexdigest(),
+            'target': 'document',
+            'document_id': self.checklist.id,
+            'document_number': 'PERF-CHUNKED',
+        })
+        self.assertEqual(upload['status'], 200)
+        chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+        self.assertEqual(upload['missing_chunks'], list(range(len(chunks))))
+
+        # a bad target is rejected before any chunk is sent
+        init = {'file_name': 'contract.pdf', 'mimetype': 'application/pdf', 'total_size': len(content)}
+        for target, status in (
+            ({'target': 'document', 'document_id': 'abc'}, 400),
+            ({'target': 'document', 'document_id': 999999999}, 404),
+            ({'target': 'document', 'document_id': self.checklist.id, 'issue_date': 'yesterday'}, 400),
+            ({'target': 'expense', 'expense_id': [1]}, 400),
+        ):
+            self.assertEqual(self._json_call('/mobile/upload/init', dict(init, **target))['status'], status, target)
+
+        def send(index, data):
+            return self.url_open(
+                f"/mobile/upload/chunk?upload_id={upload['upload_id']}&index={index}",
+                data=data,
+                headers={
+                    'Content-Type': 'application/octet-stream',
+                    'X-Chunk-Checksum': hashlib.sha1(data).hexdigest(),
+                },
+            ).json()
+
+        # the last chunk first, then all but one: the upload resumes
+        for index in [len(chunks) - 1] + list(range(len(chunks) - 2)):
+            self.assertEqual(send(index, chunks[index])['status'], 200)
+        self.assertEqual(send(0, b'corrupted')['status'], 400)
+
+        incomplete = self._json_call('/mobile/upload/complete', {'upload_id': upload['upload_id']})
+        self.assertEqual(incomplete['status'], 400)
+        self.assertEqual(incomplete['missing_chunks'], [len(chunks) - 2])
+
+        send(len(chunks) - 2, chunks[-2])
+        result = self._json_call('/mobile/upload/complete', {'upload_id': upload['upload_id']})
+        self.assertEqual(result['status'], 200)
+        attachment = self.env['ir.attachment'].browse(result['attachment_id'])
+        self.assertEqual(attachment.raw, content)
+        self.assertEqual(attachment.res_id, result['document_id'])
+
+    def test_13_upload_deduplication(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        receipt = PDF_CONTENT + b'% perf dedup'
+
+        def submit(content=receipt, **extra):
+            return self._http_call('/mobile/expenses', data=dict({
+                'reason': 'Perf dedup', 'date': str(self.today), 'amount': '12',
+                'product_id': self.expense_product.id,
+            }, **extra), files={'attachment': ('receipt.pdf', content, 'application/pdf')}).json()
+
+        first = submit()
+        self.assertFalse(first['possible_duplicate'])
+        second = submit()
+        self.assertTrue(second['possible_duplicate'])
+        self.assertEqual(second['duplicate_expense_id'], first['expense_id'])
+
+        attachments = self.env['ir.attachment'].search([
+            ('res_model', '=', 'hr.expense'),
+            ('res_id', 'in', [first['expense_id'], second['expense_id']]),
+        ])
+        self.assertEqual(len(attachments), 2)
+        self.assertEqual(len(set(attachments.mapped('store_fname'))), 1)
+        original, duplicate = attachments.sorted('id')
+        self.assertEqual(original.raw, receipt)
+        self.assertEqual(duplicate.raw, original.raw)
+        self.assertEqual(duplicate.file_size, len(receipt))
+
+        # the checksum sent by the client is not trusted: another file is kept
+        other = PDF_CONTENT + b'% perf other'
+        third = submit(content=other, checksum=hashlib.sha1(receipt).hexdigest())
+        self.assertFalse(third['possible_duplicate'])
+        self.assertEqual(self.env['ir.attachment'].search([
+            ('res_model', '=', 'hr.expense'), ('res_id', '=', third['expense_id']),
+        ]).raw, other)
+
+    def test_14_image_optimization(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        stream = io.BytesIO()
+        Image.effect_noise((3000, 2000), 64).convert('RGB').save(stream, 'JPEG', quality=100)
+        photo = stream.getvalue()
+
+        result = self._http_call('/mobile/expenses', data={
+            'reason': 'Perf photo', 'date': str(self.today), 'amount': '8',
+            'product_id': self.expense_product.id,
+        }, files={'attachment': ('receipt.jpg', photo, 'image/jpeg')}).json()
+        attachment = self.env['ir.attachment'].search([
+            ('res_model', '=', 'hr.expense'), ('res_id', '=', result['expense_id']),
+        ])
+        self.assertEqual(attachment.mobile_optimization_state, 'pending')
+
+        self.env['ir.attachment']._mobile_optimize_images()
+        self.assertEqual(attachment.mobile_optimization_state, 'done')
+        self.assertLess(attachment.file_size, len(photo))
+        self.assertEqual(attachment.mobile_original_checksum, hashlib.sha1(photo).hexdigest())
+        self.assertEqual(max(Image.open(io.BytesIO(attachment.raw)).size), 2048)
+        self.assertTrue(attachment.mobile_preview)
+
+    def test_15_bulk_expenses(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        items = self._bulk_expenses('perf-bulk', 10)
+        items.append({'client_id': 'perf-bulk-invalid', 'reason': 'Perf bulk'})
+        files = {
+            f'receipt{index}': (f'receipt{index}.pdf', PDF_CONTENT + b'%% bulk %d' % index, 'application/pdf')
+            for index in range(10)
+        }
+
+        def submit():
+            return self._http_call('/mobile/expenses/bulk', data={
+                'expenses': json.dumps(items),
+            }, files=files).json()
+
+        first, queries = self._measure('/mobile/expenses/bulk', submit)
+        # the budget covers 5 receipts in test_02: 10 must not cost twice as much
+        self.assertLessEqual(queries, self.QUERY_BUDGETS['/mobile/expenses/bulk'])
+        results = {result['client_id']: result for result in first['results']}
+        self.assertEqual(results['perf-bulk-invalid']['status'], 400)
+        created = [results[f'perf-bulk-{index}'] for index in range(10)]
+        self.assertTrue(all(result['status'] == 200 and not result['replayed'] for result in created))
+        self.assertTrue(all(result['attachment_uploaded'] for result in created))
+        expense_ids = [result['expense_id'] for result in created]
+        self.assertEqual(self.env['ir.attachment'].search_count([
+            ('res_model', '=', 'hr.expense'), ('res_id', 'in', expense_ids),
+        ]), 10)
+
+        # replaying the whole request after a lost response creates nothing
+        replayed = {result['client_id']: result for result in submit()['results']}
+        self.assertEqual([replayed[f'perf-bulk-{index}']['expense_id'] for index in range(10)], expense_ids)
+        self.assertTrue(all(replayed[f'perf-bulk-{index}']['replayed'] for index in range(10)))
+        self.assertEqual(self.env['hr.expense'].search_count([('mobile_client_id', 'like', 'perf-bulk-%')]), 10)
+
+        # a client_id repeated in the batch is only created once
+        repeated = self._bulk_expenses('perf-repeat', 1) * 2
+        results = self._http_call('/mobile/expenses/bulk', data={
+            'expenses': json.dumps(repeated),
+        }, files={'receipt0': ('receipt0.pdf', PDF_CONTENT, 'application/pdf')}).json()['results']
+        self.assertEqual([result['status'] for result in results], [200, 400])
+        self.assertEqual(self.env['hr.expense'].search_count([('mobile_client_id', '=', 'perf-repeat-0')]), 1)
+
+        # an expense created concurrently after the replay lookup is reported, not raised
+        prepare = MobileApiHome._prepare_bulk_expense
+
+        def prepare_racing(controller, item, employee, *args):
+            if item['client_id'] == 'perf-race-1':
+                self.env['hr.expense'].create({
+                    'name': 'Perf race', 'employee_id': employee.id,
+                    'product_id': self.expense_product.id, 'mobile_client_id': 'perf-race-1',
+                })
+            return prepare(controller, item, employee, *args)
+
+        with patch.object(MobileApiHome, '_prepare_bulk_expense', prepare_racing):
+            results = self._http_call('/mobile/expenses/bulk', data={
+                'expenses': json.dumps(self._bulk_expenses('perf-race', 3)),
+            }).json()['results']
+        self.assertEqual([result['status'] for result in results], [200, 200, 200])
+        self.assertEqual([result['replayed'] for result in results], [False, True, False])
+        self.assertEqual(self.env['hr.expense'].search_count([('mobile_client_id', 'like', 'perf-race-%')]), 3)
+
+    def test_16_expense_summary(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        expenses = self.env['hr.expense'].search([('employee_id', '=', self.employee.id)])
+        summary = self._json_call('/mobile/expenses/summary', {})
+        self.assertEqual(summary['count'], len(expenses))
+        self.assertAlmostEqual(summary['total_amount'], sum(expenses.mapped('total_amount')), places=2)
+        for breakdown in ('by_state', 'by_month', 'by_category'):
+            self.assertEqual(sum(group['count'] for group in summary[breakdown]), len(expenses), breakdown)
+
+        future = self._json_call('/mobile/expenses/summary', {'date_from': str(self.today + timedelta(days=1))})
+        self.assertEqual(future['count'], 0)
+        self.assertFalse(future['by_state'])
+
+        for params in ({'date_from': 20240101}, {'date_to': ['2024-01-01']}, {'date_from': 'not a date'}):
+            self.assertEqual(self._json_call('/mobile/expenses/summary', params)['status'], 400, params)
+
+    def test_17_leave_filters(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        everything = self._json_call('/mobile/leaves/list', {'page': 1, 'limit': 5})
+        approved = self._json_call('/mobile/leaves/list', {'page': 1, 'limit': 5, 'state': 'validate'})
+        self.assertEqual(approved['total'], everything['approved_count'])
+        self.assertTrue(all(leave['status'] == 'validate' for leave in approved['leaves']))
+
+        future = str(self.today + timedelta(days=3650))
+        empty = self._json_call('/mobile/leaves/list', {'page': 1, 'limit': 5, 'date_from': future})
+        self.assertEqual(empty['total'], 0)
+        self.assertFalse(empty['leaves'])
+
+        for params in ({'state': 3}, {'state': ['validate', None]}, {'date_from': 20240101}, {'date_to': {}}):
+            result = self._json_call('/mobile/leaves/list', dict(params, page=1, limit=5))
+            self.assertEqual(result['status'], 400, params)
+
+    def test_18_scoped_leave_listing(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        team = self._json_call('/mobile/leaves/list', {'page': 1, 'limit': 5, 'scope': 'team'})
+        self.assertEqual(team['total'], 0)
+
+        report = self.env['hr.employee'].create({'name': 'Perf Report', 'parent_id': self.employee.id})
+        report_leave = self.env['hr.leave'].with_context(leave_skip_state_check=True).create({
+            'name': 'Perf report leave',
+            'employee_id': report.id,
+            'holiday_status_id': self.leave_type.id,
+            'request_date_from': self.today,
+            'request_date_to': self.today,
+        })
+        team = self._json_call('/mobile/leaves/list', {'page': 1, 'limit': 5, 'scope': 'team'})
+        self.assertEqual(team['total'], 1)
+        self.assertEqual([leave['id'] for leave in team['leaves']], [report_leave.id])
+
+        self.authenticate('admin', 'admin')
+        params = {
+            'page': 1, 'limit': 20,
+            'manager_id': self.manager.id,
+            'department_id': self.departments[0].id,
+            'date_from': str(self.today - timedelta(days=90)),
+        }
+        scoped, queries = self._measure('/mobile/leaves/list', lambda: self._json_call('/mobile/leaves/list', params))
+        self.assertLessEqual(queries, self.QUERY_BUDGETS['/mobile/leaves/list'])
+        self.assertEqual(scoped['total'], self.env['hr.leave'].search_count([
+            ('employee_id.parent_id', '=', self.manager.id),
+            ('employee_id.department_id', '=', self.departments[0].id),
+            ('request_date_to', '>=', self.today - timedelta(days=90)),
+        ]))
+        self.assertTrue(scoped['total'])
+
+        for key in ('employee_id', 'department_id', 'manager_id'):
+            for value in ('abc', [1], True):
+                malformed = self._json_call('/mobile/leaves/list', {'page': 1, key: value})
+                self.assertEqual(malformed['status'], 400, (key, value))
+
+    def test_19_leave_balances(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        balances, cold = self._measure(
+            '/mobile/leaves/balances', lambda: self._json_call('/mobile/leaves/balances'))
+        self.assertLessEqual(cold, self.QUERY_BUDGETS['/mobile/leaves/balances'])
+        self.assertIn(self.leave_type.id, [balance['id'] for balance in balances['balances']])
+
+        _cached, warm = self._measure(
+            '/mobile/leaves/balances', lambda: self._json_call('/mobile/leaves/balances'))
+        self.assertLess(warm, cold)
+
+        # a new leave changes the stamp: the balances are computed again
+        next_monday = self.today + timedelta(days=7 - self.today.weekday())
+        self.env['hr.leave'].with_context(leave_skip_state_check=True).create({
+            'name': 'Perf balance',
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.leave_type.id,
+            'request_date_from': next_monday,
+            'request_date_to': next_monday,
+        })
+        _updated, recomputed = self._measure(
+            '/mobile/leaves/balances', lambda: self._json_call('/mobile/leaves/balances'))
+        self.assertGreater(recomputed, warm)
+
+    def test_20_leave_preview(self):
+        self.authenticate('mobile_perf', 'mobile_perf')
+        next_monday = self.today + timedelta(days=21 - self.today.weekday())
+        leave_count = self.env['hr.leave'].search_count([])
+        preview = self._json_call('/mobile/leaves/preview', {
+            'leave_type_id': self.leave_type.id,
+            'date_from': str(next_monday),
+            'date_to': str(next_monday + timedelta(days=6)),
+        })
+        self.assertTrue(preview['valid'])
+        self.assertEqual(preview['working_days'], 5)
+        self.assertEqual(preview['requested_days'], 7)
+        self.assertFalse(preview['overlapping_leaves'])
+        self.assertEqual(self.env['hr.leave'].search_count([]), leave_count)
+
+        # a past Friday already holds a leave of the seeded year
+        friday = self.today - timedelta(days=(self.today.weekday() - 4) % 7 or 7)
+        overlap = self._json_call('/mobile/leaves/preview', {
+            'leave_type_id': self.leave_type.id,
+            'date_from': str(friday),
+            'date_to': str(friday),
+        })
+        self.assertFalse(overlap['valid'])
+        self.assertTrue(overlap['overlapping_leaves'])
+
+        # only the working days of a Friday to Monday leave are deducted
+        allocated_type = self.env['hr.leave.type'].create({
+            'name': 'Perf Allocated Leave',
+            'requires_allocation': 'yes',
+            'allocation_validation_type': 'no_validation',
+            'request_unit': 'day',
+        })
+        self.env['hr.leave.allocation'].create({
+            'employee_id': self.employee.id,
+            'holiday_status_id': allocated_type.id,
+            'number_of_days': 10,
+        })
+        next_friday = next_monday + timedelta(days=4)
+        balance = self._json_call('/mobile/leaves/preview', {
+            'leave_type_id': allocated_type.id,
+            'date_from': str(next_friday),
+            'date_to': str(next_friday + timedelta(days=3)),
+        })
+        self.assertEqual(balance['requested_days'], 4)
+        self.assertEqual(balance['working_days'], 2)
+        self.assertEqual(balance['remaining_after'], balance['remaining_leaves'] - 2)
+
+        for params in (
+            {'leave_type_id': 'abc', 'date_from': str(next_monday), 'date_to': str(next_monday)},
+            {'leave_type_id': [1], 'date_from': str(next_monday), 'date_to': str(next_monday)},
+            {'leave_type_id': self.leave_type.id, 'date_from': 20240101, 'date_to': str(next_monday)},
+        ):
+            self.assertEqual(self._json_call('/mobile/leaves/preview', params)['status'], 400, params)
+
+    def test_21_team_availability(self):
+        self.authenticate('admin', 'admin')
+        quarter_start = self.today - timedelta(days=91)
+
+        def availability(date_from):
+            return self._json_call('/mobile/team/availability', {
+                'department_id': self.departments[0].id,
+                'date_from': str(date_from),
+                'date_to': str(self.today),
+            })
+
+        week, week_queries = self._measure(
+            '/mobile/team/availability', lambda: availability(self.today - timedelta(days=6)))
+        quarter, quarter_queries = self._measure('/mobile/team/availability', lambda: availability(quarter_start))
+        self.assertLessEqual(quarter_queries, self.QUERY_BUDGETS['/mobile/team/availability'])
+        self.assertLessEqual(quarter_queries, week_queries + self.PAGE_SIZE_SLACK)
+
+        self.assertEqual(len(quarter['days']), 92)
+        self.assertTrue(all(len(member['availability']) == 92 for member in quarter['employees']))
+        self.assertEqual(len(week['employees']), len(quarter['employees']))
+
+        # a seeded leave of the quarter shows on its day, approved once validated
+        leave = self.env['hr.leave'].search([
+            ('employee_id.department_id', '=', self.departments[0].id),
+            ('request_date_from', '>=', quarter_start),
+            ('state', '=', 'confirm'),
+        ], limit=1)
+        index = quarter['days'].index(str(leave.request_date_from))
+
+        def code(result):
+            member = next(member for member in result['employees'] if member['id'] == leave.employee_id.id)
+            return member['availability'][index]
+
+        self.assertEqual(code(quarter), 'P')
+        self.assertGreaterEqual(quarter['away_counts'][index], 1)
+        leave.action_validate()
+        self.assertEqual(code(availability(quarter_start)), 'A')
+        self.assertEqual(self._json_call('/mobile/team/availability', {
+            'department_id': self.departments[0].id, 'date_from': 20240101,
+        })['status'], 400)
+        for department_id in ('abc', [1]):
+            self.assertEqual(self._json_call('/mobile/team/availability', {
+                'department_id': department_id,
+            })['status'], 400, department_id)
+
+        # a public holiday of another company is not painted
+        member, day_index = next(
+            (member, day_index)
+            for member in quarter['employees']
+            for day_index, day_code in enumerate(member['availability'])
+            if day_code == '.'
+        )
+        holiday_day = fields.Date.to_date(quarter['days'][day_index])
+        other_company = self.env['res.company'].create({'name': 'Perf Other Company'})
+        self.env['resource.calendar.leaves'].create({
+            'name': 'Perf foreign holiday',
+            'calendar_id': False,
+            'company_id': other_company.id,
+            'date_from': datetime.combine(holiday_day, datetime.min.time()),
+            'date_to': datetime.combine(holiday_day, datetime.max.time()).replace(microsecond=0),
+        })
+        result = availability(quarter_start)
+        row = next(row for row in result['employees'] if row['id'] == member['id'])
+        self.assertEqual(row['availability'][day_index], '.')
+
+        self.authenticate('mobile_perf', 'mobile_perf')
+        forbidden = self._json_call('/mobile/team/availability', {'department_id': self.departments[0].id})
+        self.assertEqual(forbidden['status'], 403)
+
+    def test_22_chunked_upload_database_storage(self):
+        """ With database storage the assembled parts are read in one go. """
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'db')
+        self.authenticate('mobile_perf', 'mobile_perf')
+        content = PDF_CONTENT * 50
+        chunk_size = 1024
+        upload = self._json_call('/mobile/upload/init', {
+            'file_name': 'contract.pdf',
+            'mimetype': 'application/pdf',
+            'total_size': len(content),
+            'chunk_size': chunk_size,
+            'target': 'document',
+            'document_id': self.checklist.id,
+            'document_number': 'PERF-CHUNKED-DB',
+        })
+        for index in range(0, len(content), chunk_size):
+            self.url_open(
+                f"/mobile/upload/chunk?upload_id={upload['upload_id']}&index={index // chunk_size}",
+                data=content[index:index + chunk_size],
+                headers={'Content-Type': 'application/octet-stream'},
+            )
+        result = self._json_call('/mobile/upload/complete', {'upload_id': upload['upload_id']})
+        self.assertEqual(result['status'], 200)
+        attachment = self.env['ir.attachment'].browse(result['attachment_id'])
+        self.assertFalse(attachment.store_fname)
+        self.assertEqual(attachment.raw, content)
+
+    def test_23_metrics_on_errors(self):
+        """ Errors of the mobile routes are counted with their status, not
+        turned into a 500 by the metrics hook. """
+        self.authenticate('admin', 'admin')
+        self.assertEqual(self.url_open('/mobile/does-not-exist').status_code, 404)
+        self.assertEqual(self.url_open('/mobile/image/res.partner/999999999/128').status_code, 404)
+        with patch.object(MobileApiHome, '_get_mobile_context', side_effect=Forbidden()):
+            self.assertEqual(self.url_open('/mobile/leaves/types').status_code, 403)
+
+        metrics = self.url_open('/mobile/metrics').text
+        self.assertIn('route="/mobile/leaves/types",status="403"', metrics)
+
+    def test_24_home_parallel_sections(self):
+        """ The sections computed in the pool, each on its own cursor, match
+        the ones computed one after the other in the test transaction. """
+        controller = MobileApiHome()
+        env = self.env(user=self.user)
+        mobile_ctx = controller._build_mobile_context(env)
+        sequential, sequential_status = controller._compute_home_sections(env, mobile_ctx, parallel=False)
+        self.assertEqual(sequential_status, dict.fromkeys(MOBILE_HOME_SECTIONS, 200))
+        self.assertTrue(sequential['attendance'])
+
+        parallel, parallel_status = controller._compute_home_sections(env, mobile_ctx, parallel=True)
+        self.assertEqual(parallel_status, sequential_status)
+        self.assertEqual(parallel, sequential)
+
+        # a busy pool only takes the sections it has a free thread for, the
+        # others are computed by the request
+        busy = MOBILE_HOME_WORKERS - 2
+        for _i in range(busy):
+            _home_slots.acquire()
+        try:
+            saturated, saturated_status = controller._compute_home_sections(env, mobile_ctx, parallel=True)
+        finally:
+            for _i in range(busy):
+                _home_slots.release()
+        self.assertEqual(saturated_status, sequential_status)
+        self.assertEqual(saturated, sequential)
+
+    def test_25_mobile_context_invalidation(self):
+        """ The cached mobile context follows the changes of its sources, and
+        only those bump the version of the user. """
+        controller = MobileApiHome()
+        env = self.env(user=self.user)
+
+        def version():
+            return self.user.sudo().mobile_context_version
+
+        self.assertEqual(controller._build_mobile_context(env).department, self.departments[0])
+        start = version()
+        self.employee.private_phone = '+41 00 000 00 00'
+        self.assertEqual(version(), start)
+
+        self.employee.department_id = self.departments[1]
+        self.assertEqual(controller._build_mobile_context(env).department, self.departments[1])
+
+        calendar = self.env['resource.calendar'].create({'name': 'Perf company calendar'})
+        self.employee.resource_calendar_id = False
+        self.employee.company_id.resource_calendar_id = calendar
+        self.assertEqual(controller._build_mobile_context(env).calendar, calendar)
+
+        self.user.partner_id.tz = 'Asia/Tokyo'
+        self.assertEqual(controller._build_mobile_context(env).tz_name, 'Asia/Tokyo')
+
+        current = version()
+        calendar.name = 'Perf company calendar renamed'
+        self.assertGreater(version(), current)
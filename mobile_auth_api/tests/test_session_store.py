@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.tests import TransactionCase, tagged
+from odoo.tests.common import get_db_name
+
+from odoo.addons.mobile_auth_api.session_store import PostgresSessionStore
+
+
+@tagged('post_install', '-at_install')
+class TestPostgresSessionStore(TransactionCase):
+    """ The store works on its own connections, which commit: every session
+    created here is deleted at cleanup. """
+
+    def setUp(self):
+        super().setUp()
+        self.store = PostgresSessionStore(get_db_name(), session_class=http.Session)
+
+    def _new_session(self, **values):
+        session = self.store.new()
+        session.update(values)
+        self.store.save(session)
+        self.addCleanup(self._drop, session.sid)
+        return session
+
+    def _drop(self, sid):
+        with self.store._cursor() as cr:
+            cr.execute("DELETE FROM mobile_http_session WHERE sid = %s", [sid])
+
+    def _age(self, sid, seconds):
+        with self.store._cursor() as cr:
+            cr.execute(
+                "UPDATE mobile_http_session SET last_access = last_access - %s * interval '1 second' "
+                "WHERE sid = %s", [seconds, sid])
+
+    def _last_access(self, sid):
+        with self.store._cursor() as cr:
+            cr.execute("SELECT last_access FROM mobile_http_session WHERE sid = %s", [sid])
+            return cr.fetchone()[0]
+
+    def test_round_trip(self):
+        session = self._new_session(login='mobile', context={'lang': 'en_US'})
+        loaded = self.store.get(session.sid)
+        self.assertFalse(loaded.is_new)
+        self.assertEqual(loaded['login'], 'mobile')
+        self.assertEqual(loaded['context'], {'lang': 'en_US'})
+        self.assertIn(session.sid, self.store.list())
+
+        loaded['login'] = 'changed'
+        self.store.save(loaded)
+        self.assertEqual(self.store.get(session.sid)['login'], 'changed')
+
+        self.store.delete(loaded)
+        missing = self.store.get(session.sid)
+        self.assertTrue(missing.is_new)
+        self.assertNotEqual(missing.sid, session.sid)
+
+    def test_invalid_key(self):
+        self.assertTrue(self.store.get('../../etc/passwd').is_new)
+
+    def test_delete_from_identifiers(self):
+        session = self._new_session(login='mobile')
+        # short prefixes never match
+        self.store.delete_from_identifiers([session.sid[:10]])
+        self.assertFalse(self.store.get(session.sid).is_new)
+        self.store.delete_from_identifiers([session.sid[:42]])
+        self.assertTrue(self.store.get(session.sid).is_new)
+
+    def test_touch(self):
+        session = self._new_session(login='mobile')
+        last_access = self._last_access(session.sid)
+        self.store.get(session.sid)
+        # read right after the save: not written again
+        self.assertEqual(self._last_access(session.sid), last_access)
+
+        self._age(session.sid, 3600)
+        self.store.get(session.sid)
+        self.assertGreater(self._last_access(session.sid), last_access)
+
+    def test_vacuum(self):
+        expired = self._new_session(login='expired')
+        active = self._new_session(login='active')
+        self._age(expired.sid, 7200)
+
+        self.store.vacuum(max_lifetime=3600)
+        self.assertTrue(self.store.get(expired.sid).is_new)
+        self.assertFalse(self.store.get(active.sid).is_new)
+
+    def test_rotate(self):
+        session = self._new_session(login='mobile')
+        old_sid = session.sid
+        self.store.rotate(session, self.env)
+        self.addCleanup(self._drop, session.sid)
+
+        self.assertNotEqual(session.sid, old_sid)
+        self.assertTrue(self.store.get(old_sid).is_new)
+        self.assertEqual(self.store.get(session.sid)['login'], 'mobile')